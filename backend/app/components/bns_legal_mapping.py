@@ -1,13 +1,20 @@
+import asyncio
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
-from typing import List
-from app.rag.query_all import query_bns
-from app.utils.retry import exponential_backoff_retry
+from app.models.structured import structured_llm
+from typing import List, Tuple
+from app.rag.query_all import query_bns, aquery_bns
+from app.rag.retrieval_memo import formatted_block
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
+from app.utils.fir_digest import fir_text_for
+from app.utils.mapped_sections import merge_mapped_sections
 import logging
 
 logger = logging.getLogger(__name__)
 
+# FIR tokens for the points prompt; BNS offences can hide in any part of the narrative.
+FIR_TOKEN_BUDGET = 8000
+
 class SectionsCharged(BaseModel):
     section_number: str = Field(
         description="The section number of the legal provision"
@@ -34,19 +41,14 @@ class PointsToBeCharged(BaseModel):
     )
 
 
-def bns_legal_mapping(state: WorkflowState) -> dict:
-    """
-    Map Bharatiya Nyaya Sanhita (BNS) legal provisions to FIR facts.
-    """
-    logger.info("Starting BNS legal mapping")
+# Built once and reused for every FIR and every point
+points_llm = structured_llm(PointsToBeCharged)
+mapping_llm = structured_llm(BnsLegalMapping)
 
-    if not state.get("pdf_content_in_english"):
-        raise ValueError("pdf_content_in_english is required for FIR fact extraction")
 
-    pdf_content = state["pdf_content_in_english"]
-    logger.debug(f"FIR content length: {len(pdf_content)} characters")
-    llm_with_structured_output = llm_model.with_structured_output(PointsToBeCharged)
-    prompt = f"""
+def _build_points_prompt(pdf_content: str) -> str:
+    """Prompt for extracting chargeable factual points from the FIR."""
+    return f"""
 You are an expert in Indian criminal law (Bharatiya Nyaya Sanhita / BNS).
 
 Task: Extract only factual points from the FIR text below.
@@ -68,50 +70,45 @@ FIR Text:
 
 Output: List only the factual points (maximum 10 high-quality points).
 """
+
+
+def _format_section(result: dict) -> str:
+    """
+    Format one retrieved section with section heading, exact legal wording, and source.
     
-    @exponential_backoff_retry(max_retries=5, max_wait=60)
-    def _invoke_extract_points():
-        return llm_with_structured_output.invoke(prompt)
+    query_bns returns [{'chunk': {...}, 'score': float, 'id': int}]; chunk structure: section, subsection (may be null), chapter, chapter_heading, content, page_number, source_url, pdf_name
+    """
+    chunk = result['chunk']
+    section = chunk['section']
+    subsection = chunk.get('subsection')  # May be null
+    chapter = chunk['chapter']
+    chapter_heading = chunk['chapter_heading']
+    content = chunk['content']
+    page_number = chunk['page_number']
+    source_url = chunk['source_url']
+    pdf_name = chunk['pdf_name']
     
-    response = _invoke_extract_points()
-    points = response.points_to_be_charged
-    logger.info(f"Extracted {len(points)} legal points")
+    # Build section number (section + subsection if present)
+    section_num = section + (f' {subsection}' if subsection else '')
+    
+    section_text = f"{section_num}\n"
+    section_text += f"Chapter: {chapter} - {chapter_heading}\n"
+    section_text += f"Source: Page {page_number}, Chunk {result['id']}\n"
+    section_text += f"Source URL: {source_url}\n"
+    section_text += f"Document: {pdf_name}\n"
+    section_text += f"Legal Text:\n{content}\n"
+    section_text += "-" * 80 + "\n"
+    return section_text
 
-    sections_mapped = []
-    for idx, point in enumerate(points, 1):
-        logger.debug(f"Processing point {idx}/{len(points)}")
-        results = query_bns(point, k=5)
-        logger.debug(f"Found {len(results)} relevant sections for point {idx}")
 
-        # Format retrieved sections with section heading, exact legal wording, and source
-        # query_bns returns [{'chunk': {...}, 'score': float}]; chunk structure: section, subsection (may be null), chapter, chapter_heading, content, page_number, source_url, pdf_name
-        sections_found = ""
-        for i, result in enumerate(results):
-            chunk = result['chunk']
-            section = chunk['section']
-            subsection = chunk.get('subsection')  # May be null
-            chapter = chunk['chapter']
-            chapter_heading = chunk['chapter_heading']
-            content = chunk['content']
-            page_number = chunk['page_number']
-            source_url = chunk['source_url']
-            pdf_name = chunk['pdf_name']
-            chunk_id = i + 1
-            
-            # Build section number (section + subsection if present)
-            section_num = section + (f' {subsection}' if subsection else '')
-            
-            sections_found += f"{section_num}\n"
-            sections_found += f"Chapter: {chapter} - {chapter_heading}\n"
-            sections_found += f"Source: Page {page_number}, Chunk {chunk_id}\n"
-            sections_found += f"Source URL: {source_url}\n"
-            sections_found += f"Document: {pdf_name}\n"
-            sections_found += f"Legal Text:\n{content}\n"
-            sections_found += "-" * 80 + "\n"
+def _format_retrieved_sections(results: List[dict]) -> str:
+    """Format retrieved sections; each section's block is rendered once per workflow and reused across points."""
+    return "".join(formatted_block('bns', result, _format_section) for result in results)
 
-        # Create prompt with the legal point and retrieved sections
-        llm_with_structured_output = llm_model.with_structured_output(BnsLegalMapping)
-        prompt = f"""
+
+def _build_mapping_prompt(point: str, sections_found: str) -> str:
+    """Prompt for mapping one legal point to the retrieved BNS sections."""
+    return f"""
 You are an expert in BNS (Bharatiya Nyaya Sanhita) law.
 
 Legal Point (from FIR):
@@ -156,25 +153,104 @@ For each included section, return:
 If no section from the retrieved text directly applies to the legal point, return an empty list [].
 Return output as JSON list only.
 """
+
+
+def bns_legal_mapping(state: WorkflowState) -> dict:
+    """
+    Map Bharatiya Nyaya Sanhita (BNS) legal provisions to FIR facts.
+    """
+    logger.info("Starting BNS legal mapping")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for FIR fact extraction")
+    
+    pdf_content = fir_text_for(state, FIR_TOKEN_BUDGET)
+    logger.debug(f"FIR content length: {len(pdf_content)} characters")
+    prompt = _build_points_prompt(pdf_content)
+    
+    @exponential_backoff_retry(max_retries=5, max_wait=60)
+    def _invoke_extract_points():
+        return points_llm.invoke(prompt)
+    
+    response = _invoke_extract_points()
+    points = response.points_to_be_charged
+    logger.info(f"Extracted {len(points)} legal points")
+
+    sections_mapped = []
+    retrieved = []
+    for idx, point in enumerate(points, 1):
+        logger.debug(f"Processing point {idx}/{len(points)}")
+        results = query_bns(point, k=5)
+        retrieved.append(results)
+        logger.debug(f"Found {len(results)} relevant sections for point {idx}")
+        sections_found = _format_retrieved_sections(results)
+
+        # Create prompt with the legal point and retrieved sections
+        prompt = _build_mapping_prompt(point, sections_found)
         
         @exponential_backoff_retry(max_retries=5, max_wait=60)
         def _invoke_map_sections():
-            return llm_with_structured_output.invoke(prompt)
+            return mapping_llm.invoke(prompt)
         
         response = _invoke_map_sections()
         sections_mapped.append(response.sections)
         logger.debug(f"Mapped point {idx} to {len(response.sections)} sections")
 
-    # Flatten the list of lists into a single list
-    flattened_sections = []
-    for chunk_sections in sections_mapped:
-        flattened_sections.extend(chunk_sections)
-    
-    # Convert back to list of dicts
-    final_sections = [section.model_dump() if hasattr(section, 'model_dump') else section for section in flattened_sections]
+    # One entry per section, merged across the points that support it
+    final_sections = merge_mapped_sections(sections_mapped, retrieved)
     
     logger.info(f"Mapped {len(final_sections)} BNS sections")
+    
+    return {
+        "bns_sections_mapped": final_sections
+    }
+
+
+async def abns_legal_mapping(state: WorkflowState) -> dict:
+    """
+    Async variant of bns_legal_mapping; points are mapped concurrently.
+    """
+    logger.info("Starting BNS legal mapping (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for FIR fact extraction")
+    
+    pdf_content = fir_text_for(state, FIR_TOKEN_BUDGET)
+    logger.debug(f"FIR content length: {len(pdf_content)} characters")
+    prompt = _build_points_prompt(pdf_content)
+    
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def _ainvoke_extract_points():
+        return await points_llm.ainvoke(prompt)
+    
+    response = await _ainvoke_extract_points()
+    points = response.points_to_be_charged
+    logger.info(f"Extracted {len(points)} legal points")
+
+    async def _map_point(idx: int, point: str) -> Tuple[List[SectionsCharged], List[dict]]:
+        results = await aquery_bns(point, k=5)
+        logger.debug(f"Found {len(results)} relevant sections for point {idx}")
+        mapping_prompt = _build_mapping_prompt(point, _format_retrieved_sections(results))
+        
+        @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+        async def _ainvoke_map_sections():
+            return await mapping_llm.ainvoke(mapping_prompt)
+        
+        mapped = await _ainvoke_map_sections()
+        logger.debug(f"Mapped point {idx} to {len(mapped.sections)} sections")
+        return mapped.sections, results
 
+    # gather preserves point order, so output matches the sync node
+    mapped_points = await asyncio.gather(
+        *(_map_point(idx, point) for idx, point in enumerate(points, 1))
+    )
+    sections_mapped = [sections for sections, _ in mapped_points]
+    retrieved = [results for _, results in mapped_points]
+
+    final_sections = merge_mapped_sections(sections_mapped, retrieved)
+    
+    logger.info(f"Mapped {len(final_sections)} BNS sections")
+    
     return {
         "bns_sections_mapped": final_sections
     }
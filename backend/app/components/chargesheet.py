@@ -1,8 +1,8 @@
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
+from app.models.structured import structured_llm
 from typing import List
-from app.utils.retry import exponential_backoff_retry
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,15 +25,12 @@ class Chargesheet(BaseModel):
     judicial_balance: str = Field(description="Balanced judicial perspective considering both prosecution and defence aspects, public interest, and legal principles")
     prosecution_prayer: List[str] = Field(description="List of specific prayers/requests to the court (e.g., 'Cognizance of offence', 'Framing of charges', 'Bail to be denied', etc.)")
 
-def generate_chargesheet(state: WorkflowState) -> dict:
-    """
-    Generate a comprehensive chargesheet for NDPS case prosecution.
-    """
-    logger.info("Starting chargesheet generation")
-    
-    if not state.get("pdf_content_in_english"):
-        raise ValueError("pdf_content_in_english is required for chargesheet generation")
-    
+
+chargesheet_llm = structured_llm(Chargesheet)
+
+
+def _build_prompt(state: WorkflowState) -> str:
+    """Assemble the LLM prompt from the FIR content in state."""
     pdf_content = state["pdf_content_in_english"]
     
     # Get FIR facts if available
@@ -155,10 +152,24 @@ You MUST strictly follow these rules:
 Generate the chargesheet now:
 """
     
+    return content_for_llm
+
+
+def generate_chargesheet(state: WorkflowState) -> dict:
+    """
+    Generate a comprehensive chargesheet for NDPS case prosecution.
+    """
+    logger.info("Starting chargesheet generation")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for chargesheet generation")
+    
+    content_for_llm = _build_prompt(state)
+    
     # Generate chargesheet with structured output
     @exponential_backoff_retry(max_retries=5, max_wait=60)
     def _generate_chargesheet():
-        return llm_model.with_structured_output(Chargesheet).invoke(content_for_llm)
+        return chargesheet_llm.invoke(content_for_llm)
     
     result = _generate_chargesheet()
     
@@ -168,3 +179,29 @@ Generate the chargesheet now:
     return {
         "chargesheet": result.model_dump()
     }
+
+
+async def agenerate_chargesheet(state: WorkflowState) -> dict:
+    """
+    Async variant of generate_chargesheet using ainvoke.
+    """
+    logger.info("Starting chargesheet generation (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for chargesheet generation")
+    
+    content_for_llm = _build_prompt(state)
+    
+    # Generate chargesheet with structured output
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def _generate_chargesheet():
+        return await chargesheet_llm.ainvoke(content_for_llm)
+    
+    result = await _generate_chargesheet()
+    
+    logger.info(f"Generated chargesheet: {result.case_title}")
+
+    # Convert Pydantic model to dict for JSON serialization
+    return {
+        "chargesheet": result.model_dump()
+    }
@@ -1,13 +1,18 @@
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
+from app.models.structured import structured_llm
 from typing import List
-from app.utils.retry import exponential_backoff_retry
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
+from app.utils.fir_digest import fir_text_for
+from app.models.prompts import build_messages
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+# FIR tokens in the prompt; defence arguments exploit gaps anywhere in the narrative.
+FIR_TOKEN_BUDGET = 8000
+
 class DefencePerspectiveRebuttal(BaseModel):
     """Case-specific defence perspective and rebuttal pair"""
     defence_perspective: List[str] = Field(
@@ -21,20 +26,13 @@ class DefencePerspectiveRebuttalList(BaseModel):
     defence_perspective_rebuttal: List[DefencePerspectiveRebuttal] = Field(
         description="List of defence perspective and rebuttal pairs"
     )
-def generate_defence_perspective_rebuttal(state: WorkflowState) -> dict:
-    """
-    Generate defence perspective and rebuttal from FIR content and forensic guidelines.
-    """
-    logger.info("Starting defence perspective and rebuttal generation")
-    
-    if not state.get("pdf_content_in_english"):
-        raise ValueError("pdf_content_in_english is required for defence perspective and rebuttal generation")
-    
-    pdf_content = state["pdf_content_in_english"]
-    
-    
-    # Construct content for LLM
-    content_for_llm = f"""You are an expert NDPS Act criminal law analyst, trial lawyer, and prosecution strategy advisor with deep knowledge of Supreme Court and High Court NDPS jurisprudence.
+
+
+defence_rebuttal_llm = structured_llm(DefencePerspectiveRebuttalList)
+
+
+# Static prompt sent as the system message; the FIR follows in the user message
+DEFENCE_REBUTTAL_INSTRUCTIONS = """You are an expert NDPS Act criminal law analyst, trial lawyer, and prosecution strategy advisor with deep knowledge of Supreme Court and High Court NDPS jurisprudence.
 
 Your task is to analyse the FIR content provided below and generate a **case-specific Defence Perspective and corresponding Prosecution Rebuttal**.
 
@@ -125,16 +123,29 @@ L. **Witnesses not properly briefed**
 - Court-ready
 - Practical and realistic
 - No speculation beyond FIR
+"""
 
-### FIR CONTENT:
-{pdf_content}
 
-"""
+def _build_prompt(state: WorkflowState) -> list:
+    """Assemble the LLM messages: static analysis rules first, FIR content last."""
+    return build_messages(DEFENCE_REBUTTAL_INSTRUCTIONS, fir_text_for(state, FIR_TOKEN_BUDGET))
+
+
+def generate_defence_perspective_rebuttal(state: WorkflowState) -> dict:
+    """
+    Generate defence perspective and rebuttal from FIR content and forensic guidelines.
+    """
+    logger.info("Starting defence perspective and rebuttal generation")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for defence perspective and rebuttal generation")
+    
+    content_for_llm = _build_prompt(state)
     
     # Generate defence perspective and rebuttal with structured output
     @exponential_backoff_retry(max_retries=5, max_wait=60)
     def _generate_defence_perspective_rebuttal():
-        return llm_model.with_structured_output(DefencePerspectiveRebuttalList).invoke(content_for_llm)
+        return defence_rebuttal_llm.invoke(content_for_llm)
     
     result = _generate_defence_perspective_rebuttal()
     
@@ -147,4 +158,34 @@ L. **Witnesses not properly briefed**
     # Return updated state
     return {
         "defence_perspective_rebuttal": defence_perspective_rebuttal_list_data
-    }
\ No newline at end of file
+    }
+
+
+async def agenerate_defence_perspective_rebuttal(state: WorkflowState) -> dict:
+    """
+    Async variant of generate_defence_perspective_rebuttal using ainvoke.
+    """
+    logger.info("Starting defence perspective and rebuttal generation (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for defence perspective and rebuttal generation")
+    
+    content_for_llm = _build_prompt(state)
+    
+    # Generate defence perspective and rebuttal with structured output
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def _generate_defence_perspective_rebuttal():
+        return await defence_rebuttal_llm.ainvoke(content_for_llm)
+    
+    result = await _generate_defence_perspective_rebuttal()
+    
+    # Extract the list from the result
+    defence_perspective_rebuttal_list_data = result.defence_perspective_rebuttal if hasattr(result, 'defence_perspective_rebuttal') else []
+    
+    total_items = len(defence_perspective_rebuttal_list_data)
+    logger.info(f"Generated {total_items} defence perspective and rebuttal pairs")
+
+    # Return updated state
+    return {
+        "defence_perspective_rebuttal": defence_perspective_rebuttal_list_data
+    }
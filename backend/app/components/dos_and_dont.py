@@ -1,13 +1,18 @@
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
+from app.models.structured import structured_llm
 from typing import List
-from app.utils.retry import exponential_backoff_retry
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
+from app.utils.fir_digest import fir_text_for
+from app.models.prompts import build_messages
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+# FIR tokens in the prompt; dos and donts need the concrete case facts, not every form field.
+FIR_TOKEN_BUDGET = 6000
+
 class DosAndDonts(BaseModel):
     """Case-specific dos and donts for law enforcement officers"""
     dos: List[str] = Field(
@@ -19,6 +24,10 @@ class DosAndDonts(BaseModel):
         max_length=15
     )
 
+
+dos_and_donts_llm = structured_llm(DosAndDonts)
+
+
 def format_sections(sections: List[dict] | None) -> str:
     """Format list of section dictionaries into readable text"""
     if not sections:
@@ -33,20 +42,8 @@ def format_sections(sections: List[dict] | None) -> str:
     
     return "\n".join(formatted)
 
-def generate_dos_and_donts(state: WorkflowState) -> dict:
-    """
-    Generate comprehensive dos and donts from FIR content and forensic guidelines.
-    """
-    logger.info("Starting dos and donts generation")
-    
-    if not state.get("pdf_content_in_english"):
-        raise ValueError("pdf_content_in_english is required for dos and donts generation")
-    
-    pdf_content = state["pdf_content_in_english"]
-    
-    
-    # Construct content for LLM
-    content_for_llm = f"""You are an expert legal advisor for NDPS cases. Based on the FIR content and legal sections below, generate SPECIFIC, CASE-SPECIFIC dos and donts for law enforcement officers handling THIS PARTICULAR CASE.
+# Static prompt sent as the system message; the FIR follows in the user message
+DOS_AND_DONTS_INSTRUCTIONS = """You are an expert legal advisor for NDPS cases. Based on the FIR content provided after these instructions, generate SPECIFIC, CASE-SPECIFIC dos and donts for law enforcement officers handling THIS PARTICULAR CASE.
 
 CRITICAL REQUIREMENTS:
 1. Each do/don't MUST reference specific details from the FIR (names, dates, locations, quantities, exhibit numbers, times, etc.)
@@ -179,9 +176,6 @@ viii. Appeals: Any appeal against the order of a Competent Authority lies with t
 
 ========================
 
-FIR Content:
-{pdf_content}
-
 GENERATION RULES:
 - DO NOT write generic statements like "Follow proper procedures" or "Maintain chain of custody"
 - DO write specific statements like "Ensure the seized ganja bundles (exhibits Muddamal-A and Muddamal-B, 13.100 kg) seized on 19-Sep-2025 at 10:25 hrs are sealed with proper seals and panchnama dated 19-Sep-2025 is signed by all panch witnesses"
@@ -223,11 +217,28 @@ EXAMPLES OF GOOD DON'TS (case-specific):
 ✓ "Do not send samples to FSL without ensuring all infirmities are removed, as returned samples with objections are fatal for prosecution case"
 
 Generate 8-10 specific dos and 8-10 specific donts that are directly tied to THIS case's facts, evidence, accused, witnesses, dates, locations, and legal requirements."""
+
+
+def _build_prompt(state: WorkflowState) -> list:
+    """Assemble the LLM messages: static guidelines first, FIR content last."""
+    return build_messages(DOS_AND_DONTS_INSTRUCTIONS, fir_text_for(state, FIR_TOKEN_BUDGET))
+
+
+def generate_dos_and_donts(state: WorkflowState) -> dict:
+    """
+    Generate comprehensive dos and donts from FIR content and forensic guidelines.
+    """
+    logger.info("Starting dos and donts generation")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for dos and donts generation")
+    
+    content_for_llm = _build_prompt(state)
     
     # Generate dos and donts with structured output
     @exponential_backoff_retry(max_retries=5, max_wait=60)
     def generate_dos_donts():
-        return llm_model.with_structured_output(DosAndDonts).invoke(content_for_llm)
+        return dos_and_donts_llm.invoke(content_for_llm)
     
     dos_and_donts = generate_dos_donts()
     
@@ -237,4 +248,31 @@ Generate 8-10 specific dos and 8-10 specific donts that are directly tied to THI
     return {
         "dos": dos_and_donts.dos,
         "donts": dos_and_donts.donts,
-    }
\ No newline at end of file
+    }
+
+
+async def agenerate_dos_and_donts(state: WorkflowState) -> dict:
+    """
+    Async variant of generate_dos_and_donts using ainvoke.
+    """
+    logger.info("Starting dos and donts generation (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for dos and donts generation")
+    
+    content_for_llm = _build_prompt(state)
+    
+    # Generate dos and donts with structured output
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def generate_dos_donts():
+        return await dos_and_donts_llm.ainvoke(content_for_llm)
+    
+    dos_and_donts = await generate_dos_donts()
+    
+    logger.info(f"Generated {len(dos_and_donts.dos)} dos and {len(dos_and_donts.donts)} donts")
+
+    # Return updated state
+    return {
+        "dos": dos_and_donts.dos,
+        "donts": dos_and_donts.donts,
+    }
@@ -1,13 +1,21 @@
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
-from typing import List
-from app.rag.query_all import query_forensic
-from app.utils.retry import exponential_backoff_retry
+from app.models.structured import structured_llm
+from typing import Dict, List
+from app.models.rate_limiter import estimate_tokens
+from app.rag.query_all import query_forensic_multi, aquery_forensic_multi
+from app.rag.retrieval_memo import formatted_block
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Guidelines retrieved per checkpoint
+GUIDELINES_PER_CHECKPOINT = 5
+
+# Prompt tokens for the deduplicated guideline text (about 20 forensic chunks)
+GUIDELINE_TOKEN_BUDGET = 6000
+
 class EvidenceChecklist(BaseModel):
     evidence_checklist: str = Field(
         description="Formatted evidence checklist as a single string with bullet points and descriptions"
@@ -19,21 +27,14 @@ class InvestigationCheckpoints(BaseModel):
         max_items=10
     )
 
-def generate_evidence_checklist(state: WorkflowState) -> dict:
-    """
-    Generate comprehensive evidence checklist from FIR content and forensic guidelines.
-    """
-    logger.info("Starting evidence checklist generation")
-    
-    if not state.get("pdf_content_in_english"):
-        raise ValueError("pdf_content_in_english is required for evidence checklist generation")
-    
-    pdf_content = state["pdf_content_in_english"]
-    logger.debug(f"FIR content length: {len(pdf_content)} characters")
-    
-    llm_with_structured_output = llm_model.with_structured_output(InvestigationCheckpoints)
-    
-    prompt = f"""
+
+checkpoints_llm = structured_llm(InvestigationCheckpoints)
+checklist_llm = structured_llm(EvidenceChecklist)
+
+
+def _build_checkpoints_prompt(pdf_content: str) -> str:
+    """Prompt for extracting investigation checkpoints from the FIR."""
+    return f"""
 You are an expert in forensic investigation procedures for NDPS cases.
 
 Task: Identify investigation gaps and procedural verification points from the FIR text below.
@@ -53,44 +54,89 @@ FIR Text:
 
 Output: List investigation checkpoints that need verification/action."""
 
-    response = llm_with_structured_output.invoke(prompt)
-    checkpoints = response.investigation_checkpoints
-    logger.info(f"Extracted {len(checkpoints)} investigation checkpoints")
+
+def _format_guideline(result: dict) -> str:
+    """Format one retrieved forensic guideline (chapter, headings, source and content)."""
+    chunk = result['chunk']
+    chapter = chunk.get('chapter', 'N/A')
+    chapter_title = chunk.get('chapter_title', 'N/A')
+    headings = chunk.get('headings', [])
+    content = chunk['content']
+    page_number = chunk.get('page_number')
+    source_url = chunk.get('source_url')
+    pdf_name = chunk.get('pdf_name', 'N/A')
     
-    # Collect all forensic guidelines for comprehensive analysis
+    guideline_text = f"Chapter: {chapter} - {chapter_title}\n"
+    if headings:
+        guideline_text += f"Headings: {' > '.join(headings) if isinstance(headings, list) else headings}\n"
+    guideline_text += f"Source: Page {page_number if page_number is not None else 'N/A'}\n"
+    if source_url:
+        guideline_text += f"Source URL: {source_url}\n"
+    guideline_text += f"Document: {pdf_name}\n"
+    guideline_text += f"Content:\n{content}\n"
+    guideline_text += "-" * 80 + "\n"
+    return guideline_text
+
+
+def _guideline_tokens(result: dict) -> int:
+    chunk = result['chunk']
+    return chunk.get('token_count') or estimate_tokens(chunk.get('content', ''))
+
+
+def _select_guidelines(results_per_checkpoint: List[List[dict]]) -> List[dict]:
+    """
+    Deduplicate retrieved guidelines by chunk and fit them into GUIDELINE_TOKEN_BUDGET.
+
+    Each chunk is kept once with the checkpoints it was retrieved for. The best
+    chunk of every checkpoint is taken first so each checkpoint keeps some
+    guidance; the rest follow by the number of checkpoints they support, then
+    by score.
+    """
+    guidelines: Dict[object, dict] = {}
+    for idx, results in enumerate(results_per_checkpoint, 1):
+        for result in results:
+            key = result['chunk'].get('chunk_id', result.get('id'))
+            entry = guidelines.setdefault(key, {"key": key, "result": result, "checkpoints": [], "score": result['score']})
+            if idx not in entry["checkpoints"]:
+                entry["checkpoints"].append(idx)
+            entry["score"] = max(entry["score"], result['score'])
+
+    ranked = sorted(guidelines.values(), key=lambda entry: (-len(entry["checkpoints"]), -entry["score"]))
+    rank = {entry["key"]: position for position, entry in enumerate(ranked)}
+    best_per_checkpoint = [
+        guidelines[results[0]['chunk'].get('chunk_id', results[0].get('id'))]
+        for results in results_per_checkpoint if results
+    ]
+
+    selected, used_tokens = {}, 0
+    for entry in best_per_checkpoint + ranked:
+        if entry["key"] in selected:
+            continue
+        tokens = _guideline_tokens(entry["result"])
+        if used_tokens + tokens > GUIDELINE_TOKEN_BUDGET:
+            continue
+        selected[entry["key"]] = entry
+        used_tokens += tokens
+
+    retrieved = sum(len(results) for results in results_per_checkpoint)
+    logger.info(f"Guidelines: {retrieved} retrieved, {len(guidelines)} distinct, "
+                f"{len(selected)} kept (~{used_tokens} tokens)")
+    return sorted(selected.values(), key=lambda entry: rank[entry["key"]])
+
+
+def _format_guidelines(checkpoints: List[str], results_per_checkpoint: List[List[dict]]) -> str:
+    """Format the selected forensic guidelines, each once, under the checkpoints it supports."""
     all_guidelines_text = ""
-    
-    for idx, checkpoint in enumerate(checkpoints, 1):
-        logger.debug(f"Processing checkpoint {idx}/{len(checkpoints)}")
-        results = query_forensic(checkpoint, k=5)
-        logger.debug(f"Found {len(results)} relevant guidelines for checkpoint {idx}")
-        
-        # Format retrieved guidelines
-        for i, result in enumerate(results):
-            chunk = result['chunk']
-            chapter = chunk.get('chapter', 'N/A')
-            chapter_title = chunk.get('chapter_title', 'N/A')
-            headings = chunk.get('headings', [])
-            content = chunk['content']
-            page_number = chunk.get('page_number')
-            source_url = chunk.get('source_url')
-            pdf_name = chunk.get('pdf_name', 'N/A')
-            
-            all_guidelines_text += f"\n--- Checkpoint {idx}: {checkpoint} ---\n"
-            all_guidelines_text += f"Chapter: {chapter} - {chapter_title}\n"
-            if headings:
-                all_guidelines_text += f"Headings: {' > '.join(headings) if isinstance(headings, list) else headings}\n"
-            all_guidelines_text += f"Source: Page {page_number if page_number is not None else 'N/A'}\n"
-            if source_url:
-                all_guidelines_text += f"Source URL: {source_url}\n"
-            all_guidelines_text += f"Document: {pdf_name}\n"
-            all_guidelines_text += f"Content:\n{content}\n"
-            all_guidelines_text += "-" * 80 + "\n"
-    
-    # Generate comprehensive evidence checklist
-    llm_with_checklist_output = llm_model.with_structured_output(EvidenceChecklist)
-    
-    checklist_prompt = f"""
+    for entry in _select_guidelines(results_per_checkpoint):
+        supported = "; ".join(f"[{idx}] {checkpoints[idx - 1]}" for idx in entry["checkpoints"])
+        all_guidelines_text += f"\n--- Checkpoints: {supported} ---\n"
+        all_guidelines_text += formatted_block('forensic', entry["result"], _format_guideline)
+    return all_guidelines_text
+
+
+def _build_checklist_prompt(pdf_content: str, all_guidelines_text: str) -> str:
+    """Prompt for generating the final evidence checklist."""
+    return f"""
 You are an expert forensic investigator and legal consultant for NDPS cases.
 
 FIR Content:
@@ -139,9 +185,38 @@ End with:
 Output the complete formatted checklist as a single text string."""
 
 
+def generate_evidence_checklist(state: WorkflowState) -> dict:
+    """
+    Generate comprehensive evidence checklist from FIR content and forensic guidelines.
+    """
+    logger.info("Starting evidence checklist generation")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for evidence checklist generation")
+    
+    pdf_content = state["pdf_content_in_english"]
+    logger.debug(f"FIR content length: {len(pdf_content)} characters")
+    
+    prompt = _build_checkpoints_prompt(pdf_content)
+
+    @exponential_backoff_retry(max_retries=5, max_wait=60)
+    def _invoke_checkpoints():
+        return checkpoints_llm.invoke(prompt)
+
+    response = _invoke_checkpoints()
+    checkpoints = response.investigation_checkpoints
+    logger.info(f"Extracted {len(checkpoints)} investigation checkpoints")
+    
+    # All checkpoints in one embedding request and one FAISS search
+    results_per_checkpoint = query_forensic_multi(checkpoints, k=GUIDELINES_PER_CHECKPOINT) if checkpoints else []
+    all_guidelines_text = _format_guidelines(checkpoints, results_per_checkpoint)
+    
+    # Generate comprehensive evidence checklist
+    checklist_prompt = _build_checklist_prompt(pdf_content, all_guidelines_text)
+
     @exponential_backoff_retry(max_retries=5, max_wait=60)
     def _invoke_generate_checklist():
-        return llm_with_checklist_output.invoke(checklist_prompt)
+        return checklist_llm.invoke(checklist_prompt)
     
     checklist_response = _invoke_generate_checklist()
     evidence_checklist = checklist_response.evidence_checklist
@@ -153,4 +228,44 @@ Output the complete formatted checklist as a single text string."""
     
     return {
         "evidence_checklist": evidence_checklist
-    }
\ No newline at end of file
+    }
+
+
+async def agenerate_evidence_checklist(state: WorkflowState) -> dict:
+    """
+    Async variant of generate_evidence_checklist using ainvoke.
+    """
+    logger.info("Starting evidence checklist generation (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for evidence checklist generation")
+    
+    pdf_content = state["pdf_content_in_english"]
+    logger.debug(f"FIR content length: {len(pdf_content)} characters")
+    
+    prompt = _build_checkpoints_prompt(pdf_content)
+
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def _ainvoke_checkpoints():
+        return await checkpoints_llm.ainvoke(prompt)
+
+    response = await _ainvoke_checkpoints()
+    checkpoints = response.investigation_checkpoints
+    logger.info(f"Extracted {len(checkpoints)} investigation checkpoints")
+    
+    results_per_checkpoint = await aquery_forensic_multi(checkpoints, k=GUIDELINES_PER_CHECKPOINT) if checkpoints else []
+    all_guidelines_text = _format_guidelines(checkpoints, results_per_checkpoint)
+    
+    checklist_prompt = _build_checklist_prompt(pdf_content, all_guidelines_text)
+
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def _ainvoke_generate_checklist():
+        return await checklist_llm.ainvoke(checklist_prompt)
+    
+    checklist_response = await _ainvoke_generate_checklist()
+    
+    logger.info(f"Generated evidence checklist")
+    
+    return {
+        "evidence_checklist": checklist_response.evidence_checklist
+    }
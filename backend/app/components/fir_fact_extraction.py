@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
+from app.models.structured import structured_llm
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
 
 class FirFactExtraction(BaseModel):
     date_time_location: str = Field(
@@ -34,6 +35,33 @@ class FirFactExtraction(BaseModel):
         description="Extract ONLY facts directly stated in FIR: sections of law applied against accused (NDPS sections, IPC if any). Use only what is written in the FIR. Must be between 40-100 words."
     )
 
+
+fir_fact_llm = structured_llm(FirFactExtraction)
+
+
+def _build_prompt(pdf_content: str) -> str:
+    """Prompt for structured FIR fact extraction."""
+    return f"""Extract the following information from the FIR text. 
+        CRITICAL REQUIREMENTS:
+        1. Extract ONLY facts directly stated in the FIR text - do not add, interpret, or infer anything
+        2. Each field must contain between 40-100 words
+        3. Do NOT add legal interpretations, conclusions, or assumptions not explicitly stated in the FIR
+        4. Use markdown bold formatting (**text**) to highlight important/relevant information such as:
+           - Names, dates, times, locations
+           - Section numbers, legal references
+           - Quantities, amounts, measurements
+           - Key actions, procedures, or facts directly mentioned
+           - Important details that stand out in the FIR
+
+        FIR Text:
+        {pdf_content}
+
+        Extract all relevant information for each field using ONLY facts directly from the FIR text above.
+        Do not add anything that is not explicitly stated in the FIR. 
+        Each field must contain between 40-100 words of actual FIR content.
+        Be thorough but only use what is written in the FIR. 
+        Make important information bold using **text** markdown syntax."""
+
 def extract_fir_fact(state: WorkflowState) -> dict:
     """
     Extract FIR facts from translated PDF content using structured output.
@@ -56,30 +84,15 @@ def extract_fir_fact(state: WorkflowState) -> dict:
     pdf_content = state["pdf_content_in_english"]
 
     try:
-        prompt = f"""Extract the following information from the FIR text. 
-        CRITICAL REQUIREMENTS:
-        1. Extract ONLY facts directly stated in the FIR text - do not add, interpret, or infer anything
-        2. Each field must contain between 40-100 words
-        3. Do NOT add legal interpretations, conclusions, or assumptions not explicitly stated in the FIR
-        4. Use markdown bold formatting (**text**) to highlight important/relevant information such as:
-           - Names, dates, times, locations
-           - Section numbers, legal references
-           - Quantities, amounts, measurements
-           - Key actions, procedures, or facts directly mentioned
-           - Important details that stand out in the FIR
-
-        FIR Text:
-        {pdf_content}
-
-        Extract all relevant information for each field using ONLY facts directly from the FIR text above.
-        Do not add anything that is not explicitly stated in the FIR. 
-        Each field must contain between 40-100 words of actual FIR content.
-        Be thorough but only use what is written in the FIR. 
-        Make important information bold using **text** markdown syntax."""
+        prompt = _build_prompt(pdf_content)
         
         # Use structured output to get Pydantic model
-        llm_with_structured_output = llm_model.with_structured_output(FirFactExtraction)
-        response = llm_with_structured_output.invoke(prompt)
+
+        @exponential_backoff_retry(max_retries=5, max_wait=60)
+        def _invoke_extraction():
+            return fir_fact_llm.invoke(prompt)
+
+        response = _invoke_extraction()
         
         # Convert Pydantic model to dict and return
         fir_facts = response.model_dump()
@@ -89,4 +102,36 @@ def extract_fir_fact(state: WorkflowState) -> dict:
         }
     
     except Exception as e:
-        raise Exception(f"Error extracting FIR facts: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error extracting FIR facts: {str(e)}")
+
+
+async def aextract_fir_fact(state: WorkflowState) -> dict:
+    """
+    Async variant of extract_fir_fact using ainvoke.
+    
+    Args:
+        state: WorkflowState containing pdf_content_in_english
+        
+    Returns:
+        Dictionary with FIR facts added to state
+    """
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for FIR fact extraction")
+    
+    pdf_content = state["pdf_content_in_english"]
+
+    try:
+        prompt = _build_prompt(pdf_content)
+
+        @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+        async def _ainvoke_extraction():
+            return await fir_fact_llm.ainvoke(prompt)
+
+        response = await _ainvoke_extraction()
+        
+        return {
+            "fir_facts": response.model_dump()
+        }
+    
+    except Exception as e:
+        raise Exception(f"Error extracting FIR facts: {str(e)}")
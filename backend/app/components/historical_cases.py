@@ -1,35 +1,82 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, List
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
 from app.models.openai import llm_model
-from app.rag import query_ndps_judgements
+from app.models.structured import structured_llm
+from app.rag import query_ndps_judgements_multi, aquery_ndps_judgements_multi, reciprocal_rank_fusion
+from app.rag.judgement_metadata import (
+    ISSUE_PATTERNS, SUBSTANCE_VARIATIONS, SUMMARY_MAX_CHARS, build_summary_prompt, extract_case_title,
+    filter_ids, load_judgement_metadata, summary_fallback,
+)
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
+from app.utils.fir_digest import fir_text_for
 import logging
 
 logger = logging.getLogger(__name__)
 
-class Question(BaseModel):
-    question: str = Field(description="Question that I can search in historical NDPS judgements related to the given FIR")
+# FIR tokens for the search extraction when fir_facts is not in state; it only needs the gist of the case.
+FIR_TOKEN_BUDGET = 2000
 
-def historical_cases(state: WorkflowState) -> dict:
-    """
-    Search for historical cases related to the FIR using FAISS index of NDPS judgements.
-    """
-    logger.info("Starting historical cases search")
-    
-    if not state.get("pdf_content_in_english"):
-        raise ValueError("pdf_content_in_english is required for historical cases search")
-    
-    pdf_content = state["pdf_content_in_english"]
-    logger.debug(f"FIR content length: {len(pdf_content)} characters")
-    
-    # Generate search question based on FIR content
-    prompt = f"""Based on the following FIR content, create one specific search query to find relevant court judgments in NDPS cases from the historical judgements database.
+# Historical cases returned per FIR
+MAX_CASES = 5
+
+# Judgements summarised concurrently when metadata.json has no summary for them
+SUMMARY_CONCURRENCY = int(os.getenv("HISTORICAL_SUMMARY_CONCURRENCY", "5"))
+
+# Judgements retrieved per query facet before fusion
+RESULTS_PER_FACET = 10
+
+# Search phrasing for each procedural issue key in the procedural-defects facet
+ISSUE_QUERIES = {
+    'section_50': "Section 50 NDPS personal search before Gazetted Officer or Magistrate",
+    'section_52a': "Section 52A sampling and inventory of seized drugs",
+    'section_42': "Section 42 recording of secret information",
+    'section_37': "Section 37 bail restrictions",
+    'section_67': "Section 67 statement admissibility",
+    'bail': "bail",
+    'commercial_quantity': "commercial quantity",
+    'small_quantity': "small quantity",
+}
+
+class JudgementSearch(BaseModel):
+    query: str = Field(description="Question that I can search in historical NDPS judgements related to the given FIR. MUST include the substance name")
+    substance: str = Field(description="Narcotic drug or psychotropic substance seized, as its common name in lower case (e.g. ganja, heroin, charas), or 'unknown'")
+    quantity_class: str = Field(description="NDPS quantity class of the seizure: 'small', 'intermediate', 'commercial' or 'unknown'")
+    procedural_issues: List[str] = Field(
+        description=f"Procedural or legal issues the FIR raises, using only these keys: {', '.join(ISSUE_PATTERNS)}",
+        max_length=5
+    )
+    accused_profile: str = Field(description="Legally relevant profile of the accused in a few words (e.g. 'minor', 'woman', 'foreign national', 'repeat offender'), or 'none'")
 
-FIR Content: {pdf_content}
 
-CRITICAL REQUIREMENTS:
-1. You MUST identify the specific substance/drug mentioned in the FIR (e.g., Ganja, Cannabis, Heroin, Cocaine, etc.)
-2. The search query MUST include the substance name to ensure relevance
-3. Extract other key facts: age of accused, quantity seized (small/intermediate/commercial), procedural issues, etc.
+judgement_search_llm = structured_llm(JudgementSearch)
+
+
+def _search_context(state: WorkflowState) -> str:
+    """Extracted FIR facts when the extraction node has run, else the FIR text within budget."""
+    fir_facts = state.get("fir_facts")
+    if fir_facts:
+        return "\n".join(f"- {key}: {value}" for key, value in fir_facts.items())
+    return fir_text_for(state, FIR_TOKEN_BUDGET)
+
+
+def _build_search_prompt(fir_context: str) -> str:
+    """Prompt for the single extraction of search query, substance, quantity class and issues."""
+    return f"""Based on the following FIR facts, prepare a search of the historical NDPS judgements database.
+
+FIR Facts:
+{fir_context}
+
+Extract:
+1. substance: the specific substance/drug seized (e.g., Ganja, Cannabis, Heroin, Cocaine, Charas), as its common name in lower case
+2. quantity_class: small, intermediate or commercial quantity as stated or implied by the quantity seized, else unknown
+3. procedural_issues: legally significant procedural points (e.g. Section 50 search, Section 52A sampling, Section 42 information, bail) using only the allowed keys
+4. accused_profile: legally relevant characteristics of the accused (minor, woman, foreign national, repeat offender), else none
+5. query: one specific search query to find relevant court judgments
 
 Examples of good search queries:
 - "bail application Ganja NDPS cases"
@@ -37,135 +84,305 @@ Examples of good search queries:
 - "Section 50 NDPS Act Heroin procedural compliance"
 - "minor accused NDPS cases acquittal"
 
-Instructions:
-1. First identify the specific substance/drug mentioned in the FIR
-2. Extract other key facts (age of accused, quantity seized, procedural issues, etc.)
-3. Create a focused search query that includes the substance name and other relevant facts
-4. Keep the query concise but specific - MUST include the substance type
-5. Focus on legally significant aspects (quantities, procedures, accused characteristics, sections of NDPS Act)
-
-Create a search query that MUST include the substance name and other relevant facts from the FIR:
+The query MUST include the substance name and focus on legally significant aspects (quantities, procedures, accused characteristics, sections of NDPS Act). Keep it concise but specific.
 """
+
+
+def _normalise_substance(substance: str) -> str | None:
+    """Map the extracted substance to a SUBSTANCE_VARIATIONS key where possible."""
+    substance = substance.strip().lower()
+    if not substance or substance == "unknown":
+        return None
+    if substance in SUBSTANCE_VARIATIONS:
+        return substance
+    return next((key for key, variations in SUBSTANCE_VARIATIONS.items() if substance in variations), substance)
+
+
+def _query_facets(search: JudgementSearch, fir_substance: str | None) -> List[str]:
+    """
+    Search queries for the judgement index: the extracted query plus one facet each
+    for substance and quantity, procedural defects and the accused profile.
+    """
+    facets = [search.query]
+    if fir_substance:
+        quantity = search.quantity_class.strip().lower()
+        quantity = f"{quantity} quantity " if quantity and quantity != "unknown" else ""
+        facets.append(f"{quantity}{fir_substance} NDPS seizure conviction")
+    issues = [ISSUE_QUERIES[issue] for issue in search.procedural_issues if issue in ISSUE_QUERIES]
+    if issues:
+        facets.append(f"NDPS procedural defects: {'; '.join(issues)}")
+    profile = search.accused_profile.strip()
+    if profile and profile.lower() != "none":
+        facets.append(f"{profile} accused NDPS case")
+    return list(dict.fromkeys(facet.strip() for facet in facets if facet.strip()))
+
+
+def _fuse(result_lists: List[List[dict]]) -> List[dict]:
+    """Reciprocal-rank fusion of the facet results, one entry per case_number/year."""
+    return reciprocal_rank_fusion(
+        result_lists,
+        key=lambda result: f"{result['chunk'].get('case_number', '')}_{result['chunk'].get('year', '')}",
+    )
+
+
+def _log_search(search: JudgementSearch, fir_substance: str | None):
+    logger.info(f"Generated search question: {search.query}")
+    logger.info(f"Identified substance from FIR: {fir_substance} "
+                f"(quantity: {search.quantity_class}, issues: {', '.join(search.procedural_issues) or 'none'})")
+
+
+def _mentions_substance(chunk: dict, fir_substance: str | None) -> bool:
+    """Check whether the judgement mentions the FIR substance (or a known variation)."""
+    if not fir_substance:
+        return True
+    meta = load_judgement_metadata().get(str(chunk.get('chunk_id')))
+    if meta is not None and fir_substance in SUBSTANCE_VARIATIONS:
+        return fir_substance in meta["substances"]
+    result_text = chunk.get('content', '').lower()
+    variations = SUBSTANCE_VARIATIONS.get(fir_substance, [fir_substance])
+    return any(var in result_text for var in variations)
+
+
+def _case_title(chunk: dict) -> str:
+    """Precomputed case title, or parsed from the judgement text if metadata.json lacks it."""
+    meta = load_judgement_metadata().get(str(chunk.get('chunk_id')))
+    if meta is not None:
+        return meta["title"]
+    return extract_case_title(chunk.get('content', ''), chunk.get('case_number', ''), chunk.get('year', ''))
+
+
+def _precomputed_summary(chunk: dict) -> str | None:
+    return (load_judgement_metadata().get(str(chunk.get('chunk_id'))) or {}).get("summary")
+
+
+def _summarise_judgement(chunk: dict, case_id: str) -> str:
+    """Summary from metadata.json; only judgements missing one are summarised with the LLM."""
+    summary = _precomputed_summary(chunk)
+    content = chunk.get('content', '')
+    if summary or not content:
+        return summary or ""
+    try:
+        summary_response = exponential_backoff_retry(max_retries=2, max_wait=10)(llm_model.invoke)(
+            build_summary_prompt(content[:SUMMARY_MAX_CHARS])
+        )
+        logger.debug(f"Summarized case: {case_id}")
+        return summary_response.content if hasattr(summary_response, 'content') else str(summary_response)
+    except Exception as e:
+        logger.error(f"Error summarizing case {case_id}: {e}")
+        return summary_fallback(content)
+
+
+async def _asummarise_judgement(chunk: dict, case_id: str) -> str:
+    """Async variant of _summarise_judgement."""
+    summary = _precomputed_summary(chunk)
+    content = chunk.get('content', '')
+    if summary or not content:
+        return summary or ""
+    try:
+        summary_response = await async_exponential_backoff_retry(max_retries=2, max_wait=10)(llm_model.ainvoke)(
+            build_summary_prompt(content[:SUMMARY_MAX_CHARS])
+        )
+        return summary_response.content if hasattr(summary_response, 'content') else str(summary_response)
+    except Exception as e:
+        logger.error(f"Error summarizing case {case_id}: {e}")
+        return summary_fallback(content)
+
+
+def _candidate_ids(fir_substance: str | None):
+    """Judgement ids to restrict the vector search to (None searches the whole index)."""
+    ids = filter_ids(substance=fir_substance)
+    if ids is not None:
+        logger.info(f"Pre-filtered judgements for {fir_substance}: {len(ids)} candidates")
+    return ids
+
+
+def _candidate_cases(results: list, fir_substance: str | None):
+    """
+    Yield (chunk, score, case_id) for retrieved judgements that are not duplicates
+    and mention the FIR substance.
+    """
+    seen_case_ids = set()
+    for result in results:
+        chunk = result['chunk']
+        content = chunk.get('content', '')
+        
+        # Skip duplicates
+        case_number = chunk.get('case_number', '')
+        year = chunk.get('year', '')
+        case_id = f"{case_number}_{year}"
+        if case_id in seen_case_ids:
+            logger.debug(f"Skipping duplicate: Case {case_number}, Year {year}")
+            continue
+        
+        # Validate that result mentions the substance from FIR
+        if not _mentions_substance(chunk, fir_substance):
+            logger.debug(f"Skipping result - doesn't mention {fir_substance}: Case {case_number}")
+            continue
+        
+        seen_case_ids.add(case_id)
+        yield chunk, result['score'], case_id
+
+
+def _case_data(chunk: dict, score: float, case_id: str, summary: str) -> dict:
+    """Build the historical case entry returned in state."""
+    case_number = chunk.get('case_number', '')
+    year = chunk.get('year', '')
+    return {
+        "title": _case_title(chunk),
+        "url": None,  # No URL for indexed judgements
+        "summary": summary,
+        "case_number": case_number,
+        "year": year,
+        "case_id": case_id,
+        "score": float(score)
+    }
+
+
+def _summarised_cases(candidates: Iterable[tuple]) -> List[dict]:
+    """
+    Summarise candidate judgements on a bounded thread pool, keeping retrieval order.
+
+    Candidates with a precomputed summary are taken as they are. The rest are
+    summarised concurrently, never more at once than cases still needed, and
+    a judgement whose summary comes back empty (no text) is replaced by the
+    next candidate. Launching stops once MAX_CASES cases are confirmed;
+    anything still queued is cancelled.
+    """
+    cases = {}
+    pending = {}
+    candidates = enumerate(candidates)
+    with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as pool:
+        try:
+            while len(cases) < MAX_CASES:
+                while len(pending) < min(SUMMARY_CONCURRENCY, MAX_CASES - len(cases)):
+                    item = next(candidates, None)
+                    if item is None:
+                        break
+                    rank, (chunk, score, case_id) = item
+                    summary = _precomputed_summary(chunk)
+                    if summary:
+                        cases[rank] = _case_data(chunk, score, case_id, summary)
+                        if len(cases) >= MAX_CASES:
+                            break
+                        continue
+                    # Copy the context so the node's metrics label and priority reach the worker
+                    future = pool.submit(contextvars.copy_context().run, _summarise_judgement, chunk, case_id)
+                    pending[future] = (rank, chunk, score, case_id)
+                if not pending or len(cases) >= MAX_CASES:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rank, chunk, score, case_id = pending.pop(future)
+                    summary = future.result()
+                    if summary:
+                        cases[rank] = _case_data(chunk, score, case_id, summary)
+        finally:
+            for future in pending:
+                future.cancel()
+    return [cases[rank] for rank in sorted(cases)][:MAX_CASES]
+
+
+async def _asummarised_cases(candidates: Iterable[tuple]) -> List[dict]:
+    """Async variant of _summarised_cases; pending summary tasks are cancelled once enough cases are confirmed."""
+    cases = {}
+    pending = {}
+    candidates = enumerate(candidates)
+    try:
+        while len(cases) < MAX_CASES:
+            while len(pending) < min(SUMMARY_CONCURRENCY, MAX_CASES - len(cases)):
+                item = next(candidates, None)
+                if item is None:
+                    break
+                rank, (chunk, score, case_id) = item
+                summary = _precomputed_summary(chunk)
+                if summary:
+                    cases[rank] = _case_data(chunk, score, case_id, summary)
+                    if len(cases) >= MAX_CASES:
+                        break
+                    continue
+                task = asyncio.create_task(_asummarise_judgement(chunk, case_id))
+                pending[task] = (rank, chunk, score, case_id)
+            if not pending or len(cases) >= MAX_CASES:
+                break
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                rank, chunk, score, case_id = pending.pop(task)
+                summary = task.result()
+                if summary:
+                    cases[rank] = _case_data(chunk, score, case_id, summary)
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            # Let the cancellations finish here (and retrieve their exceptions) rather than after we return
+            await asyncio.gather(*pending, return_exceptions=True)
+    return [cases[rank] for rank in sorted(cases)][:MAX_CASES]
+
+
+def historical_cases(state: WorkflowState) -> dict:
+    """
+    Search for historical cases related to the FIR using FAISS index of NDPS judgements.
+    """
+    logger.info("Starting historical cases search")
     
-    question = llm_model.with_structured_output(Question).invoke(prompt)
-    search_query = question.question
-    logger.info(f"Generated search question: {search_query}")
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for historical cases search")
     
-    # Extract substance from FIR for validation
-    substance_extraction_prompt = f"""From the following FIR content, identify the specific narcotic drug or psychotropic substance mentioned (e.g., Ganja, Cannabis, Heroin, Cocaine, Charas, etc.). Return only the substance name.
-
-FIR Content: {pdf_content}
+    # One extraction for the query and the substance, from the FIR facts already in state
+    @exponential_backoff_retry(max_retries=5, max_wait=60)
+    def _invoke_search():
+        return judgement_search_llm.invoke(_build_search_prompt(_search_context(state)))
 
-Substance name:"""
+    search = _invoke_search()
+    search_query = search.query
+    fir_substance = _normalise_substance(search.substance)
+    _log_search(search, fir_substance)
+    
+    historical_cases_list = []
     
     try:
-        substance_response = llm_model.invoke(substance_extraction_prompt)
-        fir_substance = substance_response.content if hasattr(substance_response, 'content') else str(substance_response)
-        fir_substance = fir_substance.strip().lower()
-        logger.info(f"Identified substance from FIR: {fir_substance}")
+        # All facets in one embedding request and one FAISS search, restricted to
+        # judgements tagged with the FIR substance
+        facets = _query_facets(search, fir_substance)
+        logger.info(f"Searching judgements with {len(facets)} query facets")
+        results = _fuse(query_ndps_judgements_multi(facets, k=RESULTS_PER_FACET, ids=_candidate_ids(fir_substance)))
+        historical_cases_list = _summarised_cases(_candidate_cases(results, fir_substance))
+                
     except Exception as e:
-        logger.warning(f"Could not extract substance from FIR: {e}")
-        fir_substance = None
+        logger.error(f"Error searching judgements with query '{search_query}': {e}")
+    
+    logger.info(f"Found {len(historical_cases_list)} historical cases")
+    
+    return {
+        "historical_cases": historical_cases_list
+    }
+
+
+async def ahistorical_cases(state: WorkflowState) -> dict:
+    """
+    Async variant of historical_cases using ainvoke.
+    """
+    logger.info("Starting historical cases search (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for historical cases search")
+    
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def _ainvoke_search():
+        return await judgement_search_llm.ainvoke(_build_search_prompt(_search_context(state)))
+
+    search = await _ainvoke_search()
+    search_query = search.query
+    fir_substance = _normalise_substance(search.substance)
+    _log_search(search, fir_substance)
     
     historical_cases_list = []
     
     try:
-        # Search using FAISS index
-        results = query_ndps_judgements(search_query, k=10)
-        
-        for result in results:
-            chunk = result['chunk']
-            score = result['score']
-            content = chunk.get('content', '')
-            
-            # Skip duplicates
-            case_number = chunk.get('case_number', '')
-            year = chunk.get('year', '')
-            case_id = f"{case_number}_{year}"
-            if any(case.get('case_id') == case_id for case in historical_cases_list):
-                logger.debug(f"Skipping duplicate: Case {case_number}, Year {year}")
-                continue
-            
-            # Validate that result mentions the substance from FIR
-            if fir_substance:
-                result_text = content.lower()
-                # Check for common substance name variations
-                substance_variations = {
-                    'ganja': ['ganja', 'cannabis', 'marijuana', 'marihuana', 'weed', 'bhang'],
-                    'cannabis': ['ganja', 'cannabis', 'marijuana', 'marihuana', 'weed', 'bhang'],
-                    'heroin': ['heroin', 'diacetylmorphine', 'smack'],
-                    'cocaine': ['cocaine', 'coke'],
-                    'charas': ['charas', 'hashish', 'hash'],
-                    'opium': ['opium'],
-                    'morphine': ['morphine'],
-                    'buprenorphine': ['buprenorphine', 'buprenorphine injection'],
-                    'avil': ['avil', 'pheniramine']
-                }
-                
-                # Get variations for the substance
-                variations = substance_variations.get(fir_substance, [fir_substance])
-                
-                # Check if any variation is mentioned
-                if not any(var in result_text for var in variations):
-                    logger.debug(f"Skipping result - doesn't mention {fir_substance}: Case {case_number}")
-                    continue
-            
-            # Extract case title from content (first few lines usually contain case name)
-            lines = content.split('\n')
-            case_title = ""
-            for line in lines[:10]:  # Check first 10 lines
-                line = line.strip()
-                if line and len(line) > 10 and not line.isdigit() and not line.startswith('==='):
-                    # Look for patterns like "vs.", "Vs.", "versus"
-                    if any(keyword in line.lower() for keyword in ['vs.', 'versus', 'v.', 'v/s']):
-                        case_title = line
-                        break
-                    elif not case_title and len(line) > 20:
-                        case_title = line
-            
-            if not case_title:
-                case_title = f"Case {case_number} ({year})" if case_number and year else "NDPS Case"
-            
-            # Summarize content using LLM
-            summary = ""
-            if content:
-                # Limit content to avoid token limits
-                truncated_content = content[:3000] if len(content) > 3000 else content
-                
-                # Better summarization prompt
-                summary_prompt = f"""Analyze this legal case judgement and provide a concise summary in 3-4 sentences covering:
-1. Case name and court
-2. Key facts and circumstances
-3. Legal issues/sections involved
-4. Court's decision and reasoning
-
-Legal Case Content:
-{truncated_content}
-"""
-                
-                try:
-                    summary_response = llm_model.invoke(summary_prompt)
-                    summary = summary_response.content if hasattr(summary_response, 'content') else str(summary_response)
-                    logger.debug(f"Summarized case: {case_title}")
-                except Exception as e:
-                    logger.error(f"Error summarizing case {case_title}: {e}")
-                    # Fallback: use first 200 characters
-                    summary = content[:200] + "..." if len(content) > 200 else content
-            
-            case_data = {
-                "title": case_title,
-                "url": None,  # No URL for indexed judgements
-                "summary": summary,
-                "case_number": case_number,
-                "year": year,
-                "case_id": case_id,
-                "score": float(score)
-            }
-            historical_cases_list.append(case_data)
-            
-            # Stop if we have enough cases
-            if len(historical_cases_list) >= 5:
-                break
+        facets = _query_facets(search, fir_substance)
+        logger.info(f"Searching judgements with {len(facets)} query facets")
+        results = _fuse(await aquery_ndps_judgements_multi(facets, k=RESULTS_PER_FACET, ids=_candidate_ids(fir_substance)))
+        historical_cases_list = await _asummarised_cases(_candidate_cases(results, fir_substance))
                 
     except Exception as e:
         logger.error(f"Error searching judgements with query '{search_query}': {e}")
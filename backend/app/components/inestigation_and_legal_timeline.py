@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
+from app.models.structured import structured_llm
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
+from app.models.prompts import build_messages
 import logging
 import os
 
@@ -119,7 +121,7 @@ G) BAIL / CHARGESHEET STATUS (as of FIR)
 
 """
 
-investigation_and_legal_timeline_llm = llm_model.with_structured_output(InvestigationAndLegalTimeline)
+investigation_and_legal_timeline_llm = structured_llm(InvestigationAndLegalTimeline)
 
 def investigation_and_legal_timeline(state: WorkflowState) -> dict:
     """
@@ -151,9 +153,71 @@ def investigation_and_legal_timeline(state: WorkflowState) -> dict:
     
     try:
         # Invoke LLM with legal facts template and PDF content
-        response = investigation_and_legal_timeline_llm.invoke(
-            ENHANCED_LEGAL_FACTS_FOR_TIMELINES + "\n\n--- FIR DOCUMENT ---\n" + pdf_content
-        )
+        @exponential_backoff_retry(max_retries=5, max_wait=60)
+        def _invoke_timeline():
+            return investigation_and_legal_timeline_llm.invoke(
+                build_messages(ENHANCED_LEGAL_FACTS_FOR_TIMELINES, pdf_content, fir_heading="FIR DOCUMENT")
+            )
+
+        response = _invoke_timeline()
+        
+        # Validate response
+        if not response or not response.investigation_or_legal_plan:
+            logger.warning("LLM returned empty or incomplete response")
+            raise ValueError("Failed to generate valid timeline from LLM")
+        
+        logger.info(f"Successfully generated timeline for date: {response.date_string}")
+        
+        # Return structured output with date and timeline
+        return {
+            "investigation_and_legal_timeline": {
+                "date_string": response.date_string,
+                "timeline": response.investigation_or_legal_plan
+            }
+        }
+        
+    except Exception as e:
+        logger.error(f"Error during timeline generation: {str(e)}", exc_info=True)
+        raise
+
+
+async def ainvestigation_and_legal_timeline(state: WorkflowState) -> dict:
+    """
+    Async variant of investigation_and_legal_timeline using ainvoke.
+    
+    Args:
+        state: WorkflowState containing pdf_content_in_english
+        
+    Returns:
+        dict with investigation_and_legal_timeline key
+        
+    Raises:
+        ValueError: If pdf_content_in_english is missing or invalid
+    """
+    logger.info("Starting investigation and legal timeline generation (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        logger.error("pdf_content_in_english is required but not found in state")
+        raise ValueError("pdf_content_in_english is required for timeline generation")
+    
+    pdf_content = state["pdf_content_in_english"]
+    
+    # Validate PDF content is not empty
+    if not isinstance(pdf_content, str) or len(pdf_content.strip()) == 0:
+        logger.error(f"Invalid pdf_content_in_english: type={type(pdf_content)}, length={len(pdf_content) if isinstance(pdf_content, str) else 'N/A'}")
+        raise ValueError("pdf_content_in_english must be a non-empty string")
+    
+    logger.debug(f"Processing PDF content of length: {len(pdf_content)} characters")
+    
+    try:
+        # Invoke LLM with legal facts template and PDF content
+        @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+        async def _ainvoke_timeline():
+            return await investigation_and_legal_timeline_llm.ainvoke(
+                build_messages(ENHANCED_LEGAL_FACTS_FOR_TIMELINES, pdf_content, fir_heading="FIR DOCUMENT")
+            )
+
+        response = await _ainvoke_timeline()
         
         # Validate response
         if not response or not response.investigation_or_legal_plan:
@@ -172,4 +236,4 @@ def investigation_and_legal_timeline(state: WorkflowState) -> dict:
         
     except Exception as e:
         logger.error(f"Error during timeline generation: {str(e)}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
@@ -1,12 +1,17 @@
 from typing import List, Optional
 from pydantic import BaseModel
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
-from app.utils.retry import exponential_backoff_retry
+from app.models.structured import structured_llm
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
+from app.utils.fir_digest import fir_text_for
+from app.models.prompts import build_messages
 import logging
 
 logger = logging.getLogger(__name__)
 
+# FIR tokens in the prompt; the plan covers every investigative step.
+FIR_TOKEN_BUDGET = 8000
+
 class PlanPoint(BaseModel):
     title: str                 # e.g. "Immediate Action"
     date_range: Optional[str]  # e.g. "19/09/2025" or "19–20 Sep"
@@ -16,6 +21,10 @@ class InvestigationPlan(BaseModel):
     points: List[PlanPoint]
 
 
+investigation_plan_llm = structured_llm(InvestigationPlan)
+
+
+# Static prompt sent as the system message; the FIR follows in the user message
 PROMPT = """
 You are a senior Indian criminal law expert and investigation officer.
 
@@ -150,9 +159,6 @@ Style:
 - Actionable steps only
 - No assumptions
 - Use conditional language where FIR is silent
-
-FIR Text:
-[PASTE FIR HERE]
 """
 
 
@@ -165,15 +171,14 @@ def investigation_plan(state: WorkflowState) -> dict:
     if not state.get("pdf_content_in_english"):
         raise ValueError("pdf_content_in_english is required for FIR fact extraction")
     
-    pdf_content = state["pdf_content_in_english"]
+    pdf_content = fir_text_for(state, FIR_TOKEN_BUDGET)
     logger.debug(f"FIR content length: {len(pdf_content)} characters")
 
-    llm_with_structured_output = llm_model.with_structured_output(InvestigationPlan)
-    prompt = PROMPT.replace("[PASTE FIR HERE]", pdf_content)
+    prompt = build_messages(PROMPT, pdf_content, fir_heading="FIR Text")
     
     @exponential_backoff_retry(max_retries=5, max_wait=60)
     def _invoke_investigation_plan():
-        return llm_with_structured_output.invoke(prompt)
+        return investigation_plan_llm.invoke(prompt)
     
     response = _invoke_investigation_plan()
     state["investigation_plan"] = response.points
@@ -181,4 +186,29 @@ def investigation_plan(state: WorkflowState) -> dict:
     return {
         "investigation_plan": response.points
     }
-    
\ No newline at end of file
+    
+
+
+async def ainvestigation_plan(state: WorkflowState) -> dict:
+    """
+    Async variant of investigation_plan using ainvoke.
+    """
+    logger.info("Starting investigation plan generation (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for FIR fact extraction")
+    
+    pdf_content = fir_text_for(state, FIR_TOKEN_BUDGET)
+    logger.debug(f"FIR content length: {len(pdf_content)} characters")
+
+    prompt = build_messages(PROMPT, pdf_content, fir_heading="FIR Text")
+    
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def _ainvoke_investigation_plan():
+        return await investigation_plan_llm.ainvoke(prompt)
+    
+    response = await _ainvoke_investigation_plan()
+    logger.info(f"Generated investigation plan with {len(response.points)} points")
+    return {
+        "investigation_plan": response.points
+    }
@@ -1,13 +1,18 @@
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
+from app.models.structured import structured_llm
 from typing import List, Dict
-from app.utils.retry import exponential_backoff_retry
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
+from app.utils.fir_digest import fir_text_for
+from app.models.prompts import build_messages
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+# FIR tokens in the prompt; weaknesses turn on procedure and seizure facts, which the digest ranks first.
+FIR_TOKEN_BUDGET = 6000
+
 prompt = """ Mismatch of document:
 Mismatch between timing of receipt of information, interception, recovery, seizure, search in follow up action, preparation of test memo, recording of statements leads to failure of a case. If these documents are prepared with care ensuring that the times do not mismatch, the conviction rate can go up significantly.
 
@@ -73,22 +78,12 @@ class PotentialProsecutionWeaknesses(BaseModel):
         max_length=15
     )
 
-def generate_potential_prosecution_weaknesses(state: WorkflowState) -> dict:
-    """
-    Generate potential prosecution weaknesses from FIR content and prosecution guidelines.
-    """
-    logger.info("Starting Potential Prosecution Weaknesses generation")
-    
-    if not state.get("pdf_content_in_english"):
-        raise ValueError("pdf_content_in_english is required for prosecution weaknesses generation")
-    
-    pdf_content = state["pdf_content_in_english"]
 
-    # Construct content for LLM
-    content_for_llm = f"""Based on the following FIR content and prosecution guidelines, identify potential prosecution weaknesses that could affect this case:
+weaknesses_llm = structured_llm(PotentialProsecutionWeaknesses)
 
-FIR Content:
-{pdf_content}
+
+# Static prompt sent as the system message; the FIR follows in the user message
+WEAKNESSES_INSTRUCTIONS = f"""Based on the FIR content and the prosecution guidelines below, identify potential prosecution weaknesses that could affect this case.
 
 PROSECUTION GUIDELINES AND COMMON WEAKNESSES:
 {prompt}
@@ -99,11 +94,28 @@ Analyze the FIR content against these common prosecution weaknesses. For each re
 3. Reference specific details from the FIR that indicate this potential weakness
 
 Generate a comprehensive list of potential prosecution weaknesses that investigators should address to strengthen the case."""
+
+
+def _build_prompt(state: WorkflowState) -> list:
+    """Assemble the LLM messages: guidelines first, FIR content last (it used to lead the prompt)."""
+    return build_messages(WEAKNESSES_INSTRUCTIONS, fir_text_for(state, FIR_TOKEN_BUDGET))
+
+
+def generate_potential_prosecution_weaknesses(state: WorkflowState) -> dict:
+    """
+    Generate potential prosecution weaknesses from FIR content and prosecution guidelines.
+    """
+    logger.info("Starting Potential Prosecution Weaknesses generation")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for prosecution weaknesses generation")
+    
+    content_for_llm = _build_prompt(state)
     
     # Generate prosecution weaknesses with structured output
     @exponential_backoff_retry(max_retries=5, max_wait=60)
     def generate_weaknesses():
-        return llm_model.with_structured_output(PotentialProsecutionWeaknesses).invoke(content_for_llm)
+        return weaknesses_llm.invoke(content_for_llm)
     
     prosecution_weaknesses = generate_weaknesses()
     
@@ -118,4 +130,36 @@ Generate a comprehensive list of potential prosecution weaknesses that investiga
     # Return updated state
     return {
         "potential_prosecution_weaknesses": weaknesses_dict
-    }
\ No newline at end of file
+    }
+
+
+async def agenerate_potential_prosecution_weaknesses(state: WorkflowState) -> dict:
+    """
+    Async variant of generate_potential_prosecution_weaknesses using ainvoke.
+    """
+    logger.info("Starting Potential Prosecution Weaknesses generation (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for prosecution weaknesses generation")
+    
+    content_for_llm = _build_prompt(state)
+    
+    # Generate prosecution weaknesses with structured output
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def generate_weaknesses():
+        return await weaknesses_llm.ainvoke(content_for_llm)
+    
+    prosecution_weaknesses = await generate_weaknesses()
+    
+    logger.info(f"Generated {len(prosecution_weaknesses.points)} potential prosecution weaknesses")
+    
+    # Convert to dict with heading as key and details as value
+    weaknesses_dict = {
+        point.point_heading: point.points
+        for point in prosecution_weaknesses.points
+    }
+    
+    # Return updated state
+    return {
+        "potential_prosecution_weaknesses": weaknesses_dict
+    }
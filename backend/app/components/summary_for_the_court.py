@@ -1,8 +1,8 @@
 from pydantic import BaseModel, Field
 from app.langgraph.state import WorkflowState
-from app.models.openai import llm_model
+from app.models.structured import structured_llm
 from typing import List
-from app.utils.retry import exponential_backoff_retry
+from app.utils.retry import exponential_backoff_retry, async_exponential_backoff_retry
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,15 +22,12 @@ class SummaryForTheCourt(BaseModel):
     judicial_balance: str = Field(description="Balanced judicial perspective considering both prosecution and defence aspects, public interest, and legal principles")
     prosecution_prayer: List[str] = Field(description="List of specific prayers/requests to the court (e.g., 'Cognizance of offence', 'Framing of charges', 'Bail to be denied', etc.)")
 
-def generate_summary_for_the_court(state: WorkflowState) -> dict:
-    """
-    Generate a comprehensive court summary for NDPS case prosecution.
-    """
-    logger.info("Starting summary for the court generation")
-    
-    if not state.get("pdf_content_in_english"):
-        raise ValueError("pdf_content_in_english is required for summary for the court generation")
-    
+
+summary_for_the_court_llm = structured_llm(SummaryForTheCourt)
+
+
+def _build_prompt(state: WorkflowState) -> str:
+    """Assemble the LLM prompt from the FIR content in state."""
     pdf_content = state["pdf_content_in_english"]
     
     # Get FIR facts if available
@@ -113,10 +110,24 @@ You MUST strictly follow these rules:
 Generate the court summary now:
 """
     
+    return content_for_llm
+
+
+def generate_summary_for_the_court(state: WorkflowState) -> dict:
+    """
+    Generate a comprehensive court summary for NDPS case prosecution.
+    """
+    logger.info("Starting summary for the court generation")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for summary for the court generation")
+    
+    content_for_llm = _build_prompt(state)
+    
     # Generate summary with structured output
     @exponential_backoff_retry(max_retries=5, max_wait=60)
     def _generate_summary():
-        return llm_model.with_structured_output(SummaryForTheCourt).invoke(content_for_llm)
+        return summary_for_the_court_llm.invoke(content_for_llm)
     
     result = _generate_summary()
     
@@ -126,3 +137,29 @@ Generate the court summary now:
     return {
         "summary_for_the_court": result.model_dump()
     }
+
+
+async def agenerate_summary_for_the_court(state: WorkflowState) -> dict:
+    """
+    Async variant of generate_summary_for_the_court using ainvoke.
+    """
+    logger.info("Starting summary for the court generation (async)")
+    
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required for summary for the court generation")
+    
+    content_for_llm = _build_prompt(state)
+    
+    # Generate summary with structured output
+    @async_exponential_backoff_retry(max_retries=5, max_wait=60)
+    async def _generate_summary():
+        return await summary_for_the_court_llm.ainvoke(content_for_llm)
+    
+    result = await _generate_summary()
+    
+    logger.info(f"Generated summary for the court: {result.case_title}")
+
+    # Convert Pydantic model to dict for JSON serialization
+    return {
+        "summary_for_the_court": result.model_dump()
+    }
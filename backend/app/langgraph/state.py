@@ -6,7 +6,10 @@ class WorkflowState(MessagesState):
     pdf_bytes: bytes | None = None
     pdf_filename: str | None = None
     pdf_content: str | None = None
+    pdf_pages: List[str] | None = None  # Text of each page, joined with "\n" into pdf_content
     pdf_content_in_english: str | None = None
+    translation_stats: dict | None = None  # Characters/pages actually sent to the translator
+    fir_digest: dict | None = None  # Deduplicated, scored FIR paragraphs (see app.utils.fir_digest)
     sections: List[str] | None = None  # Selected sections to process
     fir_facts: dict | None = None
     ndps_sections_mapped: List[dict] | None = None
@@ -1,28 +1,51 @@
+import os
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
 from app.langgraph.state import WorkflowState
-from app.utils.read_pdf import read_pdf
-from app.translator import translate_to_english
-
-from app.components.fir_fact_extraction import extract_fir_fact
-from app.components.ndps_legal_mapping import ndps_legal_mapping
-from app.components.bns_legal_mapping import bns_legal_mapping
-from app.components.bnss_legal_mapping import bnss_legal_mapping
-from app.components.bsa_legal_mapping import bsa_legal_mapping
-from app.components.investigation_plan import investigation_plan
-from app.components.evidence_checklist import generate_evidence_checklist
-from app.components.dos_and_dont import generate_dos_and_donts
-from app.components.potential_prosecution_weaknesses import generate_potential_prosecution_weaknesses
-from app.components.historical_cases import historical_cases
-from app.components.inestigation_and_legal_timeline import investigation_and_legal_timeline
-from app.components.defence_perspective_rebuttal import generate_defence_perspective_rebuttal
-from app.components.summary_for_the_court import generate_summary_for_the_court
-from app.components.chargesheet import generate_chargesheet
+from app.utils.metrics import timed_node
+from app.utils.read_pdf import read_pdf, aread_pdf
+from app.utils.fir_digest import build_fir_digest, abuild_fir_digest
+from app.translator import translate_to_english, atranslate_to_english, read_and_translate_pdf, aread_and_translate_pdf
+
+from app.components.fir_fact_extraction import extract_fir_fact, aextract_fir_fact
+from app.components.ndps_legal_mapping import ndps_legal_mapping, andps_legal_mapping
+from app.components.bns_legal_mapping import bns_legal_mapping, abns_legal_mapping
+from app.components.bnss_legal_mapping import bnss_legal_mapping, abnss_legal_mapping
+from app.components.bsa_legal_mapping import bsa_legal_mapping, absa_legal_mapping
+from app.components.investigation_plan import investigation_plan, ainvestigation_plan
+from app.components.evidence_checklist import generate_evidence_checklist, agenerate_evidence_checklist
+from app.components.dos_and_dont import generate_dos_and_donts, agenerate_dos_and_donts
+from app.components.potential_prosecution_weaknesses import generate_potential_prosecution_weaknesses, agenerate_potential_prosecution_weaknesses
+from app.components.historical_cases import historical_cases, ahistorical_cases
+from app.components.inestigation_and_legal_timeline import investigation_and_legal_timeline, ainvestigation_and_legal_timeline
+from app.components.defence_perspective_rebuttal import generate_defence_perspective_rebuttal, agenerate_defence_perspective_rebuttal
+from app.components.summary_for_the_court import generate_summary_for_the_court, agenerate_summary_for_the_court
+from app.components.chargesheet import generate_chargesheet, agenerate_chargesheet
 
 
 checkpointer = MemorySaver()
 
+# Extract and translate pages in one streaming node instead of read_pdf -> translate_to_english
+PDF_STREAMING = os.getenv("PDF_STREAMING", "false").lower() in ("1", "true", "yes")
+
+
+def _node(func, afunc) -> RunnableLambda:
+    """
+    Wrap a node's sync and async implementations in one runnable, so
+    graph.invoke runs func and graph.ainvoke / graph.astream run afunc.
+    Both are timed and tag their LLM/embedding/FAISS calls with the node name.
+    """
+    name = func.__name__
+    return RunnableLambda(
+        timed_node(name, func),
+        afunc=timed_node(name, afunc, is_async=True),
+        name=name,
+    )
+
+
 def route_all_sections(state: WorkflowState) -> list[str]:
     """Route to ALL selected sections - they all run in PARALLEL"""
     selected_sections = state.get("sections", [])
@@ -61,27 +84,36 @@ def route_all_sections(state: WorkflowState) -> list[str]:
 workflow_graph = StateGraph(WorkflowState)
 
 # Add all nodes
-workflow_graph.add_node("read_pdf", read_pdf)
-workflow_graph.add_node("translate_to_english", translate_to_english)
-workflow_graph.add_node("extract_fir_fact", extract_fir_fact)
-workflow_graph.add_node("ndps_legal_mapping", ndps_legal_mapping)
-workflow_graph.add_node("bns_legal_mapping", bns_legal_mapping)
-workflow_graph.add_node("bnss_legal_mapping", bnss_legal_mapping)
-workflow_graph.add_node("bsa_legal_mapping", bsa_legal_mapping)
-workflow_graph.add_node("investigation_plan", investigation_plan)
-workflow_graph.add_node("investigation_and_legal_timeline", investigation_and_legal_timeline)
-workflow_graph.add_node("historical_cases", historical_cases)
-workflow_graph.add_node("generate_evidence_checklist", generate_evidence_checklist)
-workflow_graph.add_node("generate_dos_and_donts", generate_dos_and_donts)
-workflow_graph.add_node("generate_potential_prosecution_weaknesses", generate_potential_prosecution_weaknesses)
-workflow_graph.add_node("generate_defence_perspective_rebuttal", generate_defence_perspective_rebuttal)
-workflow_graph.add_node("generate_summary_for_the_court", generate_summary_for_the_court)
-workflow_graph.add_node("generate_chargesheet", generate_chargesheet)
+if PDF_STREAMING:
+    workflow_graph.add_node("read_and_translate_pdf", _node(read_and_translate_pdf, aread_and_translate_pdf))
+else:
+    workflow_graph.add_node("read_pdf", _node(read_pdf, aread_pdf))
+    workflow_graph.add_node("translate_to_english", _node(translate_to_english, atranslate_to_english))
+workflow_graph.add_node("build_fir_digest", _node(build_fir_digest, abuild_fir_digest))
+workflow_graph.add_node("extract_fir_fact", _node(extract_fir_fact, aextract_fir_fact))
+workflow_graph.add_node("ndps_legal_mapping", _node(ndps_legal_mapping, andps_legal_mapping))
+workflow_graph.add_node("bns_legal_mapping", _node(bns_legal_mapping, abns_legal_mapping))
+workflow_graph.add_node("bnss_legal_mapping", _node(bnss_legal_mapping, abnss_legal_mapping))
+workflow_graph.add_node("bsa_legal_mapping", _node(bsa_legal_mapping, absa_legal_mapping))
+workflow_graph.add_node("investigation_plan", _node(investigation_plan, ainvestigation_plan))
+workflow_graph.add_node("investigation_and_legal_timeline", _node(investigation_and_legal_timeline, ainvestigation_and_legal_timeline))
+workflow_graph.add_node("historical_cases", _node(historical_cases, ahistorical_cases))
+workflow_graph.add_node("generate_evidence_checklist", _node(generate_evidence_checklist, agenerate_evidence_checklist))
+workflow_graph.add_node("generate_dos_and_donts", _node(generate_dos_and_donts, agenerate_dos_and_donts))
+workflow_graph.add_node("generate_potential_prosecution_weaknesses", _node(generate_potential_prosecution_weaknesses, agenerate_potential_prosecution_weaknesses))
+workflow_graph.add_node("generate_defence_perspective_rebuttal", _node(generate_defence_perspective_rebuttal, agenerate_defence_perspective_rebuttal))
+workflow_graph.add_node("generate_summary_for_the_court", _node(generate_summary_for_the_court, agenerate_summary_for_the_court))
+workflow_graph.add_node("generate_chargesheet", _node(generate_chargesheet, agenerate_chargesheet))
 
 # Permanent sequential path
-workflow_graph.add_edge(START, "read_pdf")
-workflow_graph.add_edge("read_pdf", "translate_to_english")
-workflow_graph.add_edge("translate_to_english", "extract_fir_fact")
+if PDF_STREAMING:
+    workflow_graph.add_edge(START, "read_and_translate_pdf")
+    workflow_graph.add_edge("read_and_translate_pdf", "build_fir_digest")
+else:
+    workflow_graph.add_edge(START, "read_pdf")
+    workflow_graph.add_edge("read_pdf", "translate_to_english")
+    workflow_graph.add_edge("translate_to_english", "build_fir_digest")
+workflow_graph.add_edge("build_fir_digest", "extract_fir_fact")
 
 # Route to ALL selected sections at once - they ALL run in PARALLEL
 workflow_graph.add_conditional_edges(
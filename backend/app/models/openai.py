@@ -1,23 +1,151 @@
 import os
+import time
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from dotenv import load_dotenv
 from typing import Union, List
 import numpy as np
+from app.models.rate_limiter import RateLimiter, estimate_tokens
+from app.utils.metrics import record_llm_call, record_embedding_call
 
 load_dotenv()
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-llm_model = ChatOpenAI(
+# Expected completion size when max_tokens is not set, used for TPM reservations
+DEFAULT_COMPLETION_TOKENS = 1024
+
+# Process-wide limiters shared by every node. Defaults match OpenAI tier-1 limits
+# for gpt-4o-mini and text-embedding-3-large; 0 disables a limit. Set
+# RATE_LIMIT_DB_PATH to share the RPM/TPM budget across worker processes.
+llm_rate_limiter = RateLimiter(
+    "llm",
+    rpm=int(os.getenv("LLM_RPM_LIMIT", "500")),
+    tpm=int(os.getenv("LLM_TPM_LIMIT", "200000")),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+    db_path=os.getenv("RATE_LIMIT_DB_PATH"),
+)
+
+embedding_rate_limiter = RateLimiter(
+    "embedding",
+    rpm=int(os.getenv("EMBEDDING_RPM_LIMIT", "3000")),
+    tpm=int(os.getenv("EMBEDDING_TPM_LIMIT", "1000000")),
+    max_concurrency=int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "64")),
+    db_path=os.getenv("RATE_LIMIT_DB_PATH"),
+)
+
+
+# USD per million tokens as (input, output), used for cost metrics
+MODEL_PRICES_PER_MILLION = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+
+# Cached prompt tokens are billed at this fraction of the input price
+CACHED_INPUT_PRICE_RATIO = 0.5
+
+
+def _token_cost(model: str, prompt_tokens: int, completion_tokens: int = 0, cached_tokens: int = 0) -> float:
+    input_price, output_price = MODEL_PRICES_PER_MILLION.get(model, (0.0, 0.0))
+    input_tokens = prompt_tokens - cached_tokens + cached_tokens * CACHED_INPUT_PRICE_RATIO
+    return (input_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def _chat_token_usage(result) -> dict:
+    """Token usage reported by the API for a ChatResult (empty if unavailable)."""
+    return (result.llm_output or {}).get("token_usage") or {}
+
+
+def _cached_prompt_tokens(usage: dict) -> int:
+    """Prompt tokens served from the provider's prompt cache."""
+    return (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+
+
+def _chat_usage_tokens(result) -> int | None:
+    """Total tokens reported by the API for a ChatResult, if available."""
+    return _chat_token_usage(result).get("total_tokens")
+
+
+class RateLimitedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI that reserves RPM/TPM budget from llm_rate_limiter for every request."""
+
+    def _estimate(self, messages) -> int:
+        prompt_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        return prompt_tokens + (self.max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+    def _record(self, start: float, result=None):
+        """Record latency, tokens and cost of one call (result is None if it failed)."""
+        usage = _chat_token_usage(result) if result is not None else {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        cached_tokens = _cached_prompt_tokens(usage)
+        record_llm_call(
+            self.model_name,
+            time.perf_counter() - start,
+            prompt_tokens,
+            completion_tokens,
+            _token_cost(self.model_name, prompt_tokens, completion_tokens, cached_tokens),
+            error=result is None,
+            cached_tokens=cached_tokens,
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with llm_rate_limiter.limit(self._estimate(messages)) as reservation:
+            start = time.perf_counter()
+            result = None
+            try:
+                result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            finally:
+                self._record(start, result)
+            reservation.actual_tokens = _chat_usage_tokens(result)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        async with llm_rate_limiter.alimit(self._estimate(messages)) as reservation:
+            start = time.perf_counter()
+            result = None
+            try:
+                result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            finally:
+                self._record(start, result)
+            reservation.actual_tokens = _chat_usage_tokens(result)
+        return result
+
+
+class RateLimitedOpenAIEmbeddings(OpenAIEmbeddings):
+    """OpenAIEmbeddings that reserves RPM/TPM budget from embedding_rate_limiter (embed_query goes through embed_documents)."""
+
+    def _record(self, start: float, texts, tokens: int):
+        record_embedding_call(self.model, time.perf_counter() - start, len(texts), tokens, _token_cost(self.model, tokens))
+
+    def embed_documents(self, texts, chunk_size=None, **kwargs):
+        tokens = sum(estimate_tokens(text) for text in texts)
+        with embedding_rate_limiter.limit(tokens):
+            start = time.perf_counter()
+            embeddings = super().embed_documents(texts, chunk_size=chunk_size, **kwargs)
+            self._record(start, texts, tokens)
+            return embeddings
+
+    async def aembed_documents(self, texts, chunk_size=None, **kwargs):
+        tokens = sum(estimate_tokens(text) for text in texts)
+        async with embedding_rate_limiter.alimit(tokens):
+            start = time.perf_counter()
+            embeddings = await super().aembed_documents(texts, chunk_size=chunk_size, **kwargs)
+            self._record(start, texts, tokens)
+            return embeddings
+
+
+llm_model = RateLimitedChatOpenAI(
     model="gpt-4o-mini",
     temperature=0.1,
     api_key=openai_api_key,
     max_tokens=None,
     timeout=None,
-    max_retries=2
+    # Retries are handled by app.utils.retry so they share its budget and circuit breaker
+    max_retries=0
 )
 
-embedding_model = OpenAIEmbeddings(
+embedding_model = RateLimitedOpenAIEmbeddings(
     model="text-embedding-3-large",
     api_key=openai_api_key,
 )
@@ -49,4 +177,25 @@ def get_embedding(text: Union[str, List[str]], normalize: bool = False) -> np.nd
     return embeddings_array[0] if is_single else embeddings_array
 
 
-
+async def aget_embedding(text: Union[str, List[str]], normalize: bool = False) -> np.ndarray:
+    """
+    Async variant of get_embedding using aembed_documents.
+    
+    Args:
+        text: A single string or list of strings to embed
+        normalize: Whether to apply L2 normalization to embeddings
+        
+    Returns:
+        numpy array of embeddings
+    """
+    is_single = isinstance(text, str)
+    texts = [text] if is_single else text
+    
+    embeddings = await embedding_model.aembed_documents(texts)
+    embeddings_array = np.array(embeddings, dtype='float32')
+    
+    if normalize:
+        norms = np.linalg.norm(embeddings_array, axis=1, keepdims=True)
+        embeddings_array = embeddings_array / norms
+    
+    return embeddings_array[0] if is_single else embeddings_array
@@ -0,0 +1,39 @@
+"""
+Prompt assembly with a cache-friendly layout.
+
+OpenAI caches the longest previously seen prefix of a prompt (in 128-token
+steps once a prompt is over 1024 tokens) and bills cached input tokens at a
+discount. A prefix only matches if it is byte-identical, so the case-specific
+FIR text must come after every static instruction and guideline block.
+
+Every node that sends a large static prompt builds its request with
+build_messages, which always produces the same two-message structure:
+
+    SystemMessage: static instructions and guidelines (identical across runs)
+    HumanMessage:  the FIR text (varies per run)
+
+The share of prompt tokens served from the cache is reported per node in the
+workflow timings and by the fir_llm_tokens_total{type="cached"} metric.
+"""
+from typing import List
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+
+def build_messages(instructions: str, fir_content: str, fir_heading: str = "FIR CONTENT") -> List[BaseMessage]:
+    """
+    Build the [system, user] messages for one LLM call.
+
+    Args:
+        instructions: Static system prompt (role, guidelines, output rules). Must
+            not contain anything case-specific, or the cached prefix is lost.
+        fir_content: FIR text for this run, placed last
+        fir_heading: Heading printed above the FIR text
+
+    Returns:
+        List of messages accepted by llm_model.invoke / with_structured_output
+    """
+    return [
+        SystemMessage(content=instructions.strip()),
+        HumanMessage(content=f"### {fir_heading}:\n{fir_content}"),
+    ]
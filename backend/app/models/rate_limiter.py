@@ -0,0 +1,344 @@
+"""
+Process-wide rate limiting for OpenAI calls.
+
+Every chat and embedding request acquires a slot from a RateLimiter before it
+is sent. The limiter enforces:
+
+- requests-per-minute and tokens-per-minute budgets (token buckets that refill
+  continuously, so bursts up to one minute of quota are allowed),
+- a maximum number of in-flight requests,
+- priority ordering: waiters are served lowest priority value first and FIFO
+  within a priority, so interactive uploads overtake batch jobs.
+
+Token usage is estimated before the call and reconciled with the real usage
+reported by the API afterwards.
+
+Setting RATE_LIMIT_DB_PATH shares the RPM/TPM buckets between processes through
+a local SQLite file. Concurrency and priority ordering stay per-process. The
+async API then runs the blocking SQLite transactions in worker threads, so a
+contended database never stalls the event loop.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Longest a waiter sleeps before re-checking the queue
+_MAX_POLL_SECONDS = 0.25
+
+_current_priority = contextvars.ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """
+    Run the enclosed block (and any graph run started from it) at the given priority.
+
+    Example:
+        with llm_priority(PRIORITY_BATCH):
+            graph.invoke(state, config=config)
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, len(text) // 4)
+
+
+class _LocalBuckets:
+    """In-memory RPM/TPM token buckets. Callers must hold the limiter lock."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def try_take(self, tokens: int) -> float:
+        """Take one request and `tokens` tokens; return 0 on success or seconds to wait."""
+        self._refill()
+        waits = []
+        if self.rpm and self._requests < 1:
+            waits.append((1 - self._requests) * 60 / self.rpm)
+        if self.tpm and self._tokens < tokens:
+            waits.append((tokens - self._tokens) * 60 / self.tpm)
+        if waits:
+            return max(waits)
+        self._requests -= 1
+        self._tokens -= tokens
+        return 0.0
+
+    def adjust(self, delta_tokens: int):
+        """Charge (positive) or refund (negative) tokens after the real usage is known."""
+        self._refill()
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens - delta_tokens)
+
+
+class _SqliteBuckets:
+    """RPM/TPM token buckets stored in a SQLite file shared between processes."""
+
+    def __init__(self, name: str, rpm: int, tpm: int, db_path: str):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.db_path = db_path
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "name TEXT PRIMARY KEY, requests REAL, tokens REAL, updated REAL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO rate_buckets VALUES (?, ?, ?, ?)",
+                (name, float(rpm), float(tpm), time.time()),
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _update(self, fn):
+        """Run fn(requests, tokens) -> (requests, tokens, result) inside an exclusive transaction."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            requests, tokens, updated = conn.execute(
+                "SELECT requests, tokens, updated FROM rate_buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            elapsed = max(0.0, now - updated)
+            if self.rpm:
+                requests = min(self.rpm, requests + elapsed * self.rpm / 60)
+            if self.tpm:
+                tokens = min(self.tpm, tokens + elapsed * self.tpm / 60)
+            requests, tokens, result = fn(requests, tokens)
+            conn.execute(
+                "UPDATE rate_buckets SET requests = ?, tokens = ?, updated = ? WHERE name = ?",
+                (requests, tokens, now, self.name),
+            )
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def try_take(self, tokens: int) -> float:
+        def take(requests, available):
+            waits = []
+            if self.rpm and requests < 1:
+                waits.append((1 - requests) * 60 / self.rpm)
+            if self.tpm and available < tokens:
+                waits.append((tokens - available) * 60 / self.tpm)
+            if waits:
+                return requests, available, max(waits)
+            return requests - 1, available - tokens, 0.0
+        return self._update(take)
+
+    def adjust(self, delta_tokens: int):
+        def charge(requests, available):
+            if self.tpm:
+                available = min(self.tpm, available - delta_tokens)
+            return requests, available, None
+        self._update(charge)
+
+
+@dataclass
+class Reservation:
+    """A granted slot. Set actual_tokens once the API reports real usage."""
+    estimated_tokens: int
+    actual_tokens: int | None = None
+
+
+class RateLimiter:
+    """
+    Priority-ordered RPM/TPM/concurrency limiter usable from sync and async code.
+
+    A limit of 0 disables that dimension.
+    """
+
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0, max_concurrency: int = 0, db_path: str | None = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        if db_path and (rpm or tpm):
+            self._buckets = _SqliteBuckets(name, rpm, tpm, db_path)
+        else:
+            self._buckets = _LocalBuckets(rpm, tpm)
+        # Bucket updates may block (SQLite file lock); async callers make them in a thread
+        self._blocking_buckets = isinstance(self._buckets, _SqliteBuckets)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._waiters = []
+        self._counter = itertools.count()
+        self._in_flight = 0
+
+    def _clamp(self, tokens: int) -> int:
+        # A single request larger than the whole minute budget could never be granted
+        tpm = self._buckets.tpm
+        return min(tokens, tpm) if tpm else tokens
+
+    def _enqueue(self, priority: int | None) -> tuple:
+        if priority is None:
+            priority = _current_priority.get()
+        ticket = (priority, next(self._counter))
+        with self._lock:
+            heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _try_acquire(self, ticket: tuple, tokens: int) -> float:
+        """Grant the slot if `ticket` is next in line and budget allows; else return seconds to wait."""
+        with self._lock:
+            if self._waiters[0] != ticket:
+                return _MAX_POLL_SECONDS
+            if self.max_concurrency and self._in_flight >= self.max_concurrency:
+                return _MAX_POLL_SECONDS
+            if not self._blocking_buckets:
+                wait = self._buckets.try_take(tokens)
+                if wait:
+                    return min(wait, _MAX_POLL_SECONDS)
+                self._grant(ticket)
+                return 0.0
+            # Hold the concurrency slot while the shared buckets are updated outside the lock,
+            # so a contended SQLite file never blocks other callers of the limiter
+            self._in_flight += 1
+        try:
+            wait = self._buckets.try_take(tokens)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+                self._changed.notify_all()
+            raise
+        with self._lock:
+            if wait:
+                self._in_flight -= 1
+                return min(wait, _MAX_POLL_SECONDS)
+            self._in_flight -= 1
+            self._grant(ticket)
+            return 0.0
+
+    def _grant(self, ticket: tuple):
+        """Remove `ticket` from the queue and count its request in flight. Caller holds the lock."""
+        if self._waiters and self._waiters[0] == ticket:
+            heapq.heappop(self._waiters)
+        elif ticket in self._waiters:
+            # A higher-priority ticket arrived while the shared buckets were updated
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+        self._in_flight += 1
+        self._changed.notify_all()
+
+    def _abandon(self, ticket: tuple):
+        with self._lock:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._changed.notify_all()
+
+    def acquire(self, tokens: int, priority: int | None = None) -> Reservation:
+        """Block until a slot for one request of `tokens` tokens is granted."""
+        tokens = self._clamp(tokens)
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                wait = self._try_acquire(ticket, tokens)
+                if not wait:
+                    return Reservation(estimated_tokens=tokens)
+                with self._lock:
+                    self._changed.wait(wait)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def aacquire(self, tokens: int, priority: int | None = None) -> Reservation:
+        """Async variant of acquire; waits with asyncio.sleep."""
+        tokens = self._clamp(tokens)
+        ticket = self._enqueue(priority)
+        attempt = None
+        try:
+            while True:
+                if self._blocking_buckets:
+                    attempt = asyncio.ensure_future(asyncio.to_thread(self._try_acquire, ticket, tokens))
+                    # Shielded: a cancelled caller must still learn whether the thread granted the slot
+                    wait = await asyncio.shield(attempt)
+                    attempt = None
+                else:
+                    wait = self._try_acquire(ticket, tokens)
+                if not wait:
+                    return Reservation(estimated_tokens=tokens)
+                await asyncio.sleep(wait)
+        except BaseException:
+            if attempt is not None:
+                # Give back a slot granted after the caller stopped waiting for it
+                attempt.add_done_callback(lambda done: self._release_unused(done, tokens))
+            self._abandon(ticket)
+            raise
+
+    def _release_unused(self, attempt: asyncio.Future, tokens: int):
+        if not attempt.cancelled() and attempt.exception() is None and not attempt.result():
+            self.release(Reservation(estimated_tokens=tokens))
+
+    def release(self, reservation: Reservation):
+        """Free the concurrency slot and reconcile the token estimate with real usage."""
+        delta = 0
+        if reservation.actual_tokens is not None:
+            delta = reservation.actual_tokens - reservation.estimated_tokens
+        if delta and self._blocking_buckets:
+            # Outside the lock: reconciling commutes with other bucket updates
+            self._buckets.adjust(delta)
+        with self._lock:
+            if delta and not self._blocking_buckets:
+                self._buckets.adjust(delta)
+            self._in_flight -= 1
+            self._changed.notify_all()
+
+    @contextmanager
+    def limit(self, tokens: int, priority: int | None = None):
+        reservation = self.acquire(tokens, priority)
+        try:
+            yield reservation
+        finally:
+            self.release(reservation)
+
+    @asynccontextmanager
+    async def alimit(self, tokens: int, priority: int | None = None):
+        reservation = await self.aacquire(tokens, priority)
+        try:
+            yield reservation
+        finally:
+            if self._blocking_buckets:
+                await asyncio.to_thread(self.release, reservation)
+            else:
+                self.release(reservation)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"name": self.name, "in_flight": self._in_flight, "waiting": len(self._waiters)}
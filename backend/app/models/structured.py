@@ -0,0 +1,48 @@
+"""
+Registry of pre-built structured-output runnables.
+
+llm_model.with_structured_output(Schema) converts the pydantic schema to an
+OpenAI tool definition and builds a new runnable chain (model binding plus
+output parser) every time it is called. The runnables are stateless, so each
+schema needs only one: nodes fetch it from here at import time instead of
+rebuilding it on every call (and, in the mapping nodes, on every point).
+
+Runnables are built from app.models.openai.llm_model as it is when first
+requested, so replacing the model (e.g. with the benchmark fakes) must happen
+before the components are imported.
+"""
+import logging
+import threading
+from typing import Dict, Type
+
+from pydantic import BaseModel
+from langchain_core.runnables import Runnable
+
+from app.models import openai as openai_models
+
+logger = logging.getLogger(__name__)
+
+_runnables: Dict[Type[BaseModel], Runnable] = {}
+_lock = threading.Lock()
+
+
+def structured_llm(schema: Type[BaseModel]) -> Runnable:
+    """
+    Return the shared structured-output runnable for `schema`, building it on first use.
+
+    Args:
+        schema: Pydantic model the LLM output is parsed into
+
+    Returns:
+        Runnable whose invoke/ainvoke return a `schema` instance
+    """
+    runnable = _runnables.get(schema)
+    if runnable is None:
+        with _lock:
+            runnable = _runnables.get(schema)
+            if runnable is None:
+                runnable = openai_models.llm_model.with_structured_output(schema)
+                _runnables[schema] = runnable
+                logger.debug(f"Built structured-output runnable for {schema.__name__}")
+    return runnable
+
@@ -1,3 +1,11 @@
-from .query_all import query_bns, query_bnss, query_bsa, query_ndps, query_ndps_judgements
+from .query_all import (
+    query_bns, query_bnss, query_bsa, query_ndps, query_ndps_judgements, query_ndps_judgements_multi,
+    aquery_bns, aquery_bnss, aquery_bsa, aquery_ndps, aquery_ndps_judgements, aquery_ndps_judgements_multi,
+    reciprocal_rank_fusion,
+)
 
-__all__ = ['query_bns', 'query_bnss', 'query_bsa', 'query_ndps', 'query_ndps_judgements']
+__all__ = [
+    'query_bns', 'query_bnss', 'query_bsa', 'query_ndps', 'query_ndps_judgements', 'query_ndps_judgements_multi',
+    'aquery_bns', 'aquery_bnss', 'aquery_bsa', 'aquery_ndps', 'aquery_ndps_judgements', 'aquery_ndps_judgements_multi',
+    'reciprocal_rank_fusion',
+]
@@ -0,0 +1,319 @@
+"""
+Precomputed metadata for the NDPS judgements corpus.
+
+The judgements index is fixed, so everything historical_cases used to derive
+per request - the case title, the substances a judgement mentions and an LLM
+summary - is computed once when the index is built and stored next to
+chunks.json in metadata.json, keyed by chunk_id:
+
+    {"<chunk_id>": {"case_id": "12_1998", "title": "...", "summary": "...",
+                    "year": 1998, "court": "supreme_court",
+                    "substances": ["ganja", "cannabis"], "issues": ["section_50", "bail"]}}
+
+The tags are also kept in memory as one boolean bitmap per value, so
+filter_ids can restrict the judgement vector search to matching judgements
+before it runs (query_ndps_judgements(..., ids=...)) instead of discarding
+non-matching hits afterwards.
+
+Building it with summaries is a required deployment step whenever the
+judgements index is (re)built: the metadata.json committed with the repo is
+built with --skip-summaries (no API key in CI), so until it is rebuilt every
+historical_cases request still summarises its judgements with the LLM, and
+judgements whose title cannot be read from the text keep a "Case N (year)"
+placeholder title. Build or refresh it from the backend directory (summaries
+already present are kept, so re-runs only summarise new or missing
+judgements):
+
+    python -m app.rag.judgement_metadata
+    python -m app.rag.judgement_metadata --skip-summaries   # titles and tags only, no API calls
+    python -m app.rag.judgement_metadata --force            # re-summarise everything
+"""
+import argparse
+import contextvars
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from app.models.openai import llm_model
+from app.models.rate_limiter import llm_priority, PRIORITY_BATCH
+from app.rag.query_all import RAG_BASE_PATH, _load_index
+from app.utils.retry import exponential_backoff_retry
+
+logger = logging.getLogger(__name__)
+
+CHUNKS_PATH = RAG_BASE_PATH / 'ndps_judgements' / 'chunks.json'
+METADATA_PATH = RAG_BASE_PATH / 'ndps_judgements' / 'metadata.json'
+
+# Judgement text sent to the LLM for a summary
+SUMMARY_MAX_CHARS = 3000
+
+# Concurrent summary calls while building (the LLM rate limiter still applies)
+BUILD_WORKERS = 8
+
+# Common name variations used to check that a judgement mentions the FIR substance
+SUBSTANCE_VARIATIONS = {
+    'ganja': ['ganja', 'cannabis', 'marijuana', 'marihuana', 'weed', 'bhang'],
+    'cannabis': ['ganja', 'cannabis', 'marijuana', 'marihuana', 'weed', 'bhang'],
+    'heroin': ['heroin', 'diacetylmorphine', 'smack'],
+    'cocaine': ['cocaine', 'coke'],
+    'charas': ['charas', 'hashish', 'hash'],
+    'opium': ['opium'],
+    'morphine': ['morphine'],
+    'buprenorphine': ['buprenorphine', 'buprenorphine injection'],
+    'avil': ['avil', 'pheniramine']
+}
+
+# Legal issues tagged per judgement (matched on the lower-cased text)
+ISSUE_PATTERNS = {
+    'section_50': r'section\s*50\b',
+    'section_52a': r'\b52\s*-?\s*a\b',
+    'section_42': r'section\s*42\b',
+    'section_37': r'section\s*37\b',
+    'section_67': r'section\s*67\b',
+    'bail': r'\bbail\b',
+    'commercial_quantity': r'commercial\s+quantity',
+    'small_quantity': r'small\s+quantity',
+}
+
+_COURT_PATTERN = re.compile(r'(supreme|high)\s+court')
+
+_metadata_cache = None
+_bitmap_cache = None
+
+
+def case_id(chunk: dict) -> str:
+    return f"{chunk.get('case_number', '')}_{chunk.get('year', '')}"
+
+
+def extract_case_title(content: str, case_number: str, year: str) -> str:
+    """Extract case title from content (first few lines usually contain case name)."""
+    lines = content.split('\n')
+    case_title = ""
+    for line in lines[:10]:  # Check first 10 lines
+        line = line.strip()
+        if line and len(line) > 10 and not line.isdigit() and not line.startswith('==='):
+            # Look for patterns like "vs.", "Vs.", "versus"
+            if any(keyword in line.lower() for keyword in ['vs.', 'versus', 'v.', 'v/s']):
+                case_title = line
+                break
+            elif not case_title and len(line) > 20:
+                case_title = line
+
+    if not case_title:
+        case_title = f"Case {case_number} ({year})" if case_number and year else "NDPS Case"
+    return case_title
+
+
+def substance_tags(content: str) -> List[str]:
+    """Substances (SUBSTANCE_VARIATIONS keys) whose name or a variation appears in the judgement."""
+    text = content.lower()
+    return [substance for substance, variations in SUBSTANCE_VARIATIONS.items()
+            if any(var in text for var in variations)]
+
+
+def issue_tags(content: str) -> List[str]:
+    """ISSUE_PATTERNS keys that match the judgement text."""
+    text = content.lower()
+    return [issue for issue, pattern in ISSUE_PATTERNS.items() if re.search(pattern, text)]
+
+
+def court_tag(content: str) -> str:
+    """
+    Court that decided the judgement: 'supreme_court', 'high_court' or 'unknown'.
+
+    Judgements name their own court before any court they cite, so the first
+    mention wins.
+    """
+    match = _COURT_PATTERN.search(content.lower())
+    return f"{match.group(1)}_court" if match else "unknown"
+
+
+def parse_year(year: str) -> int | None:
+    match = re.match(r'\d{4}', str(year))
+    return int(match.group()) if match else None
+
+
+def build_summary_prompt(truncated_content: str) -> str:
+    """Prompt for summarising one judgement."""
+    return f"""Analyze this legal case judgement and provide a concise summary in 3-4 sentences covering:
+1. Case name and court
+2. Key facts and circumstances
+3. Legal issues/sections involved
+4. Court's decision and reasoning
+
+Legal Case Content:
+{truncated_content}
+"""
+
+
+def summary_fallback(content: str) -> str:
+    """Fallback summary: first 200 characters of the judgement."""
+    return content[:200] + "..." if len(content) > 200 else content
+
+
+def load_judgement_metadata() -> Dict[str, dict]:
+    """Precomputed metadata by chunk_id (cached; empty if metadata.json has not been built)."""
+    global _metadata_cache
+    if _metadata_cache is None:
+        if METADATA_PATH.exists():
+            with open(METADATA_PATH, 'r', encoding='utf-8') as f:
+                _metadata_cache = json.load(f)
+            missing = sum(1 for entry in _metadata_cache.values() if not entry.get("summary"))
+            if missing:
+                logger.warning(f"{missing} of {len(_metadata_cache)} judgements in {METADATA_PATH} have no precomputed "
+                               f"summary and are summarised per request; run python -m app.rag.judgement_metadata")
+        else:
+            logger.warning(f"{METADATA_PATH} not found; judgement titles and summaries are computed per request")
+            _metadata_cache = {}
+    return _metadata_cache
+
+
+def _bitmaps() -> dict | None:
+    """
+    One boolean array per tag value, indexed by FAISS id (position in chunks.json).
+
+    Built once from metadata.json; None if it has not been built.
+    """
+    global _bitmap_cache
+    if _bitmap_cache is None:
+        metadata = load_judgement_metadata()
+        if not metadata:
+            return None
+        _, chunks = _load_index('ndps_judgements')
+        entries = [metadata.get(str(chunk['chunk_id']), {}) for chunk in chunks]
+
+        def bitmap(field: str, value: str) -> np.ndarray:
+            return np.array([value in (entry.get(field) or ()) for entry in entries], dtype=bool)
+
+        _bitmap_cache = {
+            "substances": {value: bitmap("substances", value) for value in SUBSTANCE_VARIATIONS},
+            "issues": {value: bitmap("issues", value) for value in ISSUE_PATTERNS},
+            "court": {value: np.array([entry.get("court") == value for entry in entries], dtype=bool)
+                      for value in ("supreme_court", "high_court", "unknown")},
+            "year": np.array([entry.get("year") or 0 for entry in entries], dtype=np.int32),
+            "content": [chunk.get('content', '').lower() for chunk in chunks],
+        }
+    return _bitmap_cache
+
+
+def filter_ids(substance: str | None = None, year_from: int | None = None, year_to: int | None = None,
+               court: str | None = None, issues: Iterable[str] | None = None) -> np.ndarray | None:
+    """
+    FAISS ids of the judgements matching every given filter, for query_ndps_judgements(ids=...).
+
+    Args:
+        substance: FIR substance; SUBSTANCE_VARIATIONS keys use the precomputed tags,
+            any other name is matched against the judgement text
+        year_from: Earliest judgement year (inclusive)
+        year_to: Latest judgement year (inclusive)
+        court: 'supreme_court', 'high_court' or 'unknown'
+        issues: ISSUE_PATTERNS keys; a judgement matches if it has any of them
+
+    Returns:
+        Sorted int64 array of ids (possibly empty), or None when no filter applies
+        or metadata.json has not been built (search the whole index then)
+    """
+    issues = [issue for issue in (issues or ()) if issue in ISSUE_PATTERNS]
+    if not (substance or year_from or year_to or court or issues):
+        return None
+    bitmaps = _bitmaps()
+    if bitmaps is None:
+        return None
+
+    mask = np.ones(len(bitmaps["year"]), dtype=bool)
+    if substance:
+        if substance in bitmaps["substances"]:
+            mask &= bitmaps["substances"][substance]
+        else:
+            mask &= np.array([substance in content for content in bitmaps["content"]], dtype=bool)
+    if year_from:
+        mask &= bitmaps["year"] >= year_from
+    if year_to:
+        mask &= bitmaps["year"] <= year_to
+    if court:
+        mask &= bitmaps["court"].get(court, np.zeros_like(mask))
+    if issues:
+        mask &= np.logical_or.reduce([bitmaps["issues"][issue] for issue in issues])
+    return np.flatnonzero(mask).astype(np.int64)
+
+
+def _summarise(chunk: dict) -> str | None:
+    content = chunk.get('content', '')
+    if not content:
+        return None
+    try:
+        response = exponential_backoff_retry(max_retries=5, max_wait=60)(llm_model.invoke)(
+            build_summary_prompt(content[:SUMMARY_MAX_CHARS])
+        )
+    except Exception as e:
+        logger.error(f"Error summarizing case {case_id(chunk)}: {e}")
+        return None
+    return response.content if hasattr(response, 'content') else str(response)
+
+
+def build_metadata(chunks: List[dict], existing: Dict[str, dict] | None = None,
+                   summarise: bool = True, force: bool = False) -> Dict[str, dict]:
+    """
+    Compute metadata for every chunk, reusing summaries from `existing` unless `force`.
+
+    Summaries that fail (or are skipped) are stored as None; historical_cases
+    summarises those on demand.
+    """
+    existing = existing or {}
+    metadata = {}
+    for chunk in chunks:
+        content = chunk.get('content', '')
+        # JSON object keys are strings; chunk ids in chunks.json are ints
+        key = str(chunk['chunk_id'])
+        previous = existing.get(key, {})
+        metadata[key] = {
+            "case_id": case_id(chunk),
+            "title": extract_case_title(content, chunk.get('case_number', ''), chunk.get('year', '')),
+            "summary": None if force else previous.get("summary"),
+            "year": parse_year(chunk.get('year', '')),
+            "court": court_tag(content),
+            "substances": substance_tags(content),
+            "issues": issue_tags(content),
+        }
+
+    pending = [chunk for chunk in chunks if metadata[str(chunk['chunk_id'])]["summary"] is None]
+    if summarise and pending:
+        logger.info(f"Summarising {len(pending)} judgements")
+        # Index builds yield to interactive uploads sharing the rate limit
+        with llm_priority(PRIORITY_BATCH), ThreadPoolExecutor(max_workers=BUILD_WORKERS) as pool:
+            # Each task runs in a copy of this context so the priority reaches the worker threads
+            futures = [pool.submit(contextvars.copy_context().run, _summarise, chunk) for chunk in pending]
+            for chunk, future in zip(pending, futures):
+                metadata[str(chunk['chunk_id'])]["summary"] = future.result()
+    return metadata
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Precompute NDPS judgement titles, tags and summaries")
+    parser.add_argument("--skip-summaries", action="store_true", help="Only compute titles and tags (no API calls)")
+    parser.add_argument("--force", action="store_true", help="Re-summarise judgements that already have a summary")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    with open(CHUNKS_PATH, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    existing = {}
+    if METADATA_PATH.exists():
+        with open(METADATA_PATH, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+
+    metadata = build_metadata(chunks, existing, summarise=not args.skip_summaries, force=args.force)
+    with open(METADATA_PATH, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    missing = sum(1 for entry in metadata.values() if entry["summary"] is None)
+    print(f"✅ Saved metadata for {len(metadata)} judgements to {METADATA_PATH} ({missing} without summary)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
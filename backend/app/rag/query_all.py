@@ -1,13 +1,19 @@
 import faiss
 import numpy as np
 import json
-from typing import List, Dict
+import time
+from typing import Callable, List, Dict, Sequence
 from pathlib import Path
 from app.models.openai import embedding_model
+from app.utils.metrics import record_faiss_search
+from app.rag.retrieval_memo import current_memo, search_key
 
 # Base path for RAG data
 RAG_BASE_PATH = Path(__file__).parent
 
+# Rank offset in reciprocal-rank fusion (the usual constant from the RRF paper)
+RRF_K = 60
+
 # Cache for loaded indices and chunks
 _index_cache = {}
 _chunks_cache = {}
@@ -63,6 +69,100 @@ def _load_index(act_code: str):
     return index, chunks
 
 
+def _search(act_code: str, index, chunks: List[Dict], query_vector: List[float], k: int,
+            ids: Sequence[int] | None = None) -> List[Dict]:
+    """Normalise a query embedding and search the FAISS index."""
+    return _search_many(act_code, index, chunks, [query_vector], k, ids)[0]
+
+
+def _search_many(act_code: str, index, chunks: List[Dict], query_vectors: List[List[float]], k: int,
+                 ids: Sequence[int] | None = None) -> List[List[Dict]]:
+    """
+    Normalise query embeddings and search the FAISS index with all of them in one call.
+
+    If `ids` is given, only those vectors are scored (FAISS IDSelector), so all
+    k results come from the allowed set.
+    """
+    params = None
+    if ids is not None:
+        if len(ids) == 0:
+            return [[] for _ in query_vectors]
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(np.asarray(ids, dtype='int64')))
+        k = min(k, len(ids))
+    
+    query_matrix = np.array(query_vectors).astype('float32')
+    faiss.normalize_L2(query_matrix)
+    
+    # Search
+    start = time.perf_counter()
+    scores, indices = index.search(query_matrix, k, params=params)
+    record_faiss_search(act_code, time.perf_counter() - start)
+    
+    all_results = []
+    for row_indices, row_scores in zip(indices, scores):
+        results = []
+        for idx, score in zip(row_indices, row_scores):
+            if 0 <= idx < len(chunks):
+                results.append({
+                    'chunk': chunks[idx],
+                    'score': float(score),
+                    'id': int(idx)
+                })
+        all_results.append(results)
+    
+    return all_results
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], key: Callable[[Dict], str] | None = None,
+                           rrf_k: int = RRF_K) -> List[Dict]:
+    """
+    Fuse ranked result lists with reciprocal-rank fusion.
+
+    Args:
+        result_lists: Results from several queries, each ranked best first
+        key: Identity of a result for merging; defaults to its position in the index
+        rrf_k: Rank offset; larger values flatten the weight of top ranks
+
+    Returns:
+        One result per key, ordered by fused score, with 'rrf_score' added and
+        'score' set to the best similarity the result had in any list
+    """
+    key = key or (lambda result: result['id'])
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            entry = fused.setdefault(key(result), {**result, 'rrf_score': 0.0})
+            entry['rrf_score'] += 1.0 / (rrf_k + rank)
+            entry['score'] = max(entry['score'], result['score'])
+    return sorted(fused.values(), key=lambda entry: entry['rrf_score'], reverse=True)
+
+
+def _query(act_code: str, query: str, k: int, ids: Sequence[int] | None = None) -> List[Dict]:
+    """Embed the query and search the index, reusing results already fetched in this workflow."""
+    def run():
+        index, chunks = _load_index(act_code)
+        query_vector = embedding_model.embed_query(query)
+        return _search(act_code, index, chunks, query_vector, k, ids)
+
+    memo = current_memo()
+    if memo is None:
+        return run()
+    return memo.search(search_key(act_code, query, k, ids), run)
+
+
+async def _aquery(act_code: str, query: str, k: int, ids: Sequence[int] | None = None) -> List[Dict]:
+    """Async query: awaits the embedding call, then searches the in-memory index."""
+    async def run():
+        index, chunks = _load_index(act_code)
+        query_vector = await embedding_model.aembed_query(query)
+        return _search(act_code, index, chunks, query_vector, k, ids)
+
+    memo = current_memo()
+    if memo is None:
+        return await run()
+    return await memo.asearch(search_key(act_code, query, k, ids), run)
+
+
 def query_bns(query: str, k: int = 5) -> List[Dict]:
     """
     Query Bharatiya Nyaya Sanhita (BNS)
@@ -72,27 +172,9 @@ def query_bns(query: str, k: int = 5) -> List[Dict]:
         k: Number of results to return
         
     Returns:
-        List of results with 'chunk' and 'score' keys
+        List of results with 'chunk', 'score' and 'id' (position in the index) keys
     """
-    index, chunks = _load_index('bns')
-    
-    # Generate query embedding
-    query_vector = embedding_model.embed_query(query)
-    query_vector = np.array([query_vector]).astype('float32')
-    faiss.normalize_L2(query_vector)
-    
-    # Search
-    scores, indices = index.search(query_vector, k)
-    
-    results = []
-    for idx, score in zip(indices[0], scores[0]):
-        if idx < len(chunks):
-            results.append({
-                'chunk': chunks[idx],
-                'score': float(score)
-            })
-    
-    return results
+    return _query('bns', query, k)
 
 
 def query_bnss(query: str, k: int = 5) -> List[Dict]:
@@ -104,27 +186,9 @@ def query_bnss(query: str, k: int = 5) -> List[Dict]:
         k: Number of results to return
         
     Returns:
-        List of results with 'chunk' and 'score' keys
+        List of results with 'chunk', 'score' and 'id' (position in the index) keys
     """
-    index, chunks = _load_index('bnss')
-    
-    # Generate query embedding
-    query_vector = embedding_model.embed_query(query)
-    query_vector = np.array([query_vector]).astype('float32')
-    faiss.normalize_L2(query_vector)
-    
-    # Search
-    scores, indices = index.search(query_vector, k)
-    
-    results = []
-    for idx, score in zip(indices[0], scores[0]):
-        if idx < len(chunks):
-            results.append({
-                'chunk': chunks[idx],
-                'score': float(score)
-            })
-    
-    return results
+    return _query('bnss', query, k)
 
 
 def query_bsa(query: str, k: int = 5) -> List[Dict]:
@@ -136,27 +200,9 @@ def query_bsa(query: str, k: int = 5) -> List[Dict]:
         k: Number of results to return
         
     Returns:
-        List of results with 'chunk' and 'score' keys
+        List of results with 'chunk', 'score' and 'id' (position in the index) keys
     """
-    index, chunks = _load_index('bsa')
-    
-    # Generate query embedding
-    query_vector = embedding_model.embed_query(query)
-    query_vector = np.array([query_vector]).astype('float32')
-    faiss.normalize_L2(query_vector)
-    
-    # Search
-    scores, indices = index.search(query_vector, k)
-    
-    results = []
-    for idx, score in zip(indices[0], scores[0]):
-        if idx < len(chunks):
-            results.append({
-                'chunk': chunks[idx],
-                'score': float(score)
-            })
-    
-    return results
+    return _query('bsa', query, k)
 
 
 def query_ndps(query: str, k: int = 5) -> List[Dict]:
@@ -168,27 +214,9 @@ def query_ndps(query: str, k: int = 5) -> List[Dict]:
         k: Number of results to return
         
     Returns:
-        List of results with 'chunk' and 'score' keys
+        List of results with 'chunk', 'score' and 'id' (position in the index) keys
     """
-    index, chunks = _load_index('ndps')
-    
-    # Generate query embedding
-    query_vector = embedding_model.embed_query(query)
-    query_vector = np.array([query_vector]).astype('float32')
-    faiss.normalize_L2(query_vector)
-    
-    # Search
-    scores, indices = index.search(query_vector, k)
-    
-    results = []
-    for idx, score in zip(indices[0], scores[0]):
-        if idx < len(chunks):
-            results.append({
-                'chunk': chunks[idx],
-                'score': float(score)
-            })
-    
-    return results
+    return _query('ndps', query, k)
 
 
 def query_forensic(query: str, k: int = 5) -> List[Dict]:
@@ -200,56 +228,126 @@ def query_forensic(query: str, k: int = 5) -> List[Dict]:
         k: Number of results to return
         
     Returns:
-        List of results with 'chunk' and 'score' keys
+        List of results with 'chunk', 'score' and 'id' (position in the index) keys
     """
-    index, chunks = _load_index('forensic')
-    
-    # Generate query embedding
-    query_vector = embedding_model.embed_query(query)
-    query_vector = np.array([query_vector]).astype('float32')
-    faiss.normalize_L2(query_vector)
-    
-    # Search
-    scores, indices = index.search(query_vector, k)
-    
-    results = []
-    for idx, score in zip(indices[0], scores[0]):
-        if idx < len(chunks):
-            results.append({
-                'chunk': chunks[idx],
-                'score': float(score)
-            })
-    
-    return results
+    return _query('forensic', query, k)
 
 
-def query_ndps_judgements(query: str, k: int = 5) -> List[Dict]:
+def query_ndps_judgements(query: str, k: int = 5, ids: Sequence[int] | None = None) -> List[Dict]:
     """
     Query NDPS Historical Judgements
     
     Args:
         query: Search query
         k: Number of results to return
+        ids: Optional judgement ids to search within (see judgement_metadata.filter_ids)
         
     Returns:
-        List of results with 'chunk' and 'score' keys
+        List of results with 'chunk', 'score' and 'id' (position in the index) keys
     """
-    index, chunks = _load_index('ndps_judgements')
+    return _query('ndps_judgements', query, k, ids)
+
+
+def _query_many(act_code: str, queries: List[str], k: int, ids: Sequence[int] | None = None) -> List[List[Dict]]:
+    """Search several queries with one batched embedding request and one FAISS call (memoized per query)."""
+    memo = current_memo()
+    keys = [search_key(act_code, query, k, ids) for query in queries]
+    all_results = [memo.get(key) if memo is not None else None for key in keys]
+    missing = [i for i, results in enumerate(all_results) if results is None]
+    if missing:
+        index, chunks = _load_index(act_code)
+        query_vectors = embedding_model.embed_documents([queries[i] for i in missing])
+        for i, results in zip(missing, _search_many(act_code, index, chunks, query_vectors, k, ids)):
+            all_results[i] = results
+            if memo is not None:
+                memo.put(keys[i], results)
+    return all_results
+
+
+async def _aquery_many(act_code: str, queries: List[str], k: int, ids: Sequence[int] | None = None) -> List[List[Dict]]:
+    """Async variant of _query_many."""
+    memo = current_memo()
+    keys = [search_key(act_code, query, k, ids) for query in queries]
+    all_results = [memo.get(key) if memo is not None else None for key in keys]
+    missing = [i for i, results in enumerate(all_results) if results is None]
+    if missing:
+        index, chunks = _load_index(act_code)
+        query_vectors = await embedding_model.aembed_documents([queries[i] for i in missing])
+        for i, results in zip(missing, _search_many(act_code, index, chunks, query_vectors, k, ids)):
+            all_results[i] = results
+            if memo is not None:
+                memo.put(keys[i], results)
+    return all_results
+
+
+def query_forensic_multi(queries: List[str], k: int = 5) -> List[List[Dict]]:
+    """
+    Query the Forensic Guide with several queries at once
     
-    # Generate query embedding
-    query_vector = embedding_model.embed_query(query)
-    query_vector = np.array([query_vector]).astype('float32')
-    faiss.normalize_L2(query_vector)
+    All queries are embedded in one batched request and searched in one FAISS call.
     
-    # Search
-    scores, indices = index.search(query_vector, k)
+    Args:
+        queries: Search queries
+        k: Number of results to return per query
+        
+    Returns:
+        One result list (with 'chunk', 'score' and 'id' keys) per query
+    """
+    return _query_many('forensic', queries, k)
+
+
+def query_ndps_judgements_multi(queries: List[str], k: int = 5, ids: Sequence[int] | None = None) -> List[List[Dict]]:
+    """
+    Query NDPS Historical Judgements with several queries at once
     
-    results = []
-    for idx, score in zip(indices[0], scores[0]):
-        if idx < len(chunks):
-            results.append({
-                'chunk': chunks[idx],
-                'score': float(score)
-            })
+    All queries are embedded in one batched request and searched in one FAISS call.
     
-    return results
+    Args:
+        queries: Search queries
+        k: Number of results to return per query
+        ids: Optional judgement ids to search within (see judgement_metadata.filter_ids)
+        
+    Returns:
+        One result list (with 'chunk', 'score' and 'id' keys) per query
+    """
+    return _query_many('ndps_judgements', queries, k, ids)
+
+
+async def aquery_bns(query: str, k: int = 5) -> List[Dict]:
+    """Async variant of query_bns."""
+    return await _aquery('bns', query, k)
+
+
+async def aquery_bnss(query: str, k: int = 5) -> List[Dict]:
+    """Async variant of query_bnss."""
+    return await _aquery('bnss', query, k)
+
+
+async def aquery_bsa(query: str, k: int = 5) -> List[Dict]:
+    """Async variant of query_bsa."""
+    return await _aquery('bsa', query, k)
+
+
+async def aquery_ndps(query: str, k: int = 5) -> List[Dict]:
+    """Async variant of query_ndps."""
+    return await _aquery('ndps', query, k)
+
+
+async def aquery_forensic(query: str, k: int = 5) -> List[Dict]:
+    """Async variant of query_forensic."""
+    return await _aquery('forensic', query, k)
+
+
+async def aquery_ndps_judgements(query: str, k: int = 5, ids: Sequence[int] | None = None) -> List[Dict]:
+    """Async variant of query_ndps_judgements."""
+    return await _aquery('ndps_judgements', query, k, ids)
+
+
+async def aquery_forensic_multi(queries: List[str], k: int = 5) -> List[List[Dict]]:
+    """Async variant of query_forensic_multi."""
+    return await _aquery_many('forensic', queries, k)
+
+
+async def aquery_ndps_judgements_multi(queries: List[str], k: int = 5, ids: Sequence[int] | None = None) -> List[List[Dict]]:
+    """Async variant of query_ndps_judgements_multi."""
+    return await _aquery_many('ndps_judgements', queries, k, ids)
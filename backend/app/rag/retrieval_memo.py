@@ -0,0 +1,159 @@
+"""
+Per-workflow memo of vector searches and formatted chunk blocks.
+
+Nodes in one run search the same corpora with overlapping queries (the
+mapping nodes once per extracted point, the evidence checklist once per
+checkpoint) and format the same chunks into prompt text again and again.
+Search results depend only on the corpus, the query and k, so within a run
+they are kept here:
+
+- search results keyed by (corpus, normalised query, k, id filter); a hit
+  skips both the embedding request and the FAISS search, concurrent
+  identical async queries share one in-flight search, and batched searches
+  only embed the queries not seen yet
+- formatted prompt blocks keyed by (corpus, chunk id, formatter)
+
+The memo is found through the workflow_id that timed_node puts in context
+for every graph node, so nodes share it without passing anything through
+state. Outside a workflow (scripts, tests) nothing is memoized. Memos for
+the most recent MAX_MEMOIZED_WORKFLOWS workflows are kept.
+"""
+import asyncio
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List
+
+from app.utils.metrics import current_workflow_id, registry
+
+logger = logging.getLogger(__name__)
+
+# Workflows whose memo is kept (least recently used dropped first)
+MAX_MEMOIZED_WORKFLOWS = 200
+
+_memos = OrderedDict()
+_memos_lock = threading.Lock()
+
+
+def normalise_query(query: str) -> str:
+    """Lower-case, collapse whitespace and drop surrounding punctuation."""
+    return re.sub(r"\s+", " ", query).strip(" \t\n.,;:!?\"'").lower()
+
+
+class RetrievalMemo:
+    """Search results and formatted blocks for one workflow."""
+
+    def __init__(self):
+        self._results: Dict[tuple, List[dict]] = {}
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._blocks: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> List[dict] | None:
+        """Memoized results for `key`, or None (recorded as a miss)."""
+        with self._lock:
+            results = self._results.get(key)
+        _record(key[0], hit=results is not None)
+        return None if results is None else list(results)
+
+    def put(self, key: tuple, results: List[dict]):
+        with self._lock:
+            self._results[key] = results
+
+    def search(self, key: tuple, run: Callable[[], List[dict]]) -> List[dict]:
+        """Return memoized results for `key`, or run the search and store them."""
+        results = self.get(key)
+        if results is None:
+            results = run()
+            self.put(key, results)
+        return list(results)
+
+    async def asearch(self, key: tuple, run: Callable[[], Awaitable[List[dict]]]) -> List[dict]:
+        """Async variant of search; a query already being searched is awaited, not repeated."""
+        with self._lock:
+            results = self._results.get(key)
+            future = self._inflight.get(key) if results is None else None
+            owner = results is None and future is None
+            if owner:
+                future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        if results is not None:
+            _record(key[0], hit=True)
+            return list(results)
+        if not owner:
+            _record(key[0], hit=True)
+            return list(await asyncio.shield(future))
+
+        _record(key[0], hit=False)
+        try:
+            results = await run()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark the exception retrieved when no other caller was waiting
+                future.exception()
+            raise
+        with self._lock:
+            self._results[key] = results
+            self._inflight.pop(key, None)
+        future.set_result(results)
+        return list(results)
+
+    def block(self, key: tuple, render: Callable[[], str]) -> str:
+        with self._lock:
+            text = self._blocks.get(key)
+        if text is None:
+            text = render()
+            with self._lock:
+                self._blocks[key] = text
+        return text
+
+
+def current_memo() -> RetrievalMemo | None:
+    """Memo of the workflow running in this context, or None outside a workflow."""
+    workflow_id = current_workflow_id()
+    if workflow_id is None:
+        return None
+    with _memos_lock:
+        memo = _memos.get(workflow_id)
+        if memo is None:
+            memo = _memos[workflow_id] = RetrievalMemo()
+            while len(_memos) > MAX_MEMOIZED_WORKFLOWS:
+                _memos.popitem(last=False)
+        else:
+            _memos.move_to_end(workflow_id)
+    return memo
+
+
+def search_key(corpus: str, query: str, k: int, ids=None) -> tuple:
+    return corpus, normalise_query(query), k, None if ids is None else tuple(int(i) for i in ids)
+
+
+def formatted_block(corpus: str, result: dict, render: Callable[[dict], str]) -> str:
+    """
+    Prompt text for one search result, rendered once per workflow and chunk.
+
+    Args:
+        corpus: Corpus the result came from (part of the key, as chunk ids are per corpus)
+        result: Search result with 'chunk' and 'id' keys
+        render: Formatter taking the result; its output must depend only on the chunk
+
+    Returns:
+        The rendered block
+    """
+    memo = current_memo()
+    if memo is None or result.get('id') is None:
+        return render(result)
+    key = (corpus, result['id'], render.__module__, render.__qualname__)
+    return memo.block(key, lambda: render(result))
+
+
+def _record(corpus: str, hit: bool):
+    registry.inc("fir_retrieval_memo_lookups_total", {"corpus": corpus, "result": "hit" if hit else "miss"}, 1,
+                 "Vector searches looked up in the per-workflow retrieval memo")
+    if hit:
+        registry.add_to_workflow(retrieval_memo_hits=1)
@@ -6,6 +6,7 @@ from fastapi import APIRouter
 from .upload import router as upload_router
 from .results import router as results_router
 from .document import router as document_router
+from .metrics import router as metrics_router
 
 # Create main router
 api_router = APIRouter()
@@ -13,4 +14,5 @@ api_router = APIRouter()
 # Include sub-routers
 api_router.include_router(upload_router, tags=["upload"])
 api_router.include_router(results_router, tags=["results"])
-api_router.include_router(document_router, tags=["document"])
\ No newline at end of file
+api_router.include_router(document_router, tags=["document"])
+api_router.include_router(metrics_router, tags=["metrics"])
\ No newline at end of file
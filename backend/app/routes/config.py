@@ -2,6 +2,7 @@
 Configuration and shared state for routes.
 """
 
+import os
 from pathlib import Path
 
 # Directory paths (for templates and static only; no file saving)
@@ -18,4 +19,7 @@ results_store = {}
 pdf_store = {}
 
 # Session management: maps session_id to session data
-session_store = {}
\ No newline at end of file
+session_store = {}
+
+# Overall time allowed for one workflow run; retries stop once it is used up
+WORKFLOW_DEADLINE_SECONDS = float(os.getenv("WORKFLOW_DEADLINE_SECONDS", "300"))
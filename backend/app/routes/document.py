@@ -2,10 +2,12 @@
 Document generation route handlers.
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import Response
 from .config import results_store
-from ..utils.document_generator import generate_document
+from ..utils.document_generator import generate_document, report_template_version
+from ..utils.report_cache import report_cache, report_fingerprint, etag_matches
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,15 +16,20 @@ router = APIRouter()
 
 
 @router.get("/api/document/{workflow_id}")
-async def generate_document_endpoint(workflow_id: str):
+async def generate_document_endpoint(workflow_id: str, request: Request):
     """
     Generate and download a Word document for the workflow.
     
+    The document is cached per workflow and served with an ETag derived from
+    the sections it contains; it is only generated again once sections are
+    added, and a client that already has it gets 304 Not Modified.
+    
     Args:
         workflow_id: Unique workflow identifier
+        request: Incoming request (for If-None-Match)
         
     Returns:
-        Word document file download
+        Word document file download, or 304 if the client's copy is current
         
     Raises:
         HTTPException: If workflow not found or generation fails
@@ -32,7 +39,17 @@ async def generate_document_endpoint(workflow_id: str):
     
     try:
         workflow_state = results_store[workflow_id]
-        document_bytes = generate_document(workflow_state)
+        etag = f'"{report_fingerprint(workflow_state, report_template_version())}"'
+        # Clients may keep the file but must revalidate it
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=cache_headers)
+        
+        # Generation is CPU-bound; keep it off the event loop
+        document_bytes = await asyncio.to_thread(
+            report_cache.get_or_generate, workflow_id, etag, lambda: generate_document(workflow_state)
+        )
         
         # Generate filename
         filename = f"FIR_Report_{workflow_id}.docx"
@@ -41,7 +58,8 @@ async def generate_document_endpoint(workflow_id: str):
             content=document_bytes,
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
             headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                **cache_headers,
             }
         )
     except Exception as e:
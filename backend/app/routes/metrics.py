@@ -0,0 +1,21 @@
+"""
+Metrics route exposing workflow instrumentation in Prometheus format.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import render_prometheus
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Per-node latency, LLM token/cost, embedding and FAISS search metrics.
+    
+    Returns:
+        Metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
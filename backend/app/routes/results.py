@@ -6,6 +6,7 @@ from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
+from app.utils.metrics import workflow_breakdown
 from .config import results_store, TEMPLATES_DIR
 from .utils import format_state_for_display
 
@@ -32,7 +33,7 @@ async def get_results_api(workflow_id: str):
         workflow_id: Unique workflow identifier
         
     Returns:
-        JSON response with formatted workflow result
+        JSON response with formatted workflow result and per-node timings
         
     Raises:
         HTTPException: If result not found
@@ -40,4 +41,6 @@ async def get_results_api(workflow_id: str):
     result = load_result(workflow_id)
     # Format the result for the React app
     from .utils import format_state_for_display
-    return format_state_for_display(result)
+    formatted = format_state_for_display(result)
+    formatted["timings"] = workflow_breakdown(workflow_id)
+    return formatted
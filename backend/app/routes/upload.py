@@ -8,11 +8,32 @@ from fastapi.responses import JSONResponse
 from typing import Optional
 
 from app.langgraph.workflow import graph
-from .config import results_store
+from app.utils.limits import DocumentLimitExceeded, check_page_count, check_upload_size
+from app.utils.read_pdf import pdf_page_count
+from app.utils.report_placeholders import build_report_placeholders
+from app.utils.retry import run_deadline, DeadlineExceeded, CircuitOpenError
+from .config import results_store, WORKFLOW_DEADLINE_SECONDS
 from .session import get_session_id
 
 router = APIRouter()
 
+# Size of each read from the uploaded file
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+async def read_upload(file: UploadFile) -> bytes:
+    """Read the spooled upload in chunks, holding the file itself (without form overhead) to the size limit."""
+    chunks = []
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        check_upload_size(size)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
 
 @router.post("/upload")
 async def upload_pdf(
@@ -24,6 +45,8 @@ async def upload_pdf(
     
     workflow_id = get_session_id(request)
     
+    # Oversized request bodies are rejected by UploadSizeLimitMiddleware before they are parsed
+    
     # Parse sections
     try:
         sections_list = json.loads(sections) if sections else []
@@ -39,7 +62,11 @@ async def upload_pdf(
         if not file.filename or not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files allowed")
         try:
-            file_bytes = await file.read()
+            file_bytes = await read_upload(file)
+            # Page count is known from the PDF structure; reject before any extraction
+            check_page_count(pdf_page_count(file_bytes))
+        except DocumentLimitExceeded as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
     
@@ -49,15 +76,25 @@ async def upload_pdf(
         graph_state["pdf_bytes"] = file_bytes
         graph_state["pdf_filename"] = file.filename or "document.pdf"
     
-    # Invoke graph (checkpoint loads previous state if continuing)
-    result = graph.invoke(
-        graph_state,
-        config={"configurable": {"thread_id": workflow_id}}
-    )
+    # Invoke graph asynchronously (checkpoint loads previous state if continuing)
+    try:
+        with run_deadline(WORKFLOW_DEADLINE_SECONDS):
+            result = await graph.ainvoke(
+                graph_state,
+                config={"configurable": {"thread_id": workflow_id}}
+            )
+    except DocumentLimitExceeded as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=f"Language model provider unavailable: {str(e)}")
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Workflow timed out: {str(e)}")
     
     # Store result (drop pdf_bytes)
     result.pop("pdf_bytes", None)
     result["workflow_id"] = workflow_id
+    # Report first-page values, so document downloads are rendered locally
+    result["report_placeholders"] = build_report_placeholders(result)
     results_store[workflow_id] = result
     
     return JSONResponse({
@@ -1,3 +1,43 @@
-from .translator import translate_to_english
+from .translator import (
+    translate_to_english,
+    atranslate_to_english,
+    translate_text,
+    translate_segments,
+    translate_pages,
+    translate_page_stream,
+    read_and_translate_pdf,
+    aread_and_translate_pdf,
+)
+from .language import needs_translation, script_histogram
+from .memory import TranslationMemory, get_translation_memory, set_translation_memory
+from .http_pool import get_http_session, pool_stats
+from .backends import (
+    TranslatorBackend,
+    AzureTranslatorBackend,
+    FakeTranslatorBackend,
+    get_translator_backend,
+    set_translator_backend,
+)
 
-__all__ = ["translate_to_english"]
+__all__ = [
+    "translate_to_english",
+    "atranslate_to_english",
+    "translate_text",
+    "translate_segments",
+    "translate_pages",
+    "translate_page_stream",
+    "read_and_translate_pdf",
+    "aread_and_translate_pdf",
+    "needs_translation",
+    "script_histogram",
+    "TranslationMemory",
+    "get_translation_memory",
+    "set_translation_memory",
+    "get_http_session",
+    "pool_stats",
+    "TranslatorBackend",
+    "AzureTranslatorBackend",
+    "FakeTranslatorBackend",
+    "get_translator_backend",
+    "set_translator_backend",
+]
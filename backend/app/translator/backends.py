@@ -0,0 +1,120 @@
+"""
+Pluggable translation backends.
+
+A backend translates a batch of text segments to English in one request.
+The translator node chunks the FIR and calls the active backend, so the
+Azure service can be swapped for the local fake in tests and benchmarks
+(TRANSLATOR_BACKEND=fake).
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import List
+
+from .http_pool import get_http_session, request_timeout
+
+logger = logging.getLogger(__name__)
+
+
+class TranslatorBackend(ABC):
+    """Interface for translation backends."""
+
+    name = "base"
+    # Largest number of characters sent in one request
+    max_chars_per_request = 5000
+
+    @abstractmethod
+    def translate(self, texts: List[str]) -> List[str]:
+        """Translate each text to English, returning translations in the same order."""
+
+
+class AzureTranslatorBackend(TranslatorBackend):
+    """Azure AI Translator (REST API v3.0) over a shared pooled HTTP session."""
+
+    name = "azure"
+
+    def __init__(self):
+        self.key = os.environ.get("AZURE_TRANSLATOR_KEY")
+        self.location = os.environ.get("AZURE_TRANSLATOR_LOCATION")
+        self.endpoint = os.environ.get("AZURE_TRANSLATOR_ENDPOINT", "https://api.cognitive.microsofttranslator.com")
+        # Azure accepts up to 50,000 characters per request; smaller chunks translate in parallel
+        self.max_chars_per_request = int(os.getenv("TRANSLATOR_MAX_CHARS_PER_REQUEST", "5000"))
+
+        if not self.key or not self.location:
+            raise ValueError("AZURE_TRANSLATOR_KEY and AZURE_TRANSLATOR_LOCATION must be set in .env")
+        self.session = get_http_session()
+
+    def translate(self, texts: List[str]) -> List[str]:
+        params = {
+            'api-version': '3.0',
+            'to': ['en']  # Translating TO English
+        }
+        headers = {
+            'Ocp-Apim-Subscription-Key': self.key,
+            # location required if you're using a multi-service or regional (not global) resource.
+            'Ocp-Apim-Subscription-Region': self.location,
+            'Content-type': 'application/json',
+            'X-ClientTraceId': str(uuid.uuid4())
+        }
+        body = [{'text': text} for text in texts]
+
+        response = self.session.post(self.endpoint + '/translate', params=params, headers=headers, json=body, timeout=request_timeout())
+        # HTTPError carries the status code, so 429/5xx are retried and 4xx are not
+        response.raise_for_status()
+        data = response.json()
+
+        if isinstance(data, dict) and "error" in data:
+            raise Exception(f"Azure API Error: {data['error']}")
+
+        # Response structure for multiple inputs: [{'translations': [{'text': '...', 'to': 'en'}]}, ...]
+        return [item['translations'][0]['text'] for item in data]
+
+
+class FakeTranslatorBackend(TranslatorBackend):
+    """
+    Local stand-in that returns the text unchanged, optionally after a delay.
+    Used for tests, benchmarks and offline development.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_seconds: float = 0.0, max_chars_per_request: int = 5000):
+        self.latency_seconds = latency_seconds
+        self.max_chars_per_request = max_chars_per_request
+
+    def translate(self, texts: List[str]) -> List[str]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return list(texts)
+
+
+_BACKENDS = {
+    "azure": AzureTranslatorBackend,
+    "fake": FakeTranslatorBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_translator_backend() -> TranslatorBackend:
+    """Return the active backend, creating it from TRANSLATOR_BACKEND (default: azure) on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.getenv("TRANSLATOR_BACKEND", "azure").lower()
+            if name not in _BACKENDS:
+                raise ValueError(f"Unknown TRANSLATOR_BACKEND: {name}")
+            _backend = _BACKENDS[name]()
+            logger.info(f"Using {name} translator backend")
+        return _backend
+
+
+def set_translator_backend(backend: TranslatorBackend | None):
+    """Install a backend explicitly (None resets to the TRANSLATOR_BACKEND default)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
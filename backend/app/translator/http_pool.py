@@ -0,0 +1,127 @@
+"""
+Shared pooled HTTP session for outbound translator traffic.
+
+All translator requests go through one requests.Session whose urllib3 pool
+keeps connections alive between requests and workflow runs, so DNS, TCP and
+TLS setup is paid once per connection instead of once per call.
+
+Configuration:
+    TRANSLATOR_POOL_SIZE               connections kept per host (default 16)
+    TRANSLATOR_CONNECT_TIMEOUT_SECONDS connect timeout (default 3.05)
+    TRANSLATOR_READ_TIMEOUT_SECONDS    read timeout (default 30)
+    TRANSLATOR_POOL_TIMEOUT_SECONDS    wait for a free pooled connection (default 30)
+
+The pool blocks when all connections are in use rather than opening extra
+ones. requests never passes urllib3 a pool timeout, so the pools here fill
+one in: a request that cannot get a connection in time fails with urllib3's
+EmptyPoolError (not retried - the pool is saturated) instead of waiting forever.
+"""
+import os
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from app.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("TRANSLATOR_POOL_SIZE", "16"))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("TRANSLATOR_CONNECT_TIMEOUT_SECONDS", "3.05"))
+READ_TIMEOUT_SECONDS = float(os.getenv("TRANSLATOR_READ_TIMEOUT_SECONDS", "30"))
+# A connection is held for at most connect + read timeout, so a longer wait means the pool is saturated
+POOL_TIMEOUT_SECONDS = float(os.getenv("TRANSLATOR_POOL_TIMEOUT_SECONDS", "30"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class _BoundedWaitMixin:
+    """Connection pool whose checkout waits at most POOL_TIMEOUT_SECONDS unless told otherwise."""
+
+    def urlopen(self, *args, pool_timeout=None, **kwargs):
+        if pool_timeout is None:
+            pool_timeout = POOL_TIMEOUT_SECONDS
+        return super().urlopen(*args, pool_timeout=pool_timeout, **kwargs)
+
+
+class _BoundedWaitHTTPConnectionPool(_BoundedWaitMixin, HTTPConnectionPool):
+    pass
+
+
+class _BoundedWaitHTTPSConnectionPool(_BoundedWaitMixin, HTTPSConnectionPool):
+    pass
+
+
+class _BoundedWaitAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _BoundedWaitHTTPConnectionPool,
+            "https": _BoundedWaitHTTPSConnectionPool,
+        }
+
+
+def get_http_session() -> requests.Session:
+    """Return the shared session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # pool_block: wait (up to POOL_TIMEOUT_SECONDS) for a free connection instead of
+            # opening throwaway ones. Retries are handled by app.utils.retry, not by urllib3.
+            adapter = _BoundedWaitAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, pool_block=True, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Connection"] = "keep-alive"
+            _session = session
+        return _session
+
+
+def request_timeout() -> tuple[float, float]:
+    """(connect, read) timeout for translator requests."""
+    return CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS
+
+
+def pool_stats() -> list[dict]:
+    """
+    Per-host connection pool statistics.
+
+    connections_opened counts new TCP/TLS connections; requests much larger
+    than connections_opened means keep-alive is working.
+    """
+    if _session is None:
+        return []
+    stats = []
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            stats.append({
+                "host": f"{pool.scheme}://{pool.host}",
+                "max_size": pool.pool.maxsize,
+                # The queue holds idle connections plus None placeholders for unopened slots
+                "idle_connections": sum(1 for conn in list(pool.pool.queue) if conn is not None),
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            })
+    return stats
+
+
+def _collect_pool_metrics():
+    for stats in pool_stats():
+        labels = {"host": stats["host"]}
+        yield "fir_translator_pool_max_size", "gauge", labels, stats["max_size"], "Translator connection pool size"
+        yield "fir_translator_pool_idle_connections", "gauge", labels, stats["idle_connections"], "Idle keep-alive connections in the translator pool"
+        yield "fir_translator_pool_connections_opened_total", "counter", labels, stats["connections_opened"], "Connections opened by the translator pool"
+        yield "fir_translator_pool_requests_total", "counter", labels, stats["requests"], "Requests sent through the translator pool"
+
+
+registry.register_collector(_collect_pool_metrics)
@@ -0,0 +1,58 @@
+"""
+Fast local script detection used to skip translation of English text.
+
+Letters are counted per Unicode block; text whose letters are mostly Latin is
+treated as English. This is enough to tell typed English FIRs apart from
+Gujarati/Hindi (Devanagari) ones without a round trip to the translator.
+"""
+from collections import Counter
+
+# Share of non-Latin letters above which text is sent for translation
+NON_LATIN_THRESHOLD = 0.2
+
+_SCRIPT_RANGES = [
+    ("devanagari", 0x0900, 0x097F),
+    ("bengali", 0x0980, 0x09FF),
+    ("gurmukhi", 0x0A00, 0x0A7F),
+    ("gujarati", 0x0A80, 0x0AFF),
+    ("oriya", 0x0B00, 0x0B7F),
+    ("tamil", 0x0B80, 0x0BFF),
+    ("telugu", 0x0C00, 0x0C7F),
+    ("kannada", 0x0C80, 0x0CFF),
+    ("malayalam", 0x0D00, 0x0D7F),
+    ("arabic", 0x0600, 0x06FF),
+    ("latin", 0x0041, 0x024F),
+]
+
+
+def _script(char: str) -> str:
+    code = ord(char)
+    for name, start, end in _SCRIPT_RANGES:
+        if start <= code <= end:
+            return name
+    return "other"
+
+
+def script_histogram(text: str) -> Counter:
+    """Count letters in text by script (digits, punctuation and spaces are ignored)."""
+    return Counter(_script(char) for char in text if char.isalpha())
+
+
+def needs_translation(text: str, threshold: float = NON_LATIN_THRESHOLD) -> bool:
+    """True if more than `threshold` of the letters in text are not Latin."""
+    histogram = script_histogram(text)
+    letters = sum(histogram.values())
+    if not letters:
+        return False
+    return (letters - histogram["latin"]) / letters > threshold
+
+
+def contains_non_latin(text: str) -> bool:
+    """True if text has any non-Latin letter (a page that may hold a paragraph to translate)."""
+    return any(script != "latin" for script in script_histogram(text))
+
+
+def dominant_script(text: str) -> str | None:
+    """Most common script among the letters of text, or None if it has no letters."""
+    histogram = script_histogram(text)
+    return histogram.most_common(1)[0][0] if histogram else None
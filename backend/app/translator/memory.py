@@ -0,0 +1,126 @@
+"""
+Segment-level translation memory.
+
+FIR forms repeat large blocks of fixed text, so translated segments are
+remembered by a hash of their normalised source text and reused instead of
+being sent to the translator again. Entries are stored in a local SQLite file
+(TRANSLATION_MEMORY_PATH) and bounded to TRANSLATION_MEMORY_MAX_ENTRIES with
+least-recently-used eviction.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_PATH = "translation_memory.sqlite"
+DEFAULT_MAX_ENTRIES = 50000
+
+
+def normalize_segment(text: str) -> str:
+    """Normalise Unicode composition and whitespace so trivially different copies share an entry."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def segment_key(text: str, namespace: str = "") -> str:
+    """Hash of the normalised segment, scoped by namespace (backend and target language)."""
+    return hashlib.sha256(f"{namespace}|{normalize_segment(text)}".encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """SQLite-backed map from segment key to translation with LRU bounds."""
+
+    def __init__(self, path: str = DEFAULT_MEMORY_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translation_memory ("
+            "key TEXT PRIMARY KEY, source TEXT, translation TEXT, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translation_memory_last_used ON translation_memory (last_used)")
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Return translations for the keys that are present, marking them as recently used."""
+        found = {}
+        if not keys:
+            return found
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, translation FROM translation_memory WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE translation_memory SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                )
+        return found
+
+    def put_many(self, entries: Dict[str, tuple]):
+        """Store {key: (source, translation)} and evict least-recently-used entries over the bound."""
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO translation_memory VALUES (?, ?, ?, ?)",
+                    [(key, source, translation, now) for key, (source, translation) in entries.items()],
+                )
+                excess = self._conn.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM translation_memory WHERE key IN "
+                        "(SELECT key FROM translation_memory ORDER BY last_used LIMIT ?)",
+                        (excess,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory | None:
+    """
+    Shared translation memory, created on first use.
+    Set TRANSLATION_MEMORY_PATH to an empty string to disable it.
+    """
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            path = os.getenv("TRANSLATION_MEMORY_PATH", DEFAULT_MEMORY_PATH)
+            if not path:
+                return None
+            max_entries = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES)))
+            _memory = TranslationMemory(path, max_entries)
+            logger.info(f"Translation memory at {path} ({len(_memory)} entries)")
+        return _memory
+
+
+def set_translation_memory(memory: TranslationMemory | None):
+    """Install a memory explicitly (None resets to the TRANSLATION_MEMORY_PATH default)."""
+    global _memory
+    with _memory_lock:
+        _memory = memory
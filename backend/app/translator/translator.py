@@ -1,19 +1,281 @@
+import asyncio
+import contextvars
 import os
-import requests
-import uuid
-import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Tuple
+
 from app.langgraph.state import WorkflowState
+from app.utils.metrics import registry
+from app.utils.limits import DocumentLimitExceeded
+from app.utils.read_pdf import iter_pdf_pages, _load_pdf_bytes
+from app.utils.retry import exponential_backoff_retry, CircuitBreaker, CircuitOpenError, DeadlineExceeded
+from .backends import get_translator_backend
+from .language import contains_non_latin, needs_translation
+from .memory import get_translation_memory, segment_key
+
+# Separators tried in order when a text is too long for one request:
+# paragraphs, lines, sentences (incl. the Devanagari danda), then any whitespace
+_SEPARATORS = [r"\n\s*\n", r"\n", r"(?<=[.!?\u0964])\s+", r"\s+"]
+
+# A line break inside a paragraph, with the spaces around it
+_SOFT_WRAP = re.compile(r"[ \t]*\n[ \t]*")
+
+# Concurrent translation requests per document
+MAX_PARALLEL_REQUESTS = int(os.getenv("TRANSLATOR_MAX_PARALLEL", "8"))
+
+# Azure allows up to 1000 text elements per request
+MAX_SEGMENTS_PER_REQUEST = 100
+
+# Translation memory entries are scoped by target language
+TARGET_LANGUAGE = "en"
+
+translator_circuit_breaker = CircuitBreaker("translator")
+
+# Errors the upload route maps to their own status codes (413/422, 503, 504); not wrapped
+_PASSTHROUGH_ERRORS = (DocumentLimitExceeded, CircuitOpenError, DeadlineExceeded)
+
+
+def _units(text: str, level: int) -> List[Tuple[str, str]]:
+    """Split text at the given separator level into (segment, following separator) pairs."""
+    parts = re.split(f"({_SEPARATORS[level]})", text)
+    return [(parts[i], parts[i + 1] if i + 1 < len(parts) else "") for i in range(0, len(parts), 2)]
+
+
+def split_into_chunks(text: str, max_chars: int, level: int = 0) -> List[Tuple[str, str]]:
+    """
+    Split text into (chunk, separator) pairs with every chunk at most max_chars long.
+
+    Paragraphs are packed together greedily and only split further (lines, then
+    sentences, then words, then characters) when a single paragraph is too long.
+    Concatenating chunk + separator for all pairs reproduces the original text.
+    """
+    if len(text) <= max_chars:
+        return [(text, "")]
+    if level == len(_SEPARATORS):
+        return [(text[i:i + max_chars], "") for i in range(0, len(text), max_chars)]
+
+    chunks = []
+    current = None
+    for segment, separator in _units(text, level):
+        if len(segment) > max_chars:
+            if current:
+                chunks.append(current)
+                current = None
+            sub_chunks = split_into_chunks(segment, max_chars, level + 1)
+            sub_chunks[-1] = (sub_chunks[-1][0], sub_chunks[-1][1] + separator)
+            chunks.extend(sub_chunks)
+        elif current and len(current[0]) + len(current[1]) + len(segment) <= max_chars:
+            current = (current[0] + current[1] + segment, separator)
+        else:
+            if current:
+                chunks.append(current)
+            current = (segment, separator)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@exponential_backoff_retry(max_retries=3, max_wait=10, breaker=translator_circuit_breaker)
+def _translate_batch(backend, texts: List[str]) -> List[str]:
+    return backend.translate(texts)
+
+
+def _join_soft_wraps(paragraph: str) -> str:
+    """Join the lines of a paragraph: PDF text is hard-wrapped at the layout width, mid-sentence."""
+    return _SOFT_WRAP.sub(" ", paragraph)
+
+
+def _split_segments(text: str, max_chars: int) -> List[Tuple[str, str]]:
+    """
+    Split text into sentence-level (segment, separator) pairs, the unit stored
+    in translation memory. Segments longer than max_chars are chunked further.
+
+    Only paragraph breaks (blank lines) are kept as boundaries; line breaks
+    inside a paragraph are joined first, so a wrapped sentence is translated
+    (and remembered) whole rather than as line fragments.
+    """
+    pairs = []
+    for paragraph, paragraph_separator in _units(text, 0):
+        sentences = _units(_join_soft_wraps(paragraph), 2)
+        sentences[-1] = (sentences[-1][0], sentences[-1][1] + paragraph_separator)
+        for sentence, separator in sentences:
+            if len(sentence) <= max_chars:
+                pairs.append((sentence, separator))
+            else:
+                chunks = split_into_chunks(sentence, max_chars, level=3)
+                chunks[-1] = (chunks[-1][0], chunks[-1][1] + separator)
+                pairs.extend(chunks)
+    return pairs
+
+
+def _batches(texts: List[str], max_chars: int) -> List[List[int]]:
+    """Group text indexes into requests under the character and element limits."""
+    batches, current, size = [], [], 0
+    for i, text in enumerate(texts):
+        if current and (size + len(text) > max_chars or len(current) >= MAX_SEGMENTS_PER_REQUEST):
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _translate_unique(backend, texts: List[str]) -> List[str]:
+    """Translate distinct segments, batching them into parallel requests."""
+    batches = _batches(texts, backend.max_chars_per_request)
+    translations = [None] * len(texts)
+    if len(batches) == 1:
+        results = [_translate_batch(backend, texts)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_REQUESTS, len(batches))) as pool:
+            # Copy the context so the run deadline and metrics tags reach the workers
+            futures = [
+                pool.submit(contextvars.copy_context().run, _translate_batch, backend, [texts[i] for i in batch])
+                for batch in batches
+            ]
+            results = [future.result() for future in futures]
+    for batch, batch_results in zip(batches, results):
+        for i, translation in zip(batch, batch_results):
+            translations[i] = translation
+    return translations
+
+
+def translate_segments(texts: List[str]) -> Tuple[List[str], dict]:
+    """
+    Translate texts of any length to English, returning them in order.
+
+    Each text is split into sentence-level segments under the backend's
+    per-request limit. Segments already in translation memory are reused;
+    the rest are de-duplicated, sent in parallel batches (each with its own
+    retry) and remembered. Texts are reassembled with their original
+    separators and surrounding whitespace.
+
+    Returns:
+        (translations, stats with chars_sent, segments_total, segments_from_memory)
+    """
+    backend = get_translator_backend()
+    namespace = f"{backend.name}:{TARGET_LANGUAGE}"
+
+    # (text index, segment, separator) for every segment of every text
+    segments = [
+        (index, segment, separator)
+        for index, text in enumerate(texts)
+        for segment, separator in _split_segments(text, backend.max_chars_per_request)
+    ]
+    # Whitespace-only segments need no translation
+    keys = {i: segment_key(segment, namespace) for i, (_, segment, _) in enumerate(segments) if segment.strip()}
+
+    memory = get_translation_memory() if keys else None
+    known = memory.get_many(list(keys.values())) if memory is not None else {}
+
+    unseen = {}  # key -> stripped source
+    for i, key in keys.items():
+        if key not in known and key not in unseen:
+            unseen[key] = segments[i][1].strip()
+    sources = list(unseen.values())
+    new_translations = dict(zip(unseen, _translate_unique(backend, sources))) if sources else {}
+    if memory is not None and new_translations:
+        memory.put_many({key: (unseen[key], translation) for key, translation in new_translations.items()})
+    translations = {**known, **new_translations}
+
+    results = [""] * len(texts)
+    for i, (index, segment, separator) in enumerate(segments):
+        if i in keys:
+            # Keep the segment's own leading/trailing whitespace around the translation
+            leading = segment[:len(segment) - len(segment.lstrip())]
+            trailing = segment[len(segment.rstrip()):]
+            segment = leading + translations[keys[i]] + trailing
+        results[index] += segment + separator
+
+    stats = {
+        "chars_sent": sum(len(source) for source in sources),
+        "segments_total": len(keys),
+        "segments_from_memory": sum(1 for key in keys.values() if key in known),
+    }
+    print(f"📡 [translate_to_english] {len(sources)} segment(s) sent to the {backend.name} backend, "
+          f"{stats['segments_from_memory']}/{stats['segments_total']} from translation memory")
+    return results, stats
+
+
+def translate_text(text: str) -> str:
+    """Translate text of any length to English (see translate_segments)."""
+    return translate_segments([text])[0][0]
+
+
+def translate_pages(pages: List[str]) -> Tuple[List[str], dict]:
+    """
+    Translate only the parts of the document that are not already English.
+
+    Pages without any non-Latin letters pass through untouched; on every other
+    page each paragraph is checked and only non-English paragraphs are
+    translated, so a Hindi statement on a mostly English page is not missed.
+
+    Returns:
+        (translated pages, stats with character and page counts)
+    """
+    segments = []  # (page index, paragraph index) of paragraphs to translate
+    page_units = []
+    for page_index, page in enumerate(pages):
+        if not contains_non_latin(page):
+            page_units.append(None)
+            continue
+        units = _units(page, 0)
+        page_units.append(units)
+        segments.extend(
+            (page_index, unit_index)
+            for unit_index, (paragraph, _) in enumerate(units)
+            if needs_translation(paragraph)
+        )
+
+    sources = [page_units[p][u][0] for p, u in segments]
+    translated_sources, segment_stats = translate_segments(sources) if sources else ([], {})
+    translations = dict(zip(segments, translated_sources))
+
+    translated_pages = []
+    for page_index, page in enumerate(pages):
+        units = page_units[page_index]
+        if units is None:
+            translated_pages.append(page)
+            continue
+        translated_pages.append("".join(
+            translations.get((page_index, unit_index), paragraph) + separator
+            for unit_index, (paragraph, separator) in enumerate(units)
+        ))
+
+    chars_total = sum(len(page) for page in pages)
+    chars_non_english = sum(len(source) for source in sources)
+    chars_translated = segment_stats.get("chars_sent", 0)
+    stats = {
+        "pages": len(pages),
+        "pages_translated": len({p for p, _ in segments}),
+        "chars_total": chars_total,
+        "chars_non_english": chars_non_english,
+        "chars_translated": chars_translated,
+        "segments_total": segment_stats.get("segments_total", 0),
+        "segments_from_memory": segment_stats.get("segments_from_memory", 0),
+    }
+    help_text = "FIR characters sent to the translator, served from translation memory or skipped as English"
+    registry.inc("fir_translation_characters_total", {"status": "translated"}, chars_translated, help_text)
+    registry.inc("fir_translation_characters_total", {"status": "memory"}, chars_non_english - chars_translated, help_text)
+    registry.inc("fir_translation_characters_total", {"status": "skipped"}, chars_total - chars_non_english, help_text)
+    return translated_pages, stats
+
 
 def translate_to_english(state: WorkflowState) -> dict:
     """
-    Translate PDF content to English using Azure Translator.
+    Translate PDF content to English using the configured translator backend
+    (Azure Translator by default). Pages that are already English are not sent.
     Works as a LangGraph node that accepts state and returns updated state.
     
     Args:
-        state: WorkflowState containing pdf_content
+        state: WorkflowState containing pdf_content (and pdf_pages from read_pdf)
         
     Returns:
-        Dictionary with translated content in pdf_content_in_english
+        Dictionary with translated content in pdf_content_in_english and
+        character counts in translation_stats
     """
     if not state.get("pdf_content"):
         raise ValueError("pdf_content is required for translation")
@@ -21,56 +283,106 @@ def translate_to_english(state: WorkflowState) -> dict:
     pdf_content = state["pdf_content"]
     print("Translation started")
     try:
-        # Retrieve configuration from environment variables
-        key = os.environ.get("AZURE_TRANSLATOR_KEY")
-        location = os.environ.get("AZURE_TRANSLATOR_LOCATION")
-        endpoint = os.environ.get("AZURE_TRANSLATOR_ENDPOINT", "https://api.cognitive.microsofttranslator.com")
+        # Per-page detection needs the pages read_pdf joined into pdf_content
+        pages = state.get("pdf_pages")
+        if not pages or "\n".join(pages) != pdf_content:
+            pages = [pdf_content]
         
-        if not key or not location:
-            raise ValueError("AZURE_TRANSLATOR_KEY and AZURE_TRANSLATOR_LOCATION must be set in .env")
+        translated_pages, stats = translate_pages(pages)
+        translated_text = "\n".join(translated_pages)
+        
+        print(f"✅ [translate_to_english] Translation completed, output length: {len(translated_text)} characters")
+        print(f"   Translated {stats['chars_translated']}/{stats['chars_total']} characters "
+              f"({stats['pages_translated']}/{stats['pages']} pages)")
+        print("=" * 80)
+        
+        return {"pdf_content_in_english": translated_text, "translation_stats": stats}
 
-        path = '/translate'
-        constructed_url = endpoint + path
+    except _PASSTHROUGH_ERRORS:
+        raise
+    except Exception as e:
+        raise Exception(f"Error translating content: {str(e)}") from e
 
-        params = {
-            'api-version': '3.0',
-            'to': ['en']  # Translating TO English
-        }
 
-        headers = {
-            'Ocp-Apim-Subscription-Key': key,
-            # location required if you're using a multi-service or regional (not global) resource.
-            'Ocp-Apim-Subscription-Region': location,
-            'Content-type': 'application/json',
-            'X-ClientTraceId': str(uuid.uuid4())
-        }
+async def atranslate_to_english(state: WorkflowState) -> dict:
+    """
+    Async variant of translate_to_english. The backend calls are blocking HTTP,
+    so translation runs in a worker thread to keep the event loop free.
+    """
+    return await asyncio.to_thread(translate_to_english, state)
 
-        # You can pass more than one object in body.
-        body = [{
-            'text': pdf_content
-        }]
 
-        print(f"📡 [translate_to_english] Sending request to {endpoint} (timeout=10s)...")
-        request = requests.post(constructed_url, params=params, headers=headers, json=body, timeout=10)
-        print("✅ [translate_to_english] Received response from Azure.")
-        
-        response = request.json()
+def translate_page_stream(pages: Iterable[str]) -> Tuple[List[str], dict]:
+    """
+    Translate pages as they arrive from an iterator (e.g. iter_pdf_pages).
 
-        # Check for error in response
-        if isinstance(response, dict) and "error" in response:
-             raise Exception(f"Azure API Error: {response['error']}")
+    Pages without non-Latin letters pass through; other pages are submitted
+    for translation (of their non-English paragraphs, see translate_pages)
+    immediately, so translation overlaps with extraction of later pages.
+    Pages are returned in their original order.
+    """
+    results = []
+    futures = {}
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS) as pool:
+        for page_index, page in enumerate(pages):
+            results.append(page)
+            if contains_non_latin(page):
+                futures[page_index] = pool.submit(contextvars.copy_context().run, translate_pages, [page])
 
-        # Extract translated text
-        # Response structure is valid for multiple inputs: [{'translations': [{'text': '...', 'to': 'en'}]}]
-        translated_text = response[0]['translations'][0]['text']
-        
-        print(f"✅ [translate_to_english] Translation completed, output length: {len(translated_text)} characters")
-        print("=" * 80)
-        
-        return {"pdf_content_in_english": translated_text}
+        stats = {"pages": len(results), "chars_total": sum(len(page) for page in results)}
+        for page_index, future in futures.items():
+            translated, page_stats = future.result()
+            results[page_index] = translated[0]
+            for key in ("pages_translated", "chars_non_english", "chars_translated", "segments_total", "segments_from_memory"):
+                stats[key] = stats.get(key, 0) + page_stats[key]
+    for key in ("pages_translated", "chars_non_english", "chars_translated", "segments_total", "segments_from_memory"):
+        stats.setdefault(key, 0)
+    return results, stats
 
+
+def read_and_translate_pdf(state: WorkflowState) -> dict:
+    """
+    Streaming alternative to the read_pdf -> translate_to_english nodes:
+    pages are handed to translation as soon as they are extracted.
+    
+    Args:
+        state: WorkflowState containing pdf_bytes or pdf_path
+        
+    Returns:
+        Dictionary with pdf_content, pdf_pages, pdf_content_in_english and translation_stats
+    """
+    print("Reading and translating PDF (streaming)...")
+    pdf_bytes = _load_pdf_bytes(state)
+    
+    pages = []
+    
+    def page_texts():
+        for _, text in iter_pdf_pages(pdf_bytes):
+            pages.append(text)
+            yield text
+    
+    try:
+        translated_pages, stats = translate_page_stream(page_texts())
+    except _PASSTHROUGH_ERRORS:
+        raise
     except Exception as e:
-        raise Exception(f"Error translating content: {str(e)}")
+        raise Exception(f"Error translating content: {str(e)}") from e
+    
+    translated_text = "\n".join(translated_pages)
+    print(f"✅ [read_and_translate_pdf] Translated {stats['chars_translated']}/{stats['chars_total']} characters "
+          f"({stats['pages_translated']}/{stats['pages']} pages)")
+    
+    return {
+        "pdf_content": "\n".join(pages),
+        "pdf_pages": pages,
+        "pdf_content_in_english": translated_text,
+        "translation_stats": stats,
+    }
+
+
+async def aread_and_translate_pdf(state: WorkflowState) -> dict:
+    """Async variant of read_and_translate_pdf (runs in a worker thread)."""
+    return await asyncio.to_thread(read_and_translate_pdf, state)
 
 if __name__ == "__main__":
     # For local testing - Direct API Call (No project imports needed)
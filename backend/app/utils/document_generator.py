@@ -2,15 +2,19 @@
 Document generation utility for creating Word documents from workflow state.
 """
 
+import copy
+import hashlib
 import os
+import threading
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from docx import Document
+from docx.text.paragraph import Paragraph
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_BREAK
 from docx.oxml.ns import qn
-from pydantic import BaseModel, Field
-from app.models.openai import llm_model
+from app.utils.report_placeholders import build_report_placeholders
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,85 +22,74 @@ logger = logging.getLogger(__name__)
 # Template path
 TEMPLATE_PATH = Path(__file__).parent.parent / "doc_geneation" / "Report.docx"
 
+# Placeholders filled from build_report_placeholders
+PLACEHOLDER_FIELDS = ("name_of_accused", "case_title", "fir_date", "sections_invoked")
 
-class FIRPlaceholders(BaseModel):
-    """Pydantic model for extracting FIR placeholders"""
-    name_of_accused: str = Field(description="Full name of the accused person as mentioned in FIR")
-    case_title: str = Field(description="Case title in format: STATE OF [STATE] vs. [ACCUSED NAME] with any qualifiers like (JUVENILE)")
-    fir_date: str = Field(description="Date of FIR in format: DD.MM.YYYY or DD/MM/YYYY")
-    sections_invoked: str = Field(description="All sections invoked in FIR, formatted as: Section 8(c), Section 20(b)(ii)(B), Section 29")
+# Paragraph replaced by the generated sections
+REST_CONTENT_PLACEHOLDER = "{{rest_content}}"
 
 
-def extract_fir_placeholders(fir_facts: Dict[str, str], pdf_content: str = None) -> Dict[str, str]:
+class _ReportTemplate:
     """
-    Extract placeholders from FIR facts using LLM with Pydantic model.
-    
-    Args:
-        fir_facts: Dictionary of FIR facts
-        pdf_content: Raw PDF content for better extraction
-        
-    Returns:
-        Dictionary with placeholder values
+    Report.docx parsed once, with the locations of its placeholder paragraphs.
+
+    Locations are XPaths into the document XML, which stay valid in every deep
+    copy of the prototype, so filling a copy needs no scan of the document.
     """
-    try:
-        # Combine FIR facts into a single text
-        fir_text = ""
-        if fir_facts:
-            for key, value in fir_facts.items():
-                fir_text += f"{key.replace('_', ' ').title()}: {value}\n"
-        
-        if pdf_content:
-            fir_text = pdf_content[:2000]  # Use first 2000 chars for context
-        
-        if not fir_text:
-            return {
-                "name_of_accused": "Unknown",
-                "case_title": "STATE OF GUJARAT vs. Unknown",
-                "fir_date": "Not specified",
-                "sections_invoked": "NDPS Act sections"
-            }
-        
-        # Use LLM to extract placeholders
-        prompt = f"""Extract the following information from the FIR content provided below:
 
-1. **name_of_accused**: Full name of the accused person as mentioned in FIR
-2. **case_title**: Format as "STATE OF GUJARAT vs. [ACCUSED NAME]" with qualifiers like "(JUVENILE)" if applicable
-3. **fir_date**: Date of FIR in format DD.MM.YYYY or DD/MM/YYYY
-4. **sections_invoked**: All sections invoked in FIR, formatted as: "Section 8(c), Section 20(b)(ii)(B), Section 29"
+    def __init__(self, path: Path):
+        data = path.read_bytes()
+        # Identifies the loaded template in report ETags (see report_cache)
+        self.version = hashlib.sha256(data).hexdigest()
+        self.document = Document(BytesIO(data))
+        tree = self.document.element.getroottree()
+        self.placeholder_paragraphs: List[Tuple[str, str]] = []
+        self.rest_content_path = None
+        # Body paragraphs and table cell paragraphs, in document order
+        for element in self.document.element.body.iter(qn('w:p')):
+            text = Paragraph(element, None).text
+            if "{{" not in text:
+                continue
+            if REST_CONTENT_PLACEHOLDER in text:
+                if self.rest_content_path is None:
+                    self.rest_content_path = tree.getpath(element)
+            elif any(f"{{{{{field}}}}}" in text for field in PLACEHOLDER_FIELDS):
+                self.placeholder_paragraphs.append((tree.getpath(element), text))
 
-FIR Content:
-{fir_text}
+    def new_document(self) -> Tuple[Document, List[Tuple[Paragraph, str]], Paragraph | None]:
+        """
+        Deep copy of the prototype with its placeholder paragraphs resolved.
 
-Extract the information accurately from the FIR content above.
-"""
-        
-        result = llm_model.with_structured_output(FIRPlaceholders).invoke(prompt)
-        
-        return {
-            "name_of_accused": result.name_of_accused,
-            "case_title": result.case_title,
-            "fir_date": result.fir_date,
-            "sections_invoked": result.sections_invoked
-        }
-    except Exception as e:
-        logger.error(f"Error extracting FIR placeholders: {e}", exc_info=True)
-        # Fallback to basic extraction
-        name_of_accused = "Unknown"
-        if fir_facts and "identity_of_accused" in fir_facts:
-            identity = fir_facts["identity_of_accused"]
-            lines = identity.split(",")
-            if lines:
-                name_of_accused = lines[0].strip()
-                for prefix in ["Name:", "Accused:", "The accused"]:
-                    if name_of_accused.startswith(prefix):
-                        name_of_accused = name_of_accused[len(prefix):].strip()
-        
-        return {
-            "name_of_accused": name_of_accused,
-            "case_title": f"STATE OF GUJARAT vs. {name_of_accused}",
-            "fir_date": "Not specified",
-            "sections_invoked": "NDPS Act sections"
-        }
+        Returns:
+            (document, [(paragraph, template text)], rest_content paragraph or None)
+        """
+        doc = copy.deepcopy(self.document)
+        root = doc.element
+        placeholders = [(Paragraph(root.xpath(path)[0], doc._body), text) for path, text in self.placeholder_paragraphs]
+        rest_content = Paragraph(root.xpath(self.rest_content_path)[0], doc._body) if self.rest_content_path else None
+        return doc, placeholders, rest_content
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def _report_template() -> _ReportTemplate:
+    """Parsed report template (loaded on first use)."""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                if not TEMPLATE_PATH.exists():
+                    raise FileNotFoundError(f"Template not found: {TEMPLATE_PATH}")
+                _template = _ReportTemplate(TEMPLATE_PATH)
+                logger.info(f"Loaded report template: {len(_template.placeholder_paragraphs)} placeholder paragraphs")
+    return _template
+
+
+def report_template_version() -> str:
+    """Hash of the report template this process renders with."""
+    return _report_template().version
 
 
 def add_formatted_section(doc: Document, title: str, content: str, level: int = 1):
@@ -622,71 +615,19 @@ def generate_document(workflow_state: Dict[str, Any]) -> bytes:
         Bytes of the generated document
     """
     try:
-        # Load template
-        if not TEMPLATE_PATH.exists():
-            raise FileNotFoundError(f"Template not found: {TEMPLATE_PATH}")
+        # Copy of the pre-parsed template with its placeholder paragraphs located
+        doc, placeholder_paragraphs, rest_content_paragraph = _report_template().new_document()
         
-        doc = Document(str(TEMPLATE_PATH))
+        # Placeholders are computed once per workflow when the result is stored
+        placeholders = workflow_state.get("report_placeholders") or build_report_placeholders(workflow_state)
         
-        # Extract FIR placeholders using LLM
-        fir_facts = workflow_state.get("fir_facts", {})
-        pdf_content = workflow_state.get("pdf_content_in_english", "")
-        placeholders = extract_fir_placeholders(fir_facts, pdf_content)
-        
-        # Replace placeholders in all paragraphs
-        for paragraph in doc.paragraphs:
-            text = paragraph.text
-            if "{{" in text:
-                text = text.replace("{{name_of_accused}}", placeholders["name_of_accused"])
-                text = text.replace("{{case_title}}", placeholders["case_title"])
-                text = text.replace("{{fir_date}}", placeholders["fir_date"])
-                text = text.replace("{{sections_invoked}}", placeholders["sections_invoked"])
-                if text != paragraph.text:
-                    paragraph.clear()
-                    run = paragraph.add_run(text)
-                    run.font.size = Pt(11)
-        
-        # Replace placeholders in tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        text = paragraph.text
-                        if "{{" in text:
-                            text = text.replace("{{name_of_accused}}", placeholders["name_of_accused"])
-                            text = text.replace("{{case_title}}", placeholders["case_title"])
-                            text = text.replace("{{fir_date}}", placeholders["fir_date"])
-                            text = text.replace("{{sections_invoked}}", placeholders["sections_invoked"])
-                            if text != paragraph.text:
-                                paragraph.clear()
-                                run = paragraph.add_run(text)
-                                run.font.size = Pt(11)
-        
-        # Find and replace {{rest_content}} placeholder
-        rest_content_found = False
-        rest_content_paragraph = None
-        for paragraph in doc.paragraphs:
-            if "{{rest_content}}" in paragraph.text:
-                rest_content_paragraph = paragraph
-                rest_content_found = True
-                break
-        
-        # Also check in tables
-        if not rest_content_found:
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            if "{{rest_content}}" in paragraph.text:
-                                rest_content_paragraph = paragraph
-                                rest_content_found = True
-                                break
-                        if rest_content_found:
-                            break
-                    if rest_content_found:
-                        break
-                if rest_content_found:
-                    break
+        # Replace placeholders in paragraphs and table cells
+        for paragraph, text in placeholder_paragraphs:
+            for field in PLACEHOLDER_FIELDS:
+                text = text.replace(f"{{{{{field}}}}}", placeholders[field])
+            paragraph.clear()
+            run = paragraph.add_run(text)
+            run.font.size = Pt(11)
         
         # Format and add all sections
         from ..routes.utils import format_state_for_display
@@ -703,7 +644,6 @@ def generate_document(workflow_state: Dict[str, Any]) -> bytes:
             format_section_content(doc, formatted_state)
         
         # Save to bytes
-        from io import BytesIO
         output = BytesIO()
         doc.save(output)
         output.seek(0)
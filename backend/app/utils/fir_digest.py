@@ -0,0 +1,211 @@
+"""
+Token-budgeted FIR context shared by the analysis nodes.
+
+Most nodes embed the FIR in their prompt. Long FIRs are mostly form
+boilerplate, repeated page headers and duplicated passages, so sending the
+full text to every node pays for the same tokens many times per run.
+
+build_fir_digest runs once after translation and stores in state a "digest":
+the FIR split into paragraphs with boilerplate and duplicates removed, each
+paragraph scored for salience (seizure, quantities, sections, dates, people)
+and token-counted. Each node then calls fir_text_for(state, budget) with its
+own token budget and gets the full FIR when it fits, or the most salient
+paragraphs (in document order) that fit the budget otherwise.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import re
+from collections import Counter
+from typing import List
+
+from app.models.rate_limiter import estimate_tokens
+from app.utils.metrics import current_node_label, registry
+
+logger = logging.getLogger(__name__)
+
+# Paragraphs longer than this are split at line boundaries so selection stays fine-grained
+MAX_PARAGRAPH_CHARS = 800
+
+# A short line repeated this many times is a page header/footer
+REPEATED_LINE_MIN_COUNT = 3
+REPEATED_LINE_MAX_CHARS = 80
+
+# Form labels and page furniture that carry no case facts
+_BOILERPLATE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"^\s*page\s*\d+(\s*(of|/)\s*\d+)?\s*$",
+        r"^\s*[-–—]?\s*\d+\s*[-–—]?\s*$",
+        r"^\s*first information report\s*$",
+        r"^\s*\(?\s*under section 154 (of )?(cr\.?\s*p\.?\s*c\.?|bnss|the code of criminal procedure)[^)]*\)?\s*$",
+        r"^\s*(signature|sign\.?|thumb impression)( of [\w\s/.]+)?\s*:?\s*$",
+        r"^\s*(to be filled|for office use)[\w\s,.]*$",
+        r"^\s*[_.\-=*\s]+$",
+    )
+]
+
+# Terms that mark paragraphs carrying the facts most nodes reason about, with weights
+_SALIENT_TERMS = {
+    # Recovery and contraband
+    "seiz": 3, "recover": 3, "contraband": 3, "narcotic": 2, "psychotropic": 2,
+    "ganja": 3, "cannabis": 3, "charas": 3, "heroin": 3, "smack": 3, "opium": 3,
+    "poppy": 3, "cocaine": 3, "morphine": 3, "codeine": 3, "tablet": 2, "capsule": 2,
+    "injection": 2, "syrup": 2, "commercial quantity": 3, "small quantity": 3,
+    # Quantities and samples
+    "kg": 2, "gram": 2, "weigh": 2, "sample": 2, "seal": 2, "packet": 1, "bag": 1,
+    # Procedure
+    "section": 2, "ndps": 2, "search": 2, "arrest": 2, "notice": 2, "gazetted": 3,
+    "magistrate": 2, "witness": 2, "panch": 2, "fsl": 2, "forensic": 2, "inventory": 2,
+    "secret information": 3, "informer": 2, "raid": 2, "videograph": 2, "photograph": 1,
+    # People, places and time
+    "accused": 2, "complainant": 1, "son of": 1, "s/o": 1, "resident of": 1, "r/o": 1,
+    "vehicle": 1, "registration": 1, "mobile": 1, "date": 1, "time": 1, "hrs": 1,
+}
+
+_NUMBER_PATTERN = re.compile(r"\d")
+_DATE_PATTERN = re.compile(r"\b\d{1,2}[./-]\d{1,2}[./-]\d{2,4}\b|\b\d{1,2}:\d{2}\b")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\W+", " ", text.lower()).strip()
+
+
+def _split_paragraphs(text: str) -> List[str]:
+    """Split on blank lines; pack lines of over-long blocks into MAX_PARAGRAPH_CHARS pieces."""
+    paragraphs = []
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block:
+            continue
+        if len(block) <= MAX_PARAGRAPH_CHARS:
+            paragraphs.append(block)
+            continue
+        current = []
+        size = 0
+        for line in block.split("\n"):
+            if current and size + len(line) > MAX_PARAGRAPH_CHARS:
+                paragraphs.append("\n".join(current))
+                current, size = [], 0
+            current.append(line)
+            size += len(line) + 1
+        if current:
+            paragraphs.append("\n".join(current))
+    return paragraphs
+
+
+def _boilerplate_lines(text: str) -> set:
+    """Normalized short lines repeated across the document (page headers and footers)."""
+    counts = Counter(
+        _normalize(line) for line in text.split("\n")
+        if line.strip() and len(line.strip()) <= REPEATED_LINE_MAX_CHARS
+    )
+    return {line for line, count in counts.items() if line and count >= REPEATED_LINE_MIN_COUNT}
+
+
+def _is_boilerplate(line: str, repeated: set) -> bool:
+    return _normalize(line) in repeated or any(p.match(line) for p in _BOILERPLATE_PATTERNS)
+
+
+def _salience(paragraph: str, position: int) -> float:
+    """Score a paragraph by salient terms, numbers and dates, normalised by length."""
+    lowered = paragraph.lower()
+    score = sum(weight * lowered.count(term) for term, weight in _SALIENT_TERMS.items())
+    score += min(len(_NUMBER_PATTERN.findall(paragraph)), 20) * 0.25
+    score += len(_DATE_PATTERN.findall(paragraph)) * 1.5
+    # The opening paragraphs carry the FIR number, police station, dates and parties
+    if position < 2:
+        score += 5
+    # Favour dense paragraphs over long ones that merely contain more words
+    return score / math.sqrt(estimate_tokens(paragraph))
+
+
+def build_digest(text: str) -> dict:
+    """
+    Build the FIR digest for `text`.
+
+    Returns:
+        dict with full_tokens (estimate for the whole text), tokens (sum over
+        kept paragraphs) and paragraphs: [{"text", "tokens", "score"}] in
+        document order, with duplicates and boilerplate removed.
+    """
+    repeated = _boilerplate_lines(text)
+    seen = set()
+    paragraphs = []
+    for paragraph in _split_paragraphs(text):
+        lines = [line for line in paragraph.split("\n") if line.strip() and not _is_boilerplate(line, repeated)]
+        if not lines:
+            continue
+        paragraph = "\n".join(lines)
+        key = hashlib.sha1(_normalize(paragraph).encode("utf-8")).hexdigest()
+        if key in seen:
+            continue
+        seen.add(key)
+        paragraphs.append({
+            "text": paragraph,
+            "tokens": estimate_tokens(paragraph),
+            "score": round(_salience(paragraph, len(paragraphs)), 4),
+        })
+
+    return {
+        "full_tokens": estimate_tokens(text),
+        "tokens": sum(p["tokens"] for p in paragraphs),
+        "paragraphs": paragraphs,
+    }
+
+
+def select_paragraphs(digest: dict, token_budget: int) -> str:
+    """Most salient digest paragraphs that fit `token_budget`, joined in document order."""
+    ranked = sorted(range(len(digest["paragraphs"])), key=lambda i: -digest["paragraphs"][i]["score"])
+    chosen = []
+    used = 0
+    for i in ranked:
+        tokens = digest["paragraphs"][i]["tokens"] + 1  # +1 for the joining blank line
+        if used + tokens <= token_budget:
+            chosen.append(i)
+            used += tokens
+    return "\n\n".join(digest["paragraphs"][i]["text"] for i in sorted(chosen))
+
+
+def fir_text_for(state: dict, token_budget: int) -> str:
+    """
+    FIR text for a node that can spend `token_budget` tokens on it.
+
+    Returns pdf_content_in_english unchanged when it fits; otherwise the digest
+    (the most salient paragraphs within the budget). If the digest stage did
+    not run (e.g. a node invoked directly), the digest is built on the spot.
+    """
+    full_text = state["pdf_content_in_english"]
+    digest = state.get("fir_digest") or build_digest(full_text)
+
+    if digest["full_tokens"] <= token_budget:
+        text, mode = full_text, "full"
+    else:
+        text, mode = select_paragraphs(digest, token_budget), "digest"
+        logger.info(
+            f"FIR compressed for {current_node_label()}: {digest['full_tokens']} -> "
+            f"{estimate_tokens(text)} tokens (budget {token_budget})"
+        )
+
+    registry.inc("fir_context_tokens_total", {"node": current_node_label(), "mode": mode}, estimate_tokens(text),
+                 "Estimated FIR tokens placed in prompts, by full text or digest")
+    return text
+
+
+def build_fir_digest(state: dict) -> dict:
+    """Graph node: build the FIR digest once from pdf_content_in_english."""
+    if not state.get("pdf_content_in_english"):
+        raise ValueError("pdf_content_in_english is required to build the FIR digest")
+
+    digest = build_digest(state["pdf_content_in_english"])
+    logger.info(
+        f"FIR digest built: {len(digest['paragraphs'])} paragraphs, "
+        f"{digest['tokens']} of {digest['full_tokens']} tokens kept after dedupe/boilerplate removal"
+    )
+    return {"fir_digest": digest}
+
+
+async def abuild_fir_digest(state: dict) -> dict:
+    """Async variant of build_fir_digest; the digest is CPU-bound, so it runs in a worker thread."""
+    return await asyncio.to_thread(build_fir_digest, state)
@@ -0,0 +1,123 @@
+"""
+Resource limits for uploaded FIR documents.
+
+Limits are checked incrementally - while the request body is received (see
+UploadSizeLimitMiddleware) and while pages are extracted - so oversized or
+pathological PDFs are rejected before any translation or LLM spend. A limit
+of 0 disables it.
+"""
+import os
+
+from starlette.responses import JSONResponse
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+# Allowance for multipart boundaries and form fields on top of the file itself
+MAX_REQUEST_OVERHEAD_BYTES = 1024 * 1024
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "200"))
+MAX_EXTRACTED_CHARS = int(os.getenv("MAX_EXTRACTED_CHARS", "1000000"))
+# Enforced for documents extracted in worker processes (a hung page gets its pool
+# recycled); for short documents extracted inline it is checked only after each
+# page returns, so it is best-effort there
+MAX_PAGE_EXTRACT_SECONDS = float(os.getenv("MAX_PAGE_EXTRACT_SECONDS", "10"))
+
+
+class DocumentLimitExceeded(Exception):
+    """
+    Raised when a document exceeds a resource limit.
+    status_code is the HTTP status to answer with (413 for size, 422 otherwise).
+    """
+
+    def __init__(self, message: str, status_code: int = 422):
+        # Both values in args so the exception survives pickling from worker processes
+        super().__init__(message, status_code)
+        self.message = message
+        self.status_code = status_code
+
+    def __str__(self):
+        return self.message
+
+
+def check_upload_size(size: int):
+    if MAX_UPLOAD_BYTES and size > MAX_UPLOAD_BYTES:
+        raise DocumentLimitExceeded(
+            f"File is larger than the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit", status_code=413
+        )
+
+
+def check_page_count(pages: int):
+    if MAX_PDF_PAGES and pages > MAX_PDF_PAGES:
+        raise DocumentLimitExceeded(f"PDF has {pages} pages; the limit is {MAX_PDF_PAGES}")
+
+
+def check_extracted_chars(chars: int):
+    if MAX_EXTRACTED_CHARS and chars > MAX_EXTRACTED_CHARS:
+        raise DocumentLimitExceeded(f"PDF text exceeds the {MAX_EXTRACTED_CHARS} character limit")
+
+
+def check_page_time(page_number: int, seconds: float):
+    if MAX_PAGE_EXTRACT_SECONDS and seconds > MAX_PAGE_EXTRACT_SECONDS:
+        raise DocumentLimitExceeded(
+            f"Extracting page {page_number + 1} took {seconds:.1f}s; the limit is {MAX_PAGE_EXTRACT_SECONDS:.0f}s"
+        )
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware answering 413 as soon as a request body passes the upload limit.
+
+    FastAPI reads and spools the whole multipart body before an upload route
+    runs, so the limit has to be enforced here: a declared Content-Length over
+    the limit is rejected before any of the body is read, and chunked bodies
+    are counted as they arrive. Once the limit is passed the application sees
+    a client disconnect and its own response is discarded.
+    """
+
+    def __init__(self, app, max_bytes: int | None = None):
+        self.app = app
+        self.max_bytes = (MAX_UPLOAD_BYTES + MAX_REQUEST_OVERHEAD_BYTES if MAX_UPLOAD_BYTES else 0) \
+            if max_bytes is None else max_bytes
+
+    def _response(self) -> JSONResponse:
+        return JSONResponse(
+            {"detail": f"Request is larger than the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit"},
+            status_code=413,
+            headers={"Connection": "close"},
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._response()(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    if not response_started:
+                        rejected = True
+                        await self._response()(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
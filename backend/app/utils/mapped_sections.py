@@ -0,0 +1,168 @@
+"""
+Merge the sections mapped for each legal point into one ranked list.
+
+The act-mapping nodes map every point extracted from the FIR separately, so
+the same section comes back once per point that supports it, often written
+differently ("Section 20 (b)", "Section 20(b)", "S. 20 (b) of NDPS Act").
+merge_mapped_sections canonicalises the section numbers and merges the
+duplicates:
+
+- section_number: canonical form, e.g. "Section 20 (b)(ii)(B)"
+- section_description: from the best-scoring occurrence
+- why_section_is_relevant: every distinct reason, in point order
+- source: every distinct source, joined with "; "
+
+Sections are ranked by the number of points supporting them, then by the
+best retrieval score of their text for any of those points.
+"""
+import re
+from typing import Dict, List, Tuple
+
+_PREFIX = re.compile(r'^\s*(?:u/s\.?|sections?|sec\.?|s\.)\s*', re.IGNORECASE)
+# "20", "27A", "52-A" (a hyphenated letter is part of the number, not a clause)
+_NUMBER = re.compile(r'(\d+)(?:([A-Za-z]+)|\s*-\s*([A-Za-z])(?![A-Za-z]))?')
+_CLAUSE = re.compile(r'\(\s*([^()\s]+)\s*\)')
+_CLAUSES = re.compile(r'(?:\s*\(\s*[^()\s]+\s*\))*')
+# One section reference in a list: "8(c)", "20 (b)(ii)(B)", "52-A"; four-digit numbers are years
+_REFERENCE = r'\d{1,3}(?!\d)(?:[A-Za-z]+\b|\s*-\s*[A-Za-z]\b)?(?:\s*\(\s*[^()\s]+\s*\))*'
+_REFERENCE_PREFIX = r'(?:\bsections?\b\.?|\bsecs?\b\.?|\bs\.|\bu/s\.?)'
+# A reference at the start, after a section prefix, or after a list separator
+# ("8(c), 20(b)", "u/s 8(c) r/w 20(b)(ii)(B) and 29", "Section 21 read with Section 29")
+_REFERENCES = re.compile(
+    rf'(?:^|,|/|&|\band\b|\bor\b|\br/w\b|\bread\s+with\b|{_REFERENCE_PREFIX})\s*(?:{_REFERENCE_PREFIX}\s*)?({_REFERENCE})',
+    re.IGNORECASE,
+)
+
+
+def _parse_section(section_number: str) -> Tuple[str, Tuple[str, ...]] | None:
+    """Split "Section 20 (b)(ii)(B)" into ("20", ("b", "ii", "B")); None if there is no number."""
+    text = _PREFIX.sub('', section_number or '').strip()
+    match = _NUMBER.match(text)
+    if not match:
+        return None
+    # Several sections in one string ("8(c), 20(b)") have no single key
+    if len(_REFERENCES.findall(text)) > 1:
+        return None
+    # Clauses are the parenthesised groups directly after the number ("of NDPS Act" etc. is dropped);
+    # "(b-ii)" is the same clause path as "(b)(ii)"
+    groups = _CLAUSES.match(text[match.end():]).group(0)
+    clauses = tuple(part for clause in _CLAUSE.findall(groups) for part in clause.split('-') if part)
+    number = match.group(1) + (match.group(2) or match.group(3) or '')
+    return number.upper(), clauses
+
+
+def canonical_section_number(section_number: str) -> str:
+    """
+    Canonical display form of a section number.
+
+    Args:
+        section_number: Section number as written by the LLM
+
+    Returns:
+        "Section <number> (<clause>)(<clause>)...", or the input with whitespace
+        collapsed if no single section number can be read from it (several
+        sections in one string are left as written, see section_references)
+    """
+    parsed = _parse_section(section_number)
+    if parsed is None:
+        return re.sub(r'\s+', ' ', section_number or '').strip()
+    number, clauses = parsed
+    return f"Section {number}" + (" " + "".join(f"({clause})" for clause in clauses) if clauses else "")
+
+
+def section_references(text: str) -> List[str]:
+    """
+    Every section referenced in a string, in canonical form.
+
+    Args:
+        text: Section list as written in an FIR or by the LLM, e.g.
+            "u/s 8(c) r/w 20(b)(ii)(B), 29 NDPS Act"
+
+    Returns:
+        Distinct canonical section numbers in order of appearance, e.g.
+        ["Section 8 (c)", "Section 20 (b)(ii)(B)", "Section 29"]
+    """
+    references = []
+    for reference in _REFERENCES.findall(re.sub(r'\s+', ' ', text or '')):
+        canonical = canonical_section_number(reference)
+        if canonical not in references:
+            references.append(canonical)
+    return references
+
+
+def _section_key(section_number: str) -> tuple:
+    parsed = _parse_section(section_number)
+    if parsed is None:
+        return ('', re.sub(r'\s+', ' ', section_number or '').strip().lower())
+    return parsed
+
+
+def _retrieval_scores(results: List[dict]) -> Dict[tuple, float]:
+    """Best score per retrieved section, keyed both with and without its subsection."""
+    scores = {}
+    for result in results:
+        chunk = result['chunk']
+        section = chunk.get('section')
+        if not section:
+            continue
+        subsection = chunk.get('subsection')
+        for key in {_section_key(section), _section_key(f"{section} {subsection}" if subsection else section)}:
+            scores[key] = max(scores.get(key, 0.0), result['score'])
+    return scores
+
+
+def _distinct(texts: List[str]) -> List[str]:
+    seen = set()
+    distinct = []
+    for text in texts:
+        normalised = re.sub(r'\s+', ' ', text or '').strip()
+        if normalised and normalised.lower() not in seen:
+            seen.add(normalised.lower())
+            distinct.append(normalised)
+    return distinct
+
+
+def merge_mapped_sections(sections_per_point: List[list], results_per_point: List[List[dict]]) -> List[dict]:
+    """
+    Merge the per-point section mappings of one act into a deduplicated, ranked list.
+
+    Args:
+        sections_per_point: Mapped sections (pydantic models or dicts) for each point
+        results_per_point: Retrieval results the mapping for each point was based on
+
+    Returns:
+        List of section dicts with section_number, section_description,
+        why_section_is_relevant and source, best supported first
+    """
+    merged = {}
+    for point_index, (sections, results) in enumerate(zip(sections_per_point, results_per_point)):
+        scores = _retrieval_scores(results)
+        for section in sections:
+            section = section.model_dump() if hasattr(section, 'model_dump') else dict(section)
+            key = _section_key(section.get('section_number', ''))
+            score = scores.get(key, scores.get((key[0], ()), 0.0))
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = {
+                    "section": {**section, "section_number": canonical_section_number(section.get('section_number', ''))},
+                    "points": set(),
+                    "score": score,
+                    "reasons": [],
+                    "sources": [],
+                    "order": len(merged),
+                }
+            elif score > entry["score"]:
+                entry["score"] = score
+                entry["section"]["section_description"] = section.get('section_description', '')
+            entry["points"].add(point_index)
+            entry["reasons"].append(section.get('why_section_is_relevant', ''))
+            entry["sources"].append(section.get('source', ''))
+
+    ranked = sorted(merged.values(), key=lambda entry: (-len(entry["points"]), -entry["score"], entry["order"]))
+    final_sections = []
+    for entry in ranked:
+        section = entry["section"]
+        section["why_section_is_relevant"] = " ".join(_distinct(entry["reasons"]))
+        section["source"] = "; ".join(_distinct(entry["sources"]))
+        final_sections.append(section)
+    return final_sections
@@ -0,0 +1,272 @@
+"""
+In-process instrumentation for the workflow graph.
+
+Records wall time per graph node, per LLM call (with prompt, cached prompt and
+completion tokens and cost), per embedding call and per FAISS search. Every measurement is
+tagged with the current workflow_id and node, which are carried in context
+variables set by timed_node, so calls made anywhere inside a node (including
+concurrent tasks and worker threads) are attributed to it.
+
+Two views are kept:
+
+- Prometheus counters and histograms labelled by node (and model/corpus),
+  rendered by render_prometheus() for the /metrics endpoint. workflow_id is
+  deliberately not a Prometheus label to keep series cardinality bounded.
+- A per-workflow breakdown (workflow_breakdown) returned with the results.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Per-workflow breakdowns kept in memory (oldest dropped first)
+MAX_TRACKED_WORKFLOWS = 1000
+
+# Histogram buckets in seconds, from a FAISS lookup to a long LLM call
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_current_workflow = contextvars.ContextVar("metrics_workflow_id", default=None)
+_current_node = contextvars.ContextVar("metrics_node", default=None)
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _empty_node_stats() -> dict:
+    return {
+        "calls": 0,
+        "wall_time_seconds": 0.0,
+        "llm_calls": 0,
+        "llm_time_seconds": 0.0,
+        "prompt_tokens": 0,
+        "cached_prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost_usd": 0.0,
+        "embedding_calls": 0,
+        "embedding_time_seconds": 0.0,
+        "faiss_searches": 0,
+        "faiss_time_seconds": 0.0,
+        "retrieval_memo_hits": 0,
+    }
+
+
+class MetricsRegistry:
+    """Thread-safe store for counters, histograms and per-workflow breakdowns."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = defaultdict(_Histogram)
+        self._help = {}
+        self._workflows = OrderedDict()
+        self._collectors = []
+
+    def register_collector(self, collector):
+        """
+        Register a callable yielding (name, kind, labels, value, help) tuples,
+        evaluated on every render, for values owned by other components
+        (e.g. connection pool gauges).
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def _describe(self, name: str, kind: str, help_text: str):
+        self._help.setdefault(name, (kind, help_text))
+
+    def inc(self, name: str, labels: dict, value: float = 1, help_text: str = ""):
+        with self._lock:
+            self._describe(name, "counter", help_text)
+            self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name: str, labels: dict, value: float, help_text: str = ""):
+        with self._lock:
+            self._describe(name, "histogram", help_text)
+            self._histograms[(name, tuple(sorted(labels.items())))].observe(value)
+
+    def add_to_workflow(self, **fields):
+        """Add values to the current workflow/node breakdown (no-op outside a workflow)."""
+        workflow_id = _current_workflow.get()
+        if workflow_id is None:
+            return
+        node = _current_node.get() or "unknown"
+        with self._lock:
+            nodes = self._workflows.get(workflow_id)
+            if nodes is None:
+                nodes = self._workflows[workflow_id] = {}
+                while len(self._workflows) > MAX_TRACKED_WORKFLOWS:
+                    self._workflows.popitem(last=False)
+            stats = nodes.setdefault(node, _empty_node_stats())
+            for key, value in fields.items():
+                stats[key] += value
+
+    def workflow_breakdown(self, workflow_id: str) -> dict:
+        with self._lock:
+            nodes = {node: dict(stats) for node, stats in self._workflows.get(workflow_id, {}).items()}
+        totals = _empty_node_stats()
+        for stats in nodes.values():
+            for key, value in stats.items():
+                totals[key] += value
+        for stats in [*nodes.values(), totals]:
+            stats["cached_token_share"] = _cached_share(stats)
+        return {"nodes": nodes, "totals": totals}
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+            help_entries = dict(self._help)
+            collectors = list(self._collectors)
+
+        collected = {}
+        for collector in collectors:
+            try:
+                for name, kind, labels, value, help_text in collector():
+                    help_entries.setdefault(name, (kind, help_text))
+                    collected[(name, tuple(sorted(labels.items())))] = value
+            except Exception as e:
+                logger.warning(f"Metrics collector {collector} failed: {e}")
+
+        lines = []
+        for name in sorted(help_entries):
+            kind, help_text = help_entries[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind in ("counter", "gauge"):
+                for (metric, labels), value in sorted({**counters, **collected}.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+            else:
+                for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, bucket_count in zip(_BUCKETS, counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _cached_share(stats: dict) -> float:
+    """Fraction of prompt tokens served from the provider's prompt cache."""
+    if not stats["prompt_tokens"]:
+        return 0.0
+    return round(stats["cached_prompt_tokens"] / stats["prompt_tokens"], 4)
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+registry = MetricsRegistry()
+
+
+def current_node_label() -> str:
+    """Name of the graph node running in this context, or "none" outside a node."""
+    return _current_node.get() or "none"
+
+
+def current_workflow_id() -> str | None:
+    """workflow_id of the graph node running in this context, if any."""
+    return _current_workflow.get()
+
+
+def timed_node(name: str, func, is_async: bool = False):
+    """
+    Wrap a graph node so its wall time is recorded and everything it calls is
+    tagged with the node name and the run's workflow_id (the thread_id from
+    the graph config).
+    """
+    def _enter(config):
+        workflow_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        return _current_workflow.set(workflow_id), _current_node.set(name)
+
+    def _exit(tokens, elapsed):
+        registry.observe("fir_node_duration_seconds", {"node": name}, elapsed,
+                         "Wall time of each graph node run")
+        registry.add_to_workflow(calls=1, wall_time_seconds=elapsed)
+        _current_node.reset(tokens[1])
+        _current_workflow.reset(tokens[0])
+
+    # No functools.wraps: RunnableLambda inspects the signature for `config`
+    if is_async:
+        async def async_wrapper(state, config=None):
+            tokens = _enter(config)
+            start = time.perf_counter()
+            try:
+                return await func(state)
+            finally:
+                _exit(tokens, time.perf_counter() - start)
+        return async_wrapper
+
+    def wrapper(state, config=None):
+        tokens = _enter(config)
+        start = time.perf_counter()
+        try:
+            return func(state)
+        finally:
+            _exit(tokens, time.perf_counter() - start)
+    return wrapper
+
+
+def record_llm_call(model: str, elapsed: float, prompt_tokens: int, completion_tokens: int,
+                    cost_usd: float, error: bool = False, cached_tokens: int = 0):
+    labels = {"model": model, "node": current_node_label()}
+    registry.observe("fir_llm_call_duration_seconds", labels, elapsed, "Wall time of LLM calls")
+    registry.inc("fir_llm_calls_total", labels, 1, "LLM calls made")
+    if error:
+        registry.inc("fir_llm_errors_total", labels, 1, "LLM calls that raised an error")
+    registry.inc("fir_llm_tokens_total", {**labels, "type": "prompt"}, prompt_tokens, "LLM tokens used")
+    registry.inc("fir_llm_tokens_total", {**labels, "type": "cached"}, cached_tokens, "LLM tokens used")
+    registry.inc("fir_llm_tokens_total", {**labels, "type": "completion"}, completion_tokens, "LLM tokens used")
+    registry.inc("fir_llm_cost_usd_total", labels, cost_usd, "Estimated LLM spend in USD")
+    registry.add_to_workflow(llm_calls=1, llm_time_seconds=elapsed, prompt_tokens=prompt_tokens,
+                             cached_prompt_tokens=cached_tokens, completion_tokens=completion_tokens,
+                             cost_usd=cost_usd)
+
+
+def record_embedding_call(model: str, elapsed: float, texts: int, tokens: int, cost_usd: float):
+    labels = {"model": model, "node": current_node_label()}
+    registry.observe("fir_embedding_call_duration_seconds", labels, elapsed, "Wall time of embedding calls")
+    registry.inc("fir_embedding_calls_total", labels, 1, "Embedding calls made")
+    registry.inc("fir_embedding_texts_total", labels, texts, "Texts embedded")
+    registry.inc("fir_embedding_tokens_total", labels, tokens, "Estimated embedding tokens")
+    registry.inc("fir_embedding_cost_usd_total", labels, cost_usd, "Estimated embedding spend in USD")
+    registry.add_to_workflow(embedding_calls=1, embedding_time_seconds=elapsed, cost_usd=cost_usd)
+
+
+def record_faiss_search(corpus: str, elapsed: float):
+    labels = {"corpus": corpus, "node": current_node_label()}
+    registry.observe("fir_faiss_search_duration_seconds", labels, elapsed, "Wall time of FAISS searches")
+    registry.inc("fir_faiss_searches_total", labels, 1, "FAISS searches made")
+    registry.add_to_workflow(faiss_searches=1, faiss_time_seconds=elapsed)
+
+
+def workflow_breakdown(workflow_id: str) -> dict:
+    """Per-node timing, token and cost breakdown for one workflow."""
+    return registry.workflow_breakdown(workflow_id)
+
+
+def render_prometheus() -> str:
+    return registry.render_prometheus()
@@ -1,24 +1,275 @@
+import asyncio
+import atexit
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Tuple
+
 import fitz  # pip install pymupdf
 
+from app.utils.limits import (
+    DocumentLimitExceeded,
+    MAX_PAGE_EXTRACT_SECONDS,
+    check_extracted_chars,
+    check_page_count,
+    check_page_time,
+)
 
-def read_pdf(state: dict) -> dict:
+# Worker processes for page extraction (0 extracts in the calling thread)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Documents shorter than this are extracted inline; process start-up and
+# pickling the bytes would cost more than they save
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+
+# Pages per task sent to a worker; small enough to stream, large enough to amortise re-opening
+PAGES_PER_TASK = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# (pid, start time) reported by workers as they pick up each task, keyed by task id;
+# only kept for tasks an upload may still wait on
+_task_events = None
+_task_started = {}
+_tracked_tasks = set()
+_task_ids = itertools.count()
+
+# How often a waiting upload checks whether its running task is over time
+_TASK_POLL_SECONDS = 0.25
+
+
+def _init_worker(events):
+    global _task_events
+    _task_events = events
+
+
+def _run_task(task_id: int, func, *args):
+    """Report this worker's pid and the start time, then run `func`. Runs in a worker process."""
+    _task_events.put((task_id, os.getpid(), time.time()))
+    return func(*args)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _task_events
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs threads (uvicorn, LangGraph) is unsafe
+            context = multiprocessing.get_context("spawn")
+            if _task_events is None:
+                _task_events = context.SimpleQueue()
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACT_WORKERS,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(_task_events,),
+            )
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(func, *args) -> Tuple[ProcessPoolExecutor, Future, int]:
+    """Run func(*args) in the extraction pool; returns the pool, the future and the task id."""
+    pool = _get_pool()
+    task_id = next(_task_ids)
+    with _pool_lock:
+        _tracked_tasks.add(task_id)
+    return pool, pool.submit(_run_task, task_id, func, *args), task_id
+
+
+def _task_start(task_id: int) -> Tuple[int, float] | None:
+    """(pid, start time) of a task once a worker has picked it up."""
+    with _pool_lock:
+        while not _task_events.empty():
+            event_id, pid, started = _task_events.get()
+            if event_id in _tracked_tasks:
+                _task_started[event_id] = (pid, started)
+        return _task_started.get(task_id)
+
+
+def _forget_task(task_id: int):
+    with _pool_lock:
+        _tracked_tasks.discard(task_id)
+        _task_started.pop(task_id, None)
+
+
+def _wait(pool: ProcessPoolExecutor, future: Future, task_id: int, timeout: float | None):
     """
-    Read PDF from state (pdf_bytes or pdf_path) and return {"pdf_content": text}.
-    No files are written to disk.
+    Result of a task submitted with _submit, allowing it `timeout` seconds of execution.
+
+    Time spent queued behind other uploads' tasks does not count. A task over
+    its time is hung inside PyMuPDF, which cannot be interrupted, so its
+    worker is killed; the executor then marks the pool broken and terminates
+    its other workers, and the pool is replaced. Ranges other uploads had on
+    it fail (BrokenProcessPool, or cancelled if not yet started) and are
+    resubmitted by iter_pdf_pages.
+
+    Raises:
+        TimeoutError: The task ran longer than `timeout`
     """
-    print("Reading PDF...")
+    try:
+        while True:
+            try:
+                return future.result(timeout=_TASK_POLL_SECONDS if timeout else None)
+            except TimeoutError:
+                started = _task_start(task_id)
+                if started is None or time.time() - started[1] <= timeout:
+                    continue
+                _recycle_pool(pool, started[0])
+                raise
+    finally:
+        _forget_task(task_id)
+
+
+def _recycle_pool(pool: ProcessPoolExecutor, pid: int):
+    """Kill the worker `pid` of `pool` and stop handing new extractions to the pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page(page, page_number: int) -> str:
+    """
+    Extract one page, checking the per-page extraction time limit once it returns.
+
+    A page that never returns is only stopped in worker processes (see
+    iter_pdf_pages); inline extraction cannot interrupt it.
+    """
+    start = time.perf_counter()
+    text = page.get_text()
+    check_page_time(page_number, time.perf_counter() - start)
+    return text
+
+
+def _extract_pages(pdf_bytes: bytes, start: int, end: int) -> List[str]:
+    """Extract text of pages [start, end). Runs in a worker process, which opens its own copy of the document."""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [_extract_page(doc[i], i) for i in range(start, end)]
+    finally:
+        doc.close()
+
+
+def _load_pdf_bytes(state: dict) -> bytes:
     pdf_bytes = state.get("pdf_bytes")
     pdf_path = state.get("pdf_path")
 
     if pdf_bytes is not None:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    elif pdf_path:
-        doc = fitz.open(pdf_path)
-    else:
-        raise ValueError("Either pdf_bytes or pdf_path is required in state.")
-
-    text = [page.get_text() for page in doc]
-    doc.close()
+        return pdf_bytes
+    if pdf_path:
+        with open(pdf_path, "rb") as f:
+            return f.read()
+    raise ValueError("Either pdf_bytes or pdf_path is required in state.")
+
+
+def open_pdf(pdf_bytes: bytes):
+    """Open a PDF from bytes, rejecting data PyMuPDF cannot parse."""
+    try:
+        return fitz.open(stream=pdf_bytes, filetype="pdf")
+    except Exception as e:
+        raise DocumentLimitExceeded(f"Invalid or corrupted PDF: {str(e)}")
+
+
+def pdf_page_count(pdf_bytes: bytes) -> int:
+    doc = open_pdf(pdf_bytes)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def iter_pdf_pages(pdf_bytes: bytes) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) in page order as pages are extracted.
+
+    Long documents are split into page ranges extracted in parallel by a
+    process pool; pages are yielded as soon as every earlier page is done,
+    so consumers (e.g. translation) can start before extraction finishes.
+
+    Raises DocumentLimitExceeded as soon as the page count, the running total
+    of extracted characters or a page's extraction time exceeds its limit.
+    """
+    page_count = pdf_page_count(pdf_bytes)
+    check_page_count(page_count)
+    chars = 0
+
+    if PDF_EXTRACT_WORKERS <= 0 or page_count < PARALLEL_MIN_PAGES:
+        doc = open_pdf(pdf_bytes)
+        try:
+            for i, page in enumerate(doc):
+                text = _extract_page(page, i)
+                chars += len(text)
+                check_extracted_chars(chars)
+                yield i, text
+        finally:
+            doc.close()
+        return
+
+    ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+
+    def submit(page_range: Tuple[int, int]):
+        return _submit(_extract_pages, pdf_bytes, *page_range)
+
+    tasks = [submit(page_range) for page_range in ranges]
+    # Bound each task's execution too, in case a page hangs in the worker
+    task_timeout = MAX_PAGE_EXTRACT_SECONDS * PAGES_PER_TASK if MAX_PAGE_EXTRACT_SECONDS else None
+    try:
+        for index, (start, end) in enumerate(ranges):
+            try:
+                try:
+                    texts = _wait(*tasks[index], task_timeout)
+                except (BrokenProcessPool, CancelledError):
+                    # The pool was recycled for another document's hung page; extract this range again
+                    tasks[index] = submit((start, end))
+                    texts = _wait(*tasks[index], task_timeout)
+            except TimeoutError:
+                raise DocumentLimitExceeded(f"Extracting pages {start + 1}-{end} exceeded the time limit")
+            for page_number, text in enumerate(texts, start=start):
+                chars += len(text)
+                check_extracted_chars(chars)
+                yield page_number, text
+    finally:
+        # Stop pending work if the consumer gives up early
+        for _, future, task_id in tasks:
+            future.cancel()
+            _forget_task(task_id)
+
+
+def read_pdf(state: dict) -> dict:
+    """
+    Read PDF from state (pdf_bytes or pdf_path) and return {"pdf_content": text,
+    "pdf_pages": per-page text}. No files are written to disk.
+    """
+    print("Reading PDF...")
+    pdf_bytes = _load_pdf_bytes(state)
+
+    text = [page_text for _, page_text in iter_pdf_pages(pdf_bytes)]
     final_text = "\n".join(text)
     print("PDF read successfully.")
-    return {"pdf_content": final_text}
+    return {"pdf_content": final_text, "pdf_pages": text}
+
+
+async def aread_pdf(state: dict) -> dict:
+    """
+    Async variant of read_pdf. PyMuPDF is CPU-bound and synchronous, so the
+    extraction runs in a worker thread to keep the event loop free.
+    """
+    return await asyncio.to_thread(read_pdf, state)
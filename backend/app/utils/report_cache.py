@@ -0,0 +1,148 @@
+"""
+Generated report documents, cached per workflow.
+
+A report only changes when the workflow gains sections (each upload with new
+sections stores a new result), yet every download used to rebuild the whole
+.docx. The bytes are cached per workflow under a fingerprint of everything
+the report renders - the section outputs, the first-page placeholders and the
+loaded template - which doubles as the download's ETag:
+
+- same fingerprint: the cached bytes are served, or 304 if the client has them
+- new fingerprint (sections added): the report is generated again and replaces
+  the workflow's previous entry
+
+Reports for the most recent REPORT_CACHE_MAX_WORKFLOWS workflows are kept.
+The template is parsed once per process (see document_generator); its hash
+is part of the fingerprint, so after a template edit and restart clients
+holding the old report get the new one instead of 304.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+from app.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Workflows whose generated report is kept in memory (least recently used dropped first)
+REPORT_CACHE_MAX_WORKFLOWS = int(os.getenv("REPORT_CACHE_MAX_WORKFLOWS", "32"))
+
+# Workflow state rendered into the report (see format_state_for_display / format_section_content)
+REPORT_FIELDS = (
+    "report_placeholders",
+    "fir_facts",
+    "ndps_sections_mapped",
+    "bns_sections_mapped",
+    "bnss_sections_mapped",
+    "bsa_sections_mapped",
+    "forensic_guidelines_mapped",
+    "next_steps",
+    "investigation_plan",
+    "evidence_checklist",
+    "dos",
+    "donts",
+    "potential_prosecution_weaknesses",
+    "historical_cases",
+    "investigation_and_legal_timeline",
+    "defence_perspective_rebuttal",
+    "summary_for_the_court",
+    "chargesheet",
+)
+
+
+def _json_default(value):
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    return str(value)
+
+
+def report_fingerprint(workflow_state: Dict[str, Any], template_version: str = "") -> str:
+    """
+    Hash of the workflow outputs included in the report and the template it is rendered with.
+
+    Args:
+        workflow_state: Stored workflow result
+        template_version: report_template_version() of the template in use
+
+    Returns:
+        Hex digest, used as the cache key and ETag
+    """
+    digest = hashlib.sha256(template_version.encode())
+    for field in REPORT_FIELDS:
+        value = workflow_state.get(field)
+        if value is None:
+            continue
+        digest.update(field.encode())
+        digest.update(json.dumps(value, sort_keys=True, ensure_ascii=False, default=_json_default).encode())
+    return digest.hexdigest()
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header value matches `etag` (weak comparison, "*" matches any)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ReportCache:
+    """Latest generated report per workflow, with the fingerprint it was generated for."""
+
+    def __init__(self, max_workflows: int = REPORT_CACHE_MAX_WORKFLOWS):
+        self.max_workflows = max_workflows
+        self._reports: OrderedDict[str, Tuple[str, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, workflow_id: str, fingerprint: str) -> bytes | None:
+        """Cached report bytes if they were generated for `fingerprint`, else None."""
+        with self._lock:
+            entry = self._reports.get(workflow_id)
+            if entry is None or entry[0] != fingerprint:
+                return None
+            self._reports.move_to_end(workflow_id)
+            return entry[1]
+
+    def put(self, workflow_id: str, fingerprint: str, document_bytes: bytes):
+        if self.max_workflows <= 0:
+            return
+        with self._lock:
+            self._reports[workflow_id] = (fingerprint, document_bytes)
+            self._reports.move_to_end(workflow_id)
+            while len(self._reports) > self.max_workflows:
+                self._reports.popitem(last=False)
+
+    def get_or_generate(self, workflow_id: str, fingerprint: str, generate: Callable[[], bytes]) -> bytes:
+        """
+        Cached report for `fingerprint`, or generate it and replace the workflow's entry.
+
+        Args:
+            workflow_id: Workflow the report belongs to
+            fingerprint: report_fingerprint of the workflow state
+            generate: Builds the document bytes on a miss
+
+        Returns:
+            Document bytes
+        """
+        document_bytes = self.get(workflow_id, fingerprint)
+        hit = document_bytes is not None
+        registry.inc("fir_report_cache_lookups_total", {"result": "hit" if hit else "miss"}, 1,
+                     "Document downloads looked up in the generated report cache")
+        if not hit:
+            document_bytes = generate()
+            self.put(workflow_id, fingerprint, document_bytes)
+            logger.info(f"Generated report for workflow {workflow_id} ({len(document_bytes)} bytes)")
+        return document_bytes
+
+
+report_cache = ReportCache()
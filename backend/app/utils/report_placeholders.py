@@ -0,0 +1,156 @@
+"""
+Values for the placeholders on the first page of the report.
+
+Report.docx has {{name_of_accused}}, {{case_title}}, {{fir_date}} and
+{{sections_invoked}} placeholders. Everything they need is already in the
+workflow state once the graph has run, so build_report_placeholders derives
+them locally:
+
+- case_title: summary_for_the_court / chargesheet case title, else built from the accused
+- name_of_accused: the party after "vs." in the case title, else fir_facts identity_of_accused
+- fir_date: the FIR registration date ("Date of FIR", "FIR No. ... dated",
+  "registered on") from the FIR text or facts, else the incident date from
+  fir_facts date_time_location or the summary / chargesheet date_and_place
+- sections_invoked: every NDPS section from the chargesheet, court summary or
+  NDPS mapping, else every section named in fir_facts offences_charged
+
+The upload route stores the result with the workflow, so generating the
+document makes no LLM call.
+"""
+import re
+from typing import Any, Dict, List
+
+from app.utils.mapped_sections import section_references
+
+# Used when the workflow has no court summary or chargesheet to take the state from
+DEFAULT_STATE_NAME = "GUJARAT"
+
+_DATE = re.compile(r'\b(\d{1,2})\s*[./-]\s*(\d{1,2})\s*[./-]\s*(\d{4}|\d{2})\b')
+_FIR = r'f\.?\s*i\.?\s*r\.?'
+# A date labelled as the FIR's registration date, e.g. "Date and Time of FIR: 12/03/2024",
+# "FIR No. 11208/2024 dated 12.03.2024", "registered on 12-03-2024"
+_FIR_DATE = re.compile(
+    rf'(?:date\s*(?:(?:and|&)\s*time\s*)?of\s*(?:the\s*)?(?:{_FIR}|registration)'
+    rf'|{_FIR}\s*(?:date|(?:no\.?|number)[^\n]{{0,40}}?dated)'
+    rf'|registered\s+on|registration\s+date)'
+    rf'[^\d\n]{{0,30}}({_DATE.pattern})',
+    re.IGNORECASE,
+)
+_VERSUS = re.compile(r'\s+(?:vs\.?|v/s\.?|v\.|versus)\s+', re.IGNORECASE)
+_BOLD = re.compile(r'\*\*(.+?)\*\*')
+_NAME_PREFIX = re.compile(r'^(?:name\s*[:\-]|accused\s*[:\-]|the accused\s+(?:is\s+)?)\s*', re.IGNORECASE)
+
+
+def _as_dict(value) -> dict:
+    if value is None:
+        return {}
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    return value if isinstance(value, dict) else {}
+
+
+def _plain(text: str) -> str:
+    """Drop markdown bold markers and collapse whitespace."""
+    return re.sub(r'\s+', ' ', (text or '').replace('**', '')).strip()
+
+
+def _format_date(day: str, month: str, year: str) -> str:
+    if len(year) == 2:
+        year = f"20{year}"
+    return f"{int(day):02d}.{int(month):02d}.{year}"
+
+
+def _first_date(text: str) -> str | None:
+    match = _DATE.search(_plain(text))
+    return _format_date(*match.groups()) if match else None
+
+
+def _fir_date(text: str) -> str | None:
+    """Date labelled as the FIR registration date in `text`, if any."""
+    match = _FIR_DATE.search((text or '').replace('**', ''))
+    return _format_date(*match.groups()[1:]) if match else None
+
+
+def _accused_from_title(case_title: str) -> str | None:
+    parts = _VERSUS.split(case_title, maxsplit=1)
+    if len(parts) != 2:
+        return None
+    # Qualifiers like "(JUVENILE)" belong to the title, not the name
+    name = re.sub(r'\([^)]*\)', '', parts[1]).strip(' ,.&')
+    return name or None
+
+
+def _accused_from_identity(identity: str) -> str | None:
+    if not identity:
+        return None
+    # Fact extraction bolds names, so the first bold span is usually the accused
+    bold = _BOLD.search(identity)
+    candidate = bold.group(1) if bold else identity.split(',')[0]
+    name = _NAME_PREFIX.sub('', _plain(candidate)).strip(' ,.')
+    return name or None
+
+
+def _all_references(items) -> List[str]:
+    """Every section referenced by the items, each item possibly naming several."""
+    references = []
+    for item in items:
+        for reference in section_references(str(item or '')):
+            if reference not in references:
+                references.append(reference)
+    return references
+
+
+def _sections_invoked(state: Dict[str, Any], chargesheet: dict, summary: dict) -> List[str]:
+    for listed in (chargesheet.get("ndps_sections"), summary.get("ndps_sections")):
+        sections = _all_references(listed or [])
+        if sections:
+            return sections
+    mapped = state.get("ndps_sections_mapped")
+    if isinstance(mapped, list):
+        sections = _all_references(_as_dict(section).get("section_number", "") for section in mapped)
+        if sections:
+            return sections
+    return section_references(_plain((state.get("fir_facts") or {}).get("offences_charged", "")))
+
+
+def build_report_placeholders(state: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Placeholder values for the report, derived from the workflow state without any LLM call.
+
+    Args:
+        state: Workflow state (graph result) with fir_facts and any generated sections
+
+    Returns:
+        Dictionary with name_of_accused, case_title, fir_date and sections_invoked
+    """
+    fir_facts = state.get("fir_facts") or {}
+    summary = _as_dict(state.get("summary_for_the_court"))
+    chargesheet = _as_dict(state.get("chargesheet"))
+
+    case_title = _plain(summary.get("case_title") or chargesheet.get("case_title") or "")
+    name_of_accused = (
+        (_accused_from_title(case_title) if case_title else None)
+        or _accused_from_identity(fir_facts.get("identity_of_accused", ""))
+        or "Unknown"
+    )
+    if not case_title:
+        case_title = f"STATE OF {DEFAULT_STATE_NAME} vs. {name_of_accused}"
+
+    fir_date = (
+        _fir_date(state.get("pdf_content_in_english") or "")
+        or next(filter(None, (_fir_date(str(value)) for value in fir_facts.values())), None)
+        or _first_date(fir_facts.get("date_time_location", ""))
+        or _first_date(summary.get("date_and_place", ""))
+        or _first_date(chargesheet.get("date_and_place", ""))
+        or "Not specified"
+    )
+
+    sections = _sections_invoked(state, chargesheet, summary)
+
+    return {
+        "name_of_accused": name_of_accused,
+        "case_title": case_title,
+        "fir_date": fir_date,
+        # "Section 8(c), Section 20(b)(ii)(B), Section 29"
+        "sections_invoked": ", ".join(section.replace(" (", "(") for section in sections) if sections else "NDPS Act sections",
+    }
@@ -1,47 +1,350 @@
 """
 Utility module for retry decorators with exponential backoff.
+
+The decorators form a single resilience layer around provider calls:
+
+- Only transient errors (rate limits, timeouts, connection and 5xx errors) are
+  retried; validation and other client errors fail immediately.
+- A per-run deadline (run_deadline) caps every backoff wait by the time left
+  and stops retrying once the run is out of time.
+- A process-wide RetryBudget bounds retries to a fraction of total calls, so an
+  outage does not multiply load on the provider.
+- A CircuitBreaker fails fast while the provider is down and lets a single
+  probe through after a cool-down.
 """
+import asyncio
+import contextvars
 import time
 import random
 import logging
+import threading
+from contextlib import contextmanager
 from functools import wraps
 
+import httpx
+import openai
+import requests
+
 logger = logging.getLogger(__name__)
 
 
-def exponential_backoff_retry(max_retries=5, max_wait=60):
+class DeadlineExceeded(Exception):
+    """Raised when the run deadline has passed before a call could be attempted."""
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+# Exceptions that indicate a transient provider or network problem
+_RETRYABLE_EXCEPTIONS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    httpx.TimeoutException,
+    httpx.TransportError,
+    requests.ConnectionError,
+    requests.Timeout,
+    TimeoutError,
+    asyncio.TimeoutError,
+)
+
+_RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Classify an exception as transient (worth retrying) or permanent.
+
+    Validation errors, bad requests, auth errors and programming errors will
+    fail the same way on every attempt, so they are not retried.
+    """
+    if isinstance(exc, (DeadlineExceeded, CircuitOpenError)):
+        return False
+    if isinstance(exc, _RETRYABLE_EXCEPTIONS):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in _RETRYABLE_STATUS_CODES
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in _RETRYABLE_STATUS_CODES
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _RETRYABLE_STATUS_CODES
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Deadline propagation
+# ---------------------------------------------------------------------------
+
+_deadline = contextvars.ContextVar("run_deadline", default=None)
+
+
+@contextmanager
+def run_deadline(seconds: float | None):
+    """
+    Set a deadline for everything run inside the block, including graph nodes
+    started from it (context variables propagate into tasks and worker threads).
+    """
+    token = _deadline.set(time.monotonic() + seconds if seconds else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> float | None:
+    """Seconds left before the current run's deadline, or None if there is no deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+# ---------------------------------------------------------------------------
+# Retry budget
+# ---------------------------------------------------------------------------
+
+class RetryBudget:
+    """
+    Shared budget limiting retries to a fraction of calls.
+
+    Every call deposits `ratio` tokens and every retry spends one. A small
+    time-based reserve (`min_per_second`) keeps retries possible at low traffic.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 0.5, max_tokens: float = 50):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def record_call(self):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` transient failures in a row the circuit opens and
+    calls fail fast with CircuitOpenError for `reset_timeout` seconds. Then one
+    probe call is let through: success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError if calls must fail fast.
+
+        Returns:
+            True if this call is the half-open probe; the caller must then
+            record its outcome or call release_probe
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"{self.name} circuit is open; failing fast")
+                # Let exactly one probe through
+                self.state = self.HALF_OPEN
+                return True
+            if self.state == self.HALF_OPEN:
+                raise CircuitOpenError(f"{self.name} circuit is half-open; probe in progress")
+            return False
+
+    def release_probe(self):
+        """Probe ended without an outcome (e.g. cancelled): re-open and wait for the next probe."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self, exc: BaseException):
+        with self._lock:
+            if not is_retryable(exc):
+                # Client-side errors say nothing about provider health
+                if self.state == self.HALF_OPEN:
+                    self.state = self.CLOSED
+                return
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(f"{self.name} circuit opened after {self._failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+openai_circuit_breaker = CircuitBreaker("openai")
+retry_budget = RetryBudget()
+
+
+def _backoff_wait(attempt, max_wait, base_wait=1):
+    """Exponential backoff with 0-10% jitter, capped at max_wait."""
+    wait_time = min(base_wait * (2 ** attempt), max_wait)
+    # Add jitter (random 0-10% to avoid thundering herd)
+    return wait_time * (1 + random.uniform(0, 0.1))
+
+
+def _check_deadline():
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Run deadline exceeded before the call could be made")
+
+
+def _next_wait(e, attempt, max_retries, max_wait, budget):
+    """
+    Decide whether to retry after exception `e`.
+
+    Returns the wait in seconds, or None if the exception should be re-raised.
+    """
+    if not is_retryable(e):
+        logger.error(f"Non-retryable error: {type(e).__name__}: {str(e)}")
+        return None
+    if attempt >= max_retries:
+        logger.error(f"Failed after {max_retries + 1} attempts: {str(e)}")
+        return None
+    wait_time = _backoff_wait(attempt, max_wait)
+    remaining = remaining_time()
+    if remaining is not None:
+        # Leave time for the retried call itself; give up if there is none
+        wait_time = min(wait_time, remaining / 2)
+        if remaining - wait_time <= 1:
+            logger.error(f"Not retrying, run deadline is {remaining:.1f}s away: {str(e)}")
+            return None
+    if not budget.try_spend():
+        logger.error(f"Retry budget exhausted, not retrying: {str(e)}")
+        return None
+    return wait_time
+
+
+def exponential_backoff_retry(max_retries=5, max_wait=60, breaker=None, budget=None):
     """
     Decorator for exponential backoff retry on LLM calls.
-    
+
     Args:
         max_retries: Maximum number of retry attempts (5 means 1 initial + 5 retries = 6 total)
         max_wait: Maximum wait time in seconds (60 seconds = 1 minute)
+        breaker: CircuitBreaker guarding the provider (defaults to the OpenAI breaker)
+        budget: RetryBudget shared with other callers (defaults to the process-wide budget)
     """
+    breaker = breaker or openai_circuit_breaker
+    budget = budget or retry_budget
+
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
             attempt = 0
-            base_wait = 1  # Start with 1 second
-            
-            while attempt <= max_retries:
+
+            while True:
+                _check_deadline()
+                probe = breaker.before_call()
+                budget.record_call()
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
-                    if attempt >= max_retries:
-                        logger.error(f"Failed after {max_retries + 1} attempts: {str(e)}")
+                    breaker.record_failure(e)
+                    wait_time = _next_wait(e, attempt, max_retries, max_wait, budget)
+                    if wait_time is None:
                         raise
-                    
-                    # Calculate wait time: exponential backoff with jitter, capped at max_wait
-                    wait_time = min(base_wait * (2 ** attempt), max_wait)
-                    # Add jitter (random 0-10% to avoid thundering herd)
-                    wait_time = wait_time * (1 + random.uniform(0, 0.1))
-                    
+
                     attempt += 1
                     logger.warning(f"LLM call failed (attempt {attempt}/{max_retries + 1}), retrying in {wait_time:.1f}s...")
                     time.sleep(wait_time)
-            
-            # Should never reach here, but just in case
-            raise Exception(f"Failed after {max_retries + 1} attempts")
-        
+                except BaseException:
+                    # Cancelled or interrupted: no outcome, but the probe slot must not stay taken
+                    if probe:
+                        breaker.release_probe()
+                    raise
+                else:
+                    breaker.record_success()
+                    return result
+
+        return wrapper
+    return decorator
+
+
+def async_exponential_backoff_retry(max_retries=5, max_wait=60, breaker=None, budget=None):
+    """
+    Async counterpart of exponential_backoff_retry for coroutine functions.
+
+    Waits with asyncio.sleep so the event loop keeps serving other calls
+    while this one backs off.
+
+    Args:
+        max_retries: Maximum number of retry attempts (5 means 1 initial + 5 retries = 6 total)
+        max_wait: Maximum wait time in seconds (60 seconds = 1 minute)
+        breaker: CircuitBreaker guarding the provider (defaults to the OpenAI breaker)
+        budget: RetryBudget shared with other callers (defaults to the process-wide budget)
+    """
+    breaker = breaker or openai_circuit_breaker
+    budget = budget or retry_budget
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            attempt = 0
+
+            while True:
+                _check_deadline()
+                probe = breaker.before_call()
+                budget.record_call()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    breaker.record_failure(e)
+                    wait_time = _next_wait(e, attempt, max_retries, max_wait, budget)
+                    if wait_time is None:
+                        raise
+
+                    attempt += 1
+                    logger.warning(f"LLM call failed (attempt {attempt}/{max_retries + 1}), retrying in {wait_time:.1f}s...")
+                    await asyncio.sleep(wait_time)
+                except BaseException:
+                    # Cancelled or interrupted: no outcome, but the probe slot must not stay taken
+                    if probe:
+                        breaker.release_probe()
+                    raise
+                else:
+                    breaker.record_success()
+                    return result
+
         return wrapper
     return decorator
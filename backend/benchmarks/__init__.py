@@ -0,0 +1,11 @@
+"""
+Offline benchmark harness for the FIR analysis graph.
+
+Runs the full LangGraph workflow against deterministic stand-ins for the
+OpenAI chat/embedding models and the translator, so throughput and per-node
+latency can be measured without network access or API spend.
+
+Usage (from the backend directory):
+    python -m benchmarks.run --firs 20 --concurrency 4
+    python -m benchmarks.structured_output
+"""
@@ -0,0 +1,217 @@
+"""
+Deterministic fakes for the OpenAI chat model and embeddings.
+
+The translator is replaced with app.translator.FakeTranslatorBackend.
+
+Outputs depend only on the input text (and the configured seed), so repeated
+benchmark runs do identical work. Latency and transient errors can be
+injected to model provider behaviour.
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Union, get_args, get_origin
+
+import httpx
+import numpy as np
+import openai
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from app.models.rate_limiter import estimate_tokens
+from app.utils.metrics import record_embedding_call, record_llm_call
+
+EMBEDDING_DIMENSIONS = 3072  # text-embedding-3-large, matches the FAISS indexes
+
+_WORDS = (
+    "accused recovered ganja contraband seizure sealed sample witness station "
+    "officer section panchnama quantity memo FSL report statement search notice"
+).split()
+
+
+@dataclass
+class FaultConfig:
+    """Latency and error injection for a fake backend."""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+class FaultInjector:
+    """Seeded source of simulated latency and retryable provider errors."""
+
+    def __init__(self, config: FaultConfig):
+        self.config = config
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> tuple[float, bool]:
+        with self._lock:
+            jitter = self._random.uniform(-1, 1) * self.config.jitter_ms
+            fail = self._random.random() < self.config.error_rate
+        return max(0.0, self.config.latency_ms + jitter) / 1000, fail
+
+    @staticmethod
+    def _error() -> Exception:
+        # A transient error the retry layer is expected to handle
+        return openai.APIConnectionError(request=httpx.Request("POST", "https://fake.local/v1"))
+
+    def wait(self):
+        delay, fail = self._draw()
+        time.sleep(delay)
+        if fail:
+            raise self._error()
+
+    async def await_(self):
+        delay, fail = self._draw()
+        await asyncio.sleep(delay)
+        if fail:
+            raise self._error()
+
+
+def _seed(text: str, salt: str = "") -> int:
+    return int.from_bytes(hashlib.sha256((salt + text).encode("utf-8")).digest()[:8], "big")
+
+
+def _prompt_text(prompt) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    if isinstance(prompt, list):
+        return "\n".join(str(getattr(message, "content", message)) for message in prompt)
+    return str(getattr(prompt, "content", prompt))
+
+
+def _fake_text(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _fake_value(annotation, rng: random.Random, field=None):
+    """Build a value matching a type annotation."""
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is Union:
+        return _fake_value(next(a for a in args if a is not type(None)), rng)
+    if origin is list:
+        count = 3
+        max_length = next((m.max_length for m in getattr(field, "metadata", []) if hasattr(m, "max_length")), None)
+        if max_length is not None:
+            count = min(count, max_length)
+        return [_fake_value(args[0] if args else str, rng) for _ in range(count)]
+    if origin is dict:
+        return {_fake_text(rng, 3): _fake_value(args[1] if args else str, rng) for _ in range(3)}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return build_fake_model(annotation, rng)
+    if annotation is bool:
+        return rng.random() < 0.5
+    if annotation is int:
+        return rng.randint(1, 100)
+    if annotation is float:
+        return rng.random()
+    return _fake_text(rng)
+
+
+def build_fake_model(schema: type[BaseModel], rng: random.Random) -> BaseModel:
+    """Instantiate `schema` with plausible, seeded values for every field."""
+    values = {name: _fake_value(field.annotation, rng, field) for name, field in schema.model_fields.items()}
+    return schema(**values)
+
+
+class FakeStructuredRunnable:
+    """Result of FakeChatModel.with_structured_output(schema)."""
+
+    def __init__(self, model: "FakeChatModel", schema: type[BaseModel]):
+        self.model = model
+        self.schema = schema
+
+    def _respond(self, prompt, start: float) -> BaseModel:
+        text = _prompt_text(prompt)
+        result = build_fake_model(self.schema, random.Random(_seed(text, self.schema.__name__)))
+        self.model._observe(start, text, result.model_dump_json())
+        return result
+
+    def invoke(self, prompt, *args, **kwargs):
+        start = time.perf_counter()
+        self.model.faults.wait()
+        return self._respond(prompt, start)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        start = time.perf_counter()
+        await self.model.faults.await_()
+        return self._respond(prompt, start)
+
+
+class FakeChatModel:
+    """
+    Stand-in for the ChatOpenAI llm_model.
+
+    Plain invoke returns an AIMessage; with_structured_output returns a
+    runnable producing instances of the requested pydantic schema.
+    """
+
+    model_name = "fake-chat"
+
+    def __init__(self, faults: FaultConfig | None = None):
+        self.faults = FaultInjector(faults or FaultConfig())
+
+    def _observe(self, start: float, prompt_text: str, output_text: str):
+        record_llm_call(self.model_name, time.perf_counter() - start,
+                        estimate_tokens(prompt_text), estimate_tokens(output_text), 0.0)
+
+    def with_structured_output(self, schema, **kwargs):
+        return FakeStructuredRunnable(self, schema)
+
+    def _message(self, prompt, start: float) -> AIMessage:
+        text = _prompt_text(prompt)
+        content = _fake_text(random.Random(_seed(text)), 40)
+        self._observe(start, text, content)
+        return AIMessage(content=content)
+
+    def invoke(self, prompt, *args, **kwargs):
+        start = time.perf_counter()
+        self.faults.wait()
+        return self._message(prompt, start)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        start = time.perf_counter()
+        await self.faults.await_()
+        return self._message(prompt, start)
+
+
+class FakeEmbeddings:
+    """Stand-in for OpenAIEmbeddings: unit vectors seeded by a hash of the text."""
+
+    model = "fake-embedding"
+
+    def __init__(self, faults: FaultConfig | None = None, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.faults = FaultInjector(faults or FaultConfig())
+        self.dimensions = dimensions
+
+    def _vector(self, text: str) -> list[float]:
+        vector = np.random.default_rng(_seed(text)).standard_normal(self.dimensions).astype("float32")
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _embed(self, texts, start: float) -> list[list[float]]:
+        vectors = [self._vector(text) for text in texts]
+        tokens = sum(estimate_tokens(text) for text in texts)
+        record_embedding_call(self.model, time.perf_counter() - start, len(texts), tokens, 0.0)
+        return vectors
+
+    def embed_documents(self, texts, chunk_size=None, **kwargs):
+        start = time.perf_counter()
+        self.faults.wait()
+        return self._embed(texts, start)
+
+    async def aembed_documents(self, texts, chunk_size=None, **kwargs):
+        start = time.perf_counter()
+        await self.faults.await_()
+        return self._embed(texts, start)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
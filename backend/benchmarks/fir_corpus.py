@@ -0,0 +1,160 @@
+"""
+Synthetic FIR PDFs for benchmarking.
+
+Each FIR is generated from a seed, so a corpus is identical across runs.
+English FIRs are mixed with Gujarati ones (English header, Gujarati body, as
+in the Gujarati forms police stations file) so translation, the translation
+memory and the translator connection pool are part of the measured path.
+
+The standard PDF fonts have no Gujarati glyphs and none ship with PyMuPDF,
+so Gujarati lines are written as invisible placeholder text carrying the line
+as /ActualText, the PDF's replacement text for a span. Text extraction
+returns the Gujarati exactly as a real FIR's would; only the rendering is blank.
+"""
+import random
+import textwrap
+
+import fitz
+
+NAMES = ["Anuj Kumar", "Ravi Patel", "Suresh Yadav", "Imran Shaikh", "Meena Devi", "Vikram Singh", "Joseph Dsouza"]
+PLACES = ["Surat railway station, platform 2", "Udhna bus depot", "NH-48 toll plaza, Kamrej",
+          "Varachha main road", "Sachin GIDC gate no. 3", "Ahmedabad-Mumbai train coach S4"]
+SUBSTANCES = [("Ganja", "kg", (0.5, 40.0)), ("Charas", "g", (50, 1500)), ("Heroin", "g", (5, 500)),
+              ("Opium", "kg", (0.2, 5.0)), ("Cocaine", "g", (2, 200)), ("Buprenorphine injections", "vials", (10, 300))]
+OFFICERS = ["PSI R. M. Desai", "PI K. J. Chauhan", "ASI P. B. Parmar", "HC D. S. Rathod"]
+
+PARAGRAPHS = [
+    "On {date} at about {time} hours, the complainant {officer} received secret information that a person "
+    "carrying {substance} would be present at {place}. The information was reduced into writing and "
+    "forwarded to the superior officer as required under Section 42 of the NDPS Act.",
+    "The raiding party along with two independent panch witnesses reached {place} and noticed a person "
+    "behaving suspiciously. On inquiry the person disclosed the name as {accused}, aged {age} years, "
+    "resident of {address}.",
+    "The accused was informed of the right under Section 50 of the NDPS Act to be searched in the presence "
+    "of a Gazetted Officer or Magistrate. The accused declined in writing. The search was conducted in the "
+    "presence of panch witnesses and videographed on the official mobile phone.",
+    "On search, {quantity} {unit} of {substance} was recovered from a bag carried by the accused. The "
+    "contraband was weighed on an electronic scale, two samples of equal quantity were drawn, sealed with "
+    "the seal 'PS-{seal}' and marked as Exhibits A-1 and A-2. The remaining bulk was sealed as Exhibit A.",
+    "In the voluntary statement the accused stated that the {substance} was purchased from an unknown "
+    "person near {place} for Rs. {amount} and was meant for onward delivery. A mobile phone and cash of "
+    "Rs. {cash} were also seized under a separate panchnama.",
+    "The accused was arrested at {arrest_time} hours and the grounds of arrest were communicated. The "
+    "seizure memo, arrest memo and site plan were prepared on the spot and signed by the witnesses. "
+    "The case property was deposited in the malkhana and the samples were sent to FSL.",
+    "Hence this complaint is registered against {accused} for offences punishable under Sections "
+    "{sections} of the NDPS Act, 1985. Further investigation is being carried out by {officer}.",
+]
+
+GUJARATI_PARAGRAPHS = [
+    "તા. {date} ના રોજ આશરે {time} કલાકે ફરિયાદી {officer} ને બાતમી મળી હતી કે {place} ખાતે {substance} સાથે "
+    "એક વ્યક્તિ હાજર રહેવાનો છે. આ બાતમી લેખિતમાં નોંધી NDPS એક્ટની કલમ 42 મુજબ ઉપરી અધિકારીને મોકલવામાં આવી હતી.",
+    "રેડિંગ પાર્ટી બે સ્વતંત્ર પંચ સાક્ષીઓ સાથે {place} ખાતે પહોંચી અને એક શંકાસ્પદ વ્યક્તિને જોઈ. પૂછપરછ કરતાં "
+    "તેણે પોતાનું નામ {accused}, ઉંમર {age} વર્ષ, રહે. {address} જણાવ્યું હતું.",
+    "આરોપીને NDPS એક્ટની કલમ 50 હેઠળ ગેઝેટેડ અધિકારી અથવા મેજિસ્ટ્રેટની હાજરીમાં ઝડતી લેવડાવવાના અધિકાર વિશે જાણ "
+    "કરવામાં આવી હતી. આરોપીએ લેખિતમાં ઇનકાર કર્યો હતો. ઝડતી પંચ સાક્ષીઓની હાજરીમાં લેવામાં આવી અને સરકારી "
+    "મોબાઇલ ફોન પર તેનું વિડિયો રેકોર્ડિંગ કરવામાં આવ્યું હતું.",
+    "ઝડતી દરમિયાન આરોપી પાસેના થેલામાંથી {quantity} {unit} {substance} મળી આવ્યો હતો. મુદ્દામાલનું ઇલેક્ટ્રોનિક "
+    "વજનકાંટા પર વજન કરી, સરખા જથ્થાના બે નમૂના લઈ 'PS-{seal}' સીલથી સીલ કરી A-1 અને A-2 તરીકે નિશાની કરવામાં "
+    "આવી હતી. બાકીનો જથ્થો મુદ્દામાલ A તરીકે સીલ કરવામાં આવ્યો હતો.",
+    "આરોપીએ સ્વૈચ્છિક નિવેદનમાં જણાવ્યું હતું કે {substance} તેણે {place} નજીક એક અજાણ્યા વ્યક્તિ પાસેથી રૂ. "
+    "{amount} માં ખરીદ્યો હતો અને આગળ પહોંચાડવાનો હતો. એક મોબાઇલ ફોન અને રૂ. {cash} રોકડ અલગ પંચનામા હેઠળ "
+    "કબજે કરવામાં આવ્યા હતા.",
+    "આરોપીની {arrest_time} કલાકે ધરપકડ કરી ધરપકડના કારણો જણાવવામાં આવ્યા હતા. જપ્તી મેમો, ધરપકડ મેમો અને સ્થળ "
+    "નકશો સ્થળ પર જ તૈયાર કરી સાક્ષીઓની સહી લેવામાં આવી હતી. મુદ્દામાલ માલખાનામાં જમા કરાવી નમૂના FSL ખાતે "
+    "મોકલવામાં આવ્યા હતા.",
+    "આથી {accused} વિરુદ્ધ NDPS એક્ટ, 1985 ની કલમ {sections} હેઠળ શિક્ષાપાત્ર ગુના માટે આ ફરિયાદ નોંધવામાં આવી "
+    "છે. વધુ તપાસ {officer} દ્વારા કરવામાં આવી રહી છે.",
+]
+
+PARAGRAPHS_BY_LANGUAGE = {"en": PARAGRAPHS, "gu": GUJARATI_PARAGRAPHS}
+
+
+def fir_text(seed: int, language: str = "en") -> str:
+    """Generate the text of one synthetic FIR, with its body in `language` ("en" or "gu")."""
+    rng = random.Random(seed)
+    substance, unit, (low, high) = rng.choice(SUBSTANCES)
+    quantity = round(rng.uniform(low, high), 2)
+    hour = rng.randint(0, 23)
+    fields = {
+        "date": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2023, 2025)}",
+        "time": f"{hour:02d}:{rng.randint(0, 59):02d}",
+        "arrest_time": f"{(hour + 2) % 24:02d}:{rng.randint(0, 59):02d}",
+        "officer": rng.choice(OFFICERS),
+        "place": rng.choice(PLACES),
+        "accused": rng.choice(NAMES),
+        "age": rng.randint(17, 60),
+        "address": f"{rng.randint(1, 400)}, {rng.choice(['Limbayat', 'Katargam', 'Pandesara', 'Rander'])}, Surat",
+        "substance": substance,
+        "quantity": quantity,
+        "unit": unit,
+        "seal": rng.randint(100, 999),
+        "amount": rng.randint(2, 90) * 1000,
+        "cash": rng.randint(5, 200) * 100,
+        "sections": rng.choice(["8(c), 20(b)(ii)(C)", "8(c), 21(b)", "8(c), 22(c), 29", "8(c), 18(b)"]),
+    }
+    header = f"FIRST INFORMATION REPORT\nFIR No. {rng.randint(1, 999)}/{fields['date'][-4:]}   Police Station: Surat City\n"
+    body = "\n\n".join(paragraph.format(**fields) for paragraph in PARAGRAPHS_BY_LANGUAGE[language])
+    return header + "\n" + body
+
+
+def _is_latin1(text: str) -> bool:
+    try:
+        text.encode("latin-1")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _insert_lines(doc, page, lines: list[str], fontsize: float = 9):
+    """Write `lines` from the top left of `page`, non-Latin-1 lines as /ActualText (see module docstring)."""
+    page.insert_font(fontname="helv")
+    ops = [f"BT /helv {fontsize} Tf {fontsize * 1.25} TL 50 {page.rect.height - 60} Td"]
+    for line in lines:
+        if _is_latin1(line):
+            literal = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({literal}) Tj T*")
+        else:
+            utf16 = "FEFF" + line.encode("utf-16-be").hex().upper()
+            ops.append(f"/Span <</ActualText <{utf16}>>> BDC 3 Tr (-) Tj 0 Tr EMC T*")
+    ops.append("ET")
+    xref = doc.get_new_xref()
+    doc.update_object(xref, "<<>>")
+    doc.update_stream(xref, "\n".join(ops).encode("latin-1"))
+    doc.xref_set_key(page.xref, "Contents", f"{xref} 0 R")
+
+
+def fir_pdf(seed: int, pages: int = 2, language: str = "en") -> bytes:
+    """Render a synthetic FIR as a PDF, spreading its paragraphs over `pages` pages."""
+    paragraphs = fir_text(seed, language).split("\n\n")
+    per_page = max(1, -(-len(paragraphs) // pages))
+    doc = fitz.open()
+    try:
+        for start in range(0, len(paragraphs), per_page):
+            page = doc.new_page()
+            lines = []
+            for paragraph in paragraphs[start:start + per_page]:
+                lines.extend(textwrap.wrap(paragraph, 90) or [""])
+                lines.append("")
+            if language == "en":
+                page.insert_text((50, 60), "\n".join(lines), fontsize=9)
+            else:
+                _insert_lines(doc, page, lines)
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def synthetic_corpus(count: int, seed: int = 0, pages: int = 2, gujarati_every: int = 4) -> list[tuple[str, bytes]]:
+    """
+    Return `count` (filename, pdf_bytes) pairs.
+
+    Every `gujarati_every`-th FIR, starting with the second, is in Gujarati
+    (0 for an English-only corpus).
+    """
+    corpus = []
+    for i in range(count):
+        language = "gu" if gujarati_every and (i - 1) % gujarati_every == 0 else "en"
+        suffix = "" if language == "en" else f"_{language}"
+        corpus.append((f"synthetic_fir_{seed + i:04d}{suffix}.pdf", fir_pdf(seed + i, pages, language)))
+    return corpus
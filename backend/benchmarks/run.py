@@ -0,0 +1,253 @@
+"""
+Benchmark the full workflow graph offline.
+
+Swaps app.models.openai.llm_model / embedding_model for the deterministic
+fakes in benchmarks.fakes and the translator for its local fake backend, runs the graph over a corpus of
+synthetic FIR PDFs and reports throughput and p50/p95 latency per node. Every
+--gujarati-every'th FIR is in Gujarati, so the report also counts characters
+translated and served from translation memory (a fresh in-memory one per run).
+
+Examples (from the backend directory):
+    python -m benchmarks.run --firs 20 --concurrency 4 --llm-latency-ms 800 --llm-jitter-ms 300
+    python -m benchmarks.run --json bench.json
+    python -m benchmarks.run --baseline bench.json --max-regression 0.2
+
+With --baseline the run exits non-zero if end-to-end or any node's p95 is
+more than --max-regression slower than the baseline.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings, FaultConfig
+from benchmarks.fir_corpus import synthetic_corpus
+
+logger = logging.getLogger(__name__)
+
+# bns/bnss have no FAISS index under app/rag, so they are not benchmarked by default
+DEFAULT_SECTIONS = [
+    "ndps", "bsa", "investigation_plan", "historical_cases", "timeline", "evidence",
+    "dos_and_donts", "weaknesses", "defence_rebuttal", "court_summary", "chargesheet",
+]
+
+# Modules that bind llm_model / embedding_model / the translator at import time
+_BOUND_MODULES = ("app.langgraph.workflow", "app.components", "app.rag")
+
+
+def install_fakes(llm: FakeChatModel, embeddings: FakeEmbeddings, translator_latency_seconds: float = 0.0):
+    """
+    Replace the OpenAI models and translator backend with fakes.
+
+    Must run before the graph is imported, since components bind the models
+    with `from app.models.openai import llm_model`.
+    """
+    loaded = [name for name in sys.modules if name.startswith(_BOUND_MODULES)]
+    if loaded:
+        raise RuntimeError(f"Fakes must be installed before importing: {', '.join(sorted(loaded))}")
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+    import app.models.openai as openai_models
+    from app.translator import FakeTranslatorBackend, set_translator_backend
+    from app.translator.memory import TranslationMemory, set_translation_memory
+
+    openai_models.llm_model = llm
+    openai_models.embedding_model = embeddings
+    set_translator_backend(FakeTranslatorBackend(latency_seconds=translator_latency_seconds))
+    # Memory hits are measured within the run, not carried over from earlier runs
+    set_translation_memory(TranslationMemory(":memory:"))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _summary(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "max": max(values) if values else 0.0,
+    }
+
+
+async def _run_async(graph, corpus, sections, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(filename, pdf_bytes):
+        workflow_id = f"bench-{uuid.uuid4().hex[:12]}"
+        state = {"sections": sections, "pdf_bytes": pdf_bytes, "pdf_filename": filename}
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await graph.ainvoke(state, config={"configurable": {"thread_id": workflow_id}})
+                translation, error = result.get("translation_stats"), None
+            except Exception as e:
+                translation, error = None, f"{type(e).__name__}: {e}"
+            return workflow_id, time.perf_counter() - start, error, translation
+
+    return await asyncio.gather(*(run_one(filename, pdf_bytes) for filename, pdf_bytes in corpus))
+
+
+def _run_sync(graph, corpus, sections, concurrency):
+    def run_one(item):
+        filename, pdf_bytes = item
+        workflow_id = f"bench-{uuid.uuid4().hex[:12]}"
+        state = {"sections": sections, "pdf_bytes": pdf_bytes, "pdf_filename": filename}
+        start = time.perf_counter()
+        try:
+            result = graph.invoke(state, config={"configurable": {"thread_id": workflow_id}})
+            translation, error = result.get("translation_stats"), None
+        except Exception as e:
+            translation, error = None, f"{type(e).__name__}: {e}"
+        return workflow_id, time.perf_counter() - start, error, translation
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(run_one, corpus))
+
+
+def run_benchmark(args) -> dict:
+    install_fakes(
+        FakeChatModel(FaultConfig(args.llm_latency_ms, args.llm_jitter_ms, args.llm_error_rate, args.seed)),
+        FakeEmbeddings(FaultConfig(args.embedding_latency_ms, args.embedding_jitter_ms, args.embedding_error_rate, args.seed + 1)),
+        args.translator_latency_ms / 1000,
+    )
+    from app.langgraph.workflow import graph
+    from app.translator import pool_stats
+    from app.utils.metrics import workflow_breakdown
+
+    corpus = synthetic_corpus(args.firs, seed=args.seed, pages=args.pages, gujarati_every=args.gujarati_every)
+    sections = args.sections.split(",") if args.sections else DEFAULT_SECTIONS
+
+    start = time.perf_counter()
+    if args.mode == "sync":
+        runs = _run_sync(graph, corpus, sections, args.concurrency)
+    else:
+        runs = asyncio.run(_run_async(graph, corpus, sections, args.concurrency))
+    elapsed = time.perf_counter() - start
+
+    node_times = {}
+    llm_calls = embedding_calls = faiss_searches = 0
+    translation = dict.fromkeys(("pages", "pages_translated", "chars_total", "chars_non_english",
+                                 "chars_translated", "segments_total", "segments_from_memory"), 0)
+    for workflow_id, _, _, stats in runs:
+        for key in translation:
+            translation[key] += (stats or {}).get(key, 0)
+        breakdown = workflow_breakdown(workflow_id)
+        for node, stats in breakdown["nodes"].items():
+            node_times.setdefault(node, []).append(stats["wall_time_seconds"])
+        llm_calls += breakdown["totals"]["llm_calls"]
+        embedding_calls += breakdown["totals"]["embedding_calls"]
+        faiss_searches += breakdown["totals"]["faiss_searches"]
+
+    errors = [error for _, _, error, _ in runs if error]
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("json", "baseline")},
+        "workflows": len(runs),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_time_seconds": elapsed,
+        "throughput_per_minute": len(runs) / elapsed * 60 if elapsed else 0.0,
+        "end_to_end": _summary([duration for _, duration, error, _ in runs if not error]),
+        "nodes": {node: _summary(times) for node, times in sorted(node_times.items())},
+        "calls": {"llm": llm_calls, "embedding": embedding_calls, "faiss_search": faiss_searches},
+        "translation": translation,
+        # Empty with the fake backend, which sends no HTTP requests
+        "translator_pool": pool_stats(),
+    }
+
+
+def print_report(report: dict):
+    print(f"\nWorkflows: {report['workflows']}  errors: {report['errors']}  "
+          f"wall time: {report['wall_time_seconds']:.2f}s  "
+          f"throughput: {report['throughput_per_minute']:.1f}/min")
+    calls = report["calls"]
+    print(f"Calls: llm={calls['llm']} embedding={calls['embedding']} faiss_search={calls['faiss_search']}")
+    translation = report["translation"]
+    print(f"Translation: pages={translation['pages_translated']}/{translation['pages']} "
+          f"chars sent={translation['chars_translated']}/{translation['chars_non_english']} non-English "
+          f"segments from memory={translation['segments_from_memory']}/{translation['segments_total']}")
+    for pool in report["translator_pool"]:
+        print(f"Translator pool {pool['host']}: connections opened={pool['connections_opened']} "
+              f"requests={pool['requests']} idle={pool['idle_connections']}/{pool['max_size']}")
+    print()
+    print(f"{'node':<45}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    rows = [("END-TO-END", report["end_to_end"])] + list(report["nodes"].items())
+    for name, stats in rows:
+        print(f"{name:<45}{stats['count']:>5}{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}")
+    for sample in report["error_samples"]:
+        print(f"error: {sample}")
+
+
+def compare_to_baseline(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Return descriptions of p95 regressions beyond max_regression (a fraction)."""
+    regressions = []
+    pairs = [("END-TO-END", report["end_to_end"], baseline.get("end_to_end"))]
+    pairs += [(node, stats, baseline.get("nodes", {}).get(node)) for node, stats in report["nodes"].items()]
+    for name, current, previous in pairs:
+        if not previous or not previous["p95"]:
+            continue
+        change = current["p95"] / previous["p95"] - 1
+        if change > max_regression:
+            regressions.append(f"{name}: p95 {previous['p95'] * 1000:.1f}ms -> {current['p95'] * 1000:.1f}ms (+{change:.0%})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the FIR analysis graph")
+    parser.add_argument("--firs", type=int, default=10, help="Number of synthetic FIRs to run")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per synthetic FIR")
+    parser.add_argument("--gujarati-every", type=int, default=4, help="Every Nth FIR is in Gujarati (0: English only)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Workflows run at the same time")
+    parser.add_argument("--mode", choices=("async", "sync"), default="async", help="graph.ainvoke or graph.invoke")
+    parser.add_argument("--sections", default="", help="Comma-separated sections (default: all with an index)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=10.0)
+    parser.add_argument("--embedding-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--embedding-error-rate", type=float, default=0.0)
+    parser.add_argument("--translator-latency-ms", type=float, default=20.0)
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Baseline JSON report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 slowdown vs baseline (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_args(argv)
+    report = run_benchmark(args)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo p95 regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
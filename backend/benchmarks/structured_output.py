@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: cost of building structured-output runnables per call.
+
+Before app.models.structured, nodes called llm_model.with_structured_output(Schema)
+on every invocation (and the mapping nodes once per extracted point), which
+converts the schema to a tool definition and builds a new runnable chain each
+time. This measures that construction against a lookup in the registry, for
+every schema the graph uses, using the real ChatOpenAI class (no requests are
+sent, so no API key or network is needed).
+
+Examples (from the backend directory):
+    python -m benchmarks.structured_output
+    python -m benchmarks.structured_output --iterations 500 --points 10
+"""
+import argparse
+import os
+import statistics
+import time
+
+# The real model is only constructed, never called
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+# Schema -> times it was built per workflow before the registry:
+# once per node call, plus once per point in the mapping nodes
+_SCHEMAS = (
+    ("app.components.fir_fact_extraction", "FirFactExtraction", 1),
+    ("app.components.ndps_legal_mapping", "PointsToBeCharged", 1),
+    ("app.components.ndps_legal_mapping", "NdpsLegalMapping", "points"),
+    ("app.components.bsa_legal_mapping", "PointsToBeCharged", 1),
+    ("app.components.bsa_legal_mapping", "BsaLegalMapping", "points"),
+    ("app.components.investigation_plan", "InvestigationPlan", 1),
+    ("app.components.historical_cases", "JudgementSearch", 1),
+    ("app.components.evidence_checklist", "InvestigationCheckpoints", 1),
+    ("app.components.evidence_checklist", "EvidenceChecklist", 1),
+    ("app.components.dos_and_dont", "DosAndDonts", 1),
+    ("app.components.potential_prosecution_weaknesses", "PotentialProsecutionWeaknesses", 1),
+    ("app.components.defence_perspective_rebuttal", "DefencePerspectiveRebuttalList", 1),
+    ("app.components.summary_for_the_court", "SummaryForTheCourt", 1),
+    ("app.components.chargesheet", "Chargesheet", 1),
+)
+
+
+def _time_per_call(func, iterations: int) -> float:
+    """Median seconds per call over `iterations` calls (after one warm-up call)."""
+    func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run(iterations: int, points: int) -> dict:
+    import importlib
+    from app.models.openai import llm_model
+    from app.models.structured import structured_llm
+
+    rows = []
+    for module_name, schema_name, builds in _SCHEMAS:
+        schema = getattr(importlib.import_module(module_name), schema_name)
+        rebuild = _time_per_call(lambda: llm_model.with_structured_output(schema), iterations)
+        lookup = _time_per_call(lambda: structured_llm(schema), iterations)
+        rows.append({
+            "schema": schema_name,
+            "builds_per_workflow": points if builds == "points" else builds,
+            "rebuild_us": rebuild * 1e6,
+            "registry_us": lookup * 1e6,
+        })
+
+    saved_ms = sum(row["builds_per_workflow"] * (row["rebuild_us"] - row["registry_us"]) for row in rows) / 1000
+    return {"rows": rows, "saved_ms_per_workflow": saved_ms}
+
+
+def print_report(report: dict):
+    print(f"{'schema':<34}{'per wf':>8}{'rebuild us':>13}{'registry us':>13}")
+    for row in report["rows"]:
+        print(f"{row['schema']:<34}{row['builds_per_workflow']:>8}"
+              f"{row['rebuild_us']:>13.1f}{row['registry_us']:>13.2f}")
+    print(f"\nConstruction time removed per workflow (all sections): {report['saved_ms_per_workflow']:.2f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Per-call cost of with_structured_output vs the runnable registry")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per schema")
+    parser.add_argument("--points", type=int, default=10, help="Points per mapping node (runnables built per point before)")
+    args = parser.parse_args(argv)
+    print_report(run(args.iterations, args.points))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
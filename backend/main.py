@@ -16,6 +16,7 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='repla
 
 from app.routes import api_router
 from app.routes.config import STATIC_DIR
+from app.utils.limits import UploadSizeLimitMiddleware
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -27,6 +28,9 @@ app = FastAPI(
 # Add session middleware
 app.add_middleware(SessionMiddleware, secret_key="your-secret-key-change-in-production")
 
+# Reject oversized uploads while the body is received, before multipart parsing
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Mount static files (JS, CSS, images, etc.)
 if STATIC_DIR.exists():
     # Mount assets directory if it exists (contains bundled JS/CSS)
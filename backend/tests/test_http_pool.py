@@ -0,0 +1,56 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from urllib3.exceptions import EmptyPoolError
+
+from app.translator import http_pool
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(1)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def single_connection(monkeypatch):
+    monkeypatch.setattr(http_pool, "_session", None)
+    monkeypatch.setattr(http_pool, "POOL_SIZE", 1)
+    monkeypatch.setattr(http_pool, "POOL_TIMEOUT_SECONDS", 0.2)
+    yield http_pool.get_http_session()
+    http_pool._session.close()
+
+
+def test_checkout_gives_up_when_the_pool_is_saturated(server, single_connection):
+    first = threading.Thread(target=single_connection.get, args=(server,), kwargs={"timeout": 5})
+    first.start()
+    time.sleep(0.2)
+    started = time.monotonic()
+    with pytest.raises(EmptyPoolError):
+        single_connection.get(server, timeout=5)
+    assert time.monotonic() - started < 0.8
+    first.join()
+
+
+def test_connection_is_reused_once_free(server, single_connection):
+    assert single_connection.get(server, timeout=5).text == "ok"
+    assert single_connection.get(server, timeout=5).text == "ok"
+    assert http_pool.pool_stats()[0]["connections_opened"] == 1
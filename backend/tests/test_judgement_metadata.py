@@ -0,0 +1,21 @@
+from app.rag.judgement_metadata import build_metadata
+
+CHUNKS = [
+    {"chunk_id": 0, "case_number": "12", "year": "1998",
+     "content": "State of Punjab vs. Baldev Singh\\nSupreme Court\\nGanja recovered; Section 50 NDPS Act."},
+    {"chunk_id": 1, "case_number": "7", "year": "2004", "content": "High Court bail order under section 37"},
+]
+
+
+def test_rebuild_keeps_existing_summaries():
+    existing = {"0": {"summary": "Stored summary"}}
+    metadata = build_metadata(CHUNKS, existing, summarise=False)
+    assert set(metadata) == {"0", "1"}
+    assert metadata["0"]["summary"] == "Stored summary"
+    assert metadata["1"]["summary"] is None
+    assert metadata["0"]["issues"] == ["section_50"]
+
+
+def test_force_drops_existing_summaries():
+    metadata = build_metadata(CHUNKS, {"0": {"summary": "Stored summary"}}, summarise=False, force=True)
+    assert metadata["0"]["summary"] is None
@@ -0,0 +1,43 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.utils.limits import UploadSizeLimitMiddleware
+
+received = []
+
+app = FastAPI()
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=1000)
+
+
+@app.post("/upload")
+async def upload(file: UploadFile = File(...)):
+    received.append(file.filename)
+    return {"size": len(await file.read())}
+
+
+client = TestClient(app)
+
+
+def test_small_upload_passes():
+    response = client.post("/upload", files={"file": ("a.pdf", b"x" * 100)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_declared_length_over_limit_is_rejected():
+    received.clear()
+    response = client.post("/upload", files={"file": ("a.pdf", b"x" * 5000)})
+    assert response.status_code == 413
+    assert received == []
+
+
+def test_chunked_body_over_limit_is_rejected():
+    received.clear()
+
+    def body():
+        for _ in range(50):
+            yield b"x" * 100
+
+    response = client.post("/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+    assert received == []
@@ -0,0 +1,42 @@
+import pytest
+
+from app.utils.mapped_sections import canonical_section_number, merge_mapped_sections, section_references
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Section 20(b)(ii)(B)", "Section 20 (b)(ii)(B)"),
+    ("S. 20 (b) of NDPS Act", "Section 20 (b)"),
+    ("u/s 20(b-ii)", "Section 20 (b)(ii)"),
+    ("Section 52-A", "Section 52A"),
+    ("Section 52A", "Section 52A"),
+    ("Section 20 of NDPS Act, 1985", "Section 20"),
+    # Several sections in one string are kept as written
+    ("Section 8(c), 20(b)", "Section 8(c), 20(b)"),
+    ("u/s 8(c) r/w 20(b)", "u/s 8(c) r/w 20(b)"),
+])
+def test_canonical_section_number(text, expected):
+    assert canonical_section_number(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("u/s 8(c) r/w 20(b)(ii)(B), 29 NDPS Act", ["Section 8 (c)", "Section 20 (b)(ii)(B)", "Section 29"]),
+    ("8(c), 20(b)", ["Section 8 (c)", "Section 20 (b)"]),
+    ("Sections 8(c) and 29", ["Section 8 (c)", "Section 29"]),
+    ("Section 21 read with Section 29 of NDPS Act, 1985", ["Section 21", "Section 29"]),
+    ("Sec. 8(c)/22(c)", ["Section 8 (c)", "Section 22 (c)"]),
+    ("Section 52-A", ["Section 52A"]),
+    ("NDPS Act", []),
+])
+def test_section_references(text, expected):
+    assert section_references(text) == expected
+
+
+def test_merge_keeps_distinct_sections_apart():
+    sections_per_point = [
+        [{"section_number": "Section 52", "section_description": "a", "why_section_is_relevant": "r1", "source": "s"}],
+        [{"section_number": "Section 52-A", "section_description": "b", "why_section_is_relevant": "r2", "source": "s"}],
+        [{"section_number": "Section 8(c), 20(b)", "section_description": "c", "why_section_is_relevant": "r3", "source": "s"},
+         {"section_number": "Section 52-A of NDPS Act", "section_description": "d", "why_section_is_relevant": "r4", "source": "s"}],
+    ]
+    merged = merge_mapped_sections(sections_per_point, [[], [], []])
+    assert [section["section_number"] for section in merged] == ["Section 52A", "Section 52", "Section 8(c), 20(b)"]
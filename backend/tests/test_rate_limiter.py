@@ -0,0 +1,98 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from app.models.rate_limiter import RateLimiter
+
+
+def _lock_database(db_path: str, seconds: float) -> threading.Thread:
+    """Hold an exclusive SQLite transaction on db_path for `seconds` in another thread."""
+    locked = threading.Event()
+
+    def hold():
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(seconds)
+        conn.execute("COMMIT")
+        conn.close()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    locked.wait()
+    return thread
+
+
+def test_shared_buckets_do_not_block_event_loop(tmp_path):
+    db_path = str(tmp_path / "limits.db")
+    limiter = RateLimiter("test", rpm=1000, tpm=100000, db_path=db_path)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        holder = _lock_database(db_path, 0.5)
+        async with limiter.alimit(10):
+            pass
+        holder.join()
+        ticking.cancel()
+        return ticks
+
+    # The loop kept running while the acquire waited for the SQLite lock
+    assert asyncio.run(scenario()) >= 20
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_cancelled_shared_acquire_returns_its_slot(tmp_path):
+    db_path = str(tmp_path / "limits.db")
+    limiter = RateLimiter("test", rpm=1000, tpm=100000, max_concurrency=1, db_path=db_path)
+
+    async def scenario():
+        holder = _lock_database(db_path, 0.3)
+        acquiring = asyncio.create_task(limiter.aacquire(10))
+        await asyncio.sleep(0.1)
+        acquiring.cancel()
+        try:
+            await acquiring
+        except asyncio.CancelledError:
+            pass
+        holder.join()
+        # The granting thread finishes after the lock is released
+        await asyncio.sleep(0.2)
+        async with limiter.alimit(10):
+            return limiter.stats()
+
+    assert asyncio.run(scenario())["in_flight"] == 1
+    assert limiter.stats() == {"name": "test", "in_flight": 0, "waiting": 0}
+
+
+def test_locked_database_does_not_block_limiter_lock(tmp_path):
+    db_path = str(tmp_path / "limits.db")
+    limiter = RateLimiter("test", rpm=1000, tpm=100000, db_path=db_path)
+
+    async def scenario():
+        holder = _lock_database(db_path, 0.5)
+        acquiring = asyncio.create_task(limiter.aacquire(10))
+        await asyncio.sleep(0.05)
+        # The acquire is now waiting on SQLite in a worker thread; the limiter's own
+        # bookkeeping on the loop must not wait for it
+        start = time.perf_counter()
+        for _ in range(10):
+            limiter.stats()
+            other = asyncio.create_task(limiter.aacquire(10))
+            await asyncio.sleep(0)
+            other.cancel()
+        elapsed = time.perf_counter() - start
+        reservation = await acquiring
+        limiter.release(reservation)
+        holder.join()
+        return elapsed
+
+    assert asyncio.run(scenario()) < 0.2
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+import pytest
+
+from app.utils import read_pdf
+
+
+@pytest.fixture
+def single_worker(monkeypatch):
+    read_pdf._shutdown_pool()
+    monkeypatch.setattr(read_pdf, "_pool", None)
+    monkeypatch.setattr(read_pdf, "PDF_EXTRACT_WORKERS", 1)
+    yield
+    read_pdf._shutdown_pool()
+
+
+def _pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {i + 1}")
+    try:
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def test_time_queued_behind_other_tasks_does_not_count(single_worker):
+    first = read_pdf._submit(time.sleep, 0.6)
+    second = read_pdf._submit(time.sleep, 0.6)
+    read_pdf._wait(*first, 0.9)
+    # Submitted over a second ago, but only ran for 0.6s
+    read_pdf._wait(*second, 0.9)
+    assert read_pdf._pool is first[0]
+
+
+def test_hung_task_replaces_the_pool(single_worker):
+    hung = read_pdf._submit(time.sleep, 30)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        read_pdf._wait(*hung, 0.5)
+    assert time.monotonic() - started < 5
+    assert read_pdf._pool is None
+
+    assert read_pdf._wait(*read_pdf._submit(time.sleep, 0), 5) is None
+    assert read_pdf._pool is not hung[0]
+
+
+def test_pages_are_extracted_in_order_by_the_pool(single_worker, monkeypatch):
+    monkeypatch.setattr(read_pdf, "PARALLEL_MIN_PAGES", 2)
+    pages = list(read_pdf.iter_pdf_pages(_pdf(20)))
+    assert [number for number, _ in pages] == list(range(20))
+    assert pages[19][1].strip() == "Page 20"
+
+
+def test_ranges_on_a_recycled_pool_are_extracted_again(single_worker, monkeypatch):
+    monkeypatch.setattr(read_pdf, "PARALLEL_MIN_PAGES", 2)
+    # Another upload's page hangs while this document's ranges are queued behind it
+    hung = read_pdf._submit(time.sleep, 30)
+    with ThreadPoolExecutor(1) as consumer:
+        pages = consumer.submit(list, read_pdf.iter_pdf_pages(_pdf(20)))
+        with pytest.raises(TimeoutError):
+            read_pdf._wait(*hung, 0.5)
+        assert len(pages.result(timeout=30)) == 20
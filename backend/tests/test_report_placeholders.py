@@ -0,0 +1,46 @@
+import pytest
+
+from app.utils.report_placeholders import build_report_placeholders
+
+
+@pytest.mark.parametrize("state, expected", [
+    ({"fir_facts": {"offences_charged": "u/s 8(c) r/w 20(b)(ii)(B), 29 NDPS Act"}},
+     "Section 8(c), Section 20(b)(ii)(B), Section 29"),
+    ({"fir_facts": {"offences_charged": "Offence under **Sections 8(c), 22(c) and 29** of the NDPS Act, 1985"}},
+     "Section 8(c), Section 22(c), Section 29"),
+    ({"summary_for_the_court": {"ndps_sections": ["8(c), 20(b)", "29"]}},
+     "Section 8(c), Section 20(b), Section 29"),
+    ({"chargesheet": {"ndps_sections": ["Section 8(c) read with Section 21(b)", "Section 52-A"]}},
+     "Section 8(c), Section 21(b), Section 52A"),
+    ({"ndps_sections_mapped": [{"section_number": "Section 20 (b)(ii)(B)"}, {"section_number": "u/s 8(c) r/w 29"}]},
+     "Section 20(b)(ii)(B), Section 8(c), Section 29"),
+    ({"fir_facts": {"offences_charged": "Sections of NDPS Act"}}, "NDPS Act sections"),
+])
+def test_sections_invoked(state, expected):
+    assert build_report_placeholders(state)["sections_invoked"] == expected
+
+
+@pytest.mark.parametrize("state, expected", [
+    ({"pdf_content_in_english": "Date and Time of FIR: 14/03/2024 10:15 hrs\nOccurrence: 12/03/2024",
+      "fir_facts": {"date_time_location": "On **12/03/2024** at Surat station"}}, "14.03.2024"),
+    ({"pdf_content_in_english": "FIR No. 11208/2024 dated 13.03.2024 at Surat Railway PS",
+      "fir_facts": {"date_time_location": "On 12/03/2024 at Surat station"}}, "13.03.2024"),
+    ({"fir_facts": {"date_time_location": "On **12/03/2024** at Surat station",
+                    "procedural_notes": "The FIR was registered on 15-03-2024 at 09:00 hrs"}}, "15.03.2024"),
+    ({"fir_facts": {"date_time_location": "On **12/03/2024** at Surat station"}}, "12.03.2024"),
+    ({"summary_for_the_court": {"date_and_place": "12.3.24, Surat"}}, "12.03.2024"),
+    ({}, "Not specified"),
+])
+def test_fir_date(state, expected):
+    assert build_report_placeholders(state)["fir_date"] == expected
+
+
+def test_accused_and_case_title():
+    placeholders = build_report_placeholders(
+        {"summary_for_the_court": {"case_title": "STATE OF GUJARAT vs. Ramesh (JUVENILE)"}})
+    assert placeholders["case_title"] == "STATE OF GUJARAT vs. Ramesh (JUVENILE)"
+    assert placeholders["name_of_accused"] == "Ramesh"
+
+    placeholders = build_report_placeholders({"fir_facts": {"identity_of_accused": "The accused **Ramesh Patel**, aged 24"}})
+    assert placeholders["name_of_accused"] == "Ramesh Patel"
+    assert placeholders["case_title"] == "STATE OF GUJARAT vs. Ramesh Patel"
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.utils.retry import CircuitBreaker, CircuitOpenError, RetryBudget, async_exponential_backoff_retry
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure(TimeoutError())
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_cancelled_probe_releases_half_open_breaker():
+    breaker = _open_breaker()
+    started = asyncio.Event()
+
+    @async_exponential_backoff_retry(max_retries=0, breaker=breaker, budget=RetryBudget())
+    async def hanging_call():
+        started.set()
+        await asyncio.sleep(60)
+
+    @async_exponential_backoff_retry(max_retries=0, breaker=breaker, budget=RetryBudget())
+    async def ok_call():
+        return "ok"
+
+    async def scenario():
+        probe = asyncio.create_task(hanging_call())
+        await started.wait()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            await ok_call()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert breaker.state == CircuitBreaker.OPEN
+        # reset_timeout=0: the next call is a new probe and closes the circuit
+        return await ok_call()
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,88 @@
+import pytest
+
+from app.translator import (
+    FakeTranslatorBackend, TranslationMemory, needs_translation, set_translation_memory, set_translator_backend,
+    translate_page_stream, translate_pages, translate_to_english,
+)
+from app.translator.translator import _split_segments
+from app.utils.retry import CircuitOpenError
+
+
+def test_wrapped_sentences_are_segmented_whole():
+    text = "यह एक लंबा वाक्य है जो\nदो पंक्तियों में टूटा है। दूसरा वाक्य\nयहाँ है।\n\nनया अनुच्छेद।"
+    assert _split_segments(text, 5000) == [
+        ("यह एक लंबा वाक्य है जो दो पंक्तियों में टूटा है।", " "),
+        ("दूसरा वाक्य यहाँ है।", "\n\n"),
+        ("नया अनुच्छेद।", ""),
+    ]
+
+
+def test_long_sentences_are_still_chunked():
+    text = "शब्द " * 100
+    segments = _split_segments(text, 50)
+    assert all(len(segment) <= 50 for segment, _ in segments)
+    assert "".join(segment + separator for segment, separator in segments) == text
+
+
+class RecordingBackend(FakeTranslatorBackend):
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def translate(self, texts):
+        self.sent.extend(texts)
+        return [f"<en>{text}</en>" for text in texts]
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = RecordingBackend()
+    set_translator_backend(backend)
+    set_translation_memory(TranslationMemory(str(tmp_path / "memory.db")))
+    yield backend
+    set_translator_backend(None)
+    set_translation_memory(None)
+
+
+ENGLISH = ("The accused was intercepted at platform no. 4 of Surat railway station and his bag was searched "
+           "in the presence of two independent panch witnesses. ") * 5
+STATEMENT = "आरोपी ने बताया कि उसने यह गांजा ओडिशा से खरीदा था।"
+
+
+def test_mixed_page_translates_its_non_english_paragraph(backend):
+    page = f"{ENGLISH}\n\n{STATEMENT}\n\n{ENGLISH}"
+    assert not needs_translation(page)
+
+    translated, stats = translate_pages([page, ENGLISH])
+
+    assert backend.sent == [STATEMENT]
+    assert translated[0] == f"{ENGLISH}\n\n<en>{STATEMENT}</en>\n\n{ENGLISH}"
+    assert translated[1] == ENGLISH
+    assert stats["pages_translated"] == 1
+
+
+def test_page_stream_translates_mixed_page(backend):
+    page = f"{ENGLISH}\n\n{STATEMENT}"
+    translated, stats = translate_page_stream(iter([ENGLISH, page]))
+    assert translated == [ENGLISH, f"{ENGLISH}\n\n<en>{STATEMENT}</en>"]
+    assert stats["pages_translated"] == 1
+
+
+class UnavailableBackend(FakeTranslatorBackend):
+    name = "unavailable"
+
+    def translate(self, texts):
+        raise CircuitOpenError("translator circuit is open; failing fast")
+
+
+def test_translate_to_english_passes_circuit_errors_through(tmp_path):
+    set_translator_backend(UnavailableBackend())
+    set_translation_memory(TranslationMemory(str(tmp_path / "memory.db")))
+    try:
+        with pytest.raises(CircuitOpenError):
+            translate_to_english({"pdf_content": STATEMENT, "pdf_pages": [STATEMENT]})
+    finally:
+        set_translator_backend(None)
+        set_translation_memory(None)